@@ -1,7 +1,12 @@
 import os
+import sys
 from google import genai  # Google Gen AI SDK import :contentReference[oaicite:0]{index=0}
 from dotenv import load_dotenv
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gemini_rate_limiter import generate_content
+
 load_dotenv()
 
 API_TOKEN = os.getenv('GEMINI_API_KEY')
@@ -29,7 +34,9 @@ def get_competitors(
         "Do not include any commentary, explanation, or extra text. Only output the list."
     )
 
-    response = client.models.generate_content(
+    # shared cross-process limit and retry (gemini_rate_limiter.py)
+    response = generate_content(
+        client,
         model="gemini-2.0-flash",
         contents=contents,
     )
@@ -67,3 +67,14 @@ CREATE TABLE reel_comments (
   raw_json         JSONB,
   inserted_at      TIMESTAMPTZ DEFAULT now()
 );
+
+-- relevance filter output (filtering.py): verdict + keywords that matched
+ALTER TABLE competitor_ads
+  ADD COLUMN IF NOT EXISTS is_relevant      BOOLEAN,
+  ADD COLUMN IF NOT EXISTS matched_keywords TEXT[];
+ALTER TABLE competitor_reels
+  ADD COLUMN IF NOT EXISTS is_relevant      BOOLEAN,
+  ADD COLUMN IF NOT EXISTS matched_keywords TEXT[];
+
+-- per-reel comment lookups in filtering.py (LATERAL string_agg)
+CREATE INDEX IF NOT EXISTS reel_comments_reel_id_idx ON reel_comments (reel_id);
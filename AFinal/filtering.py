@@ -1,113 +1,18 @@
-def extract_ad_videos(ad_json: dict) -> str:
-    """
-    Traverse ad_json["snapshot"]["cards"] and
-    return a space‑separated string of all videoHdUrl values.
-    """
-    cards = ad_json.get("snapshot", {}).get("cards", [])
-    urls = [c.get("videoHdUrl", "") for c in cards if c.get("videoHdUrl")]
-    return " ".join(urls)
-
-def extract_reel_comments_texts(cur, reel_db_id: int) -> str:
-    """
-    Query reel_comments for that reel_id, then join all comment texts.
-    """
-    cur.execute("""
-        SELECT text
-          FROM reel_comments
-         WHERE reel_id = %s
-    """, (reel_db_id,))
-    return " ".join(r[0] for r in cur.fetchall() if r[0])
-
-import psycopg2, json, re, time, backoff
-from ratelimit import limits, sleep_and_retry
-from google import genai
-from google.genai.errors import ClientError
-
-# … same config, regex_filter, gemini_filter as before …
-
-def process_ads_table(table_name: str, keywords: list):
-    conn = psycopg2.connect(**PG_CONN)
-    cur  = conn.cursor()
-    # fetch raw_json and id
-    cur.execute(f"SELECT id, raw_json FROM {table_name} WHERE is_relevant IS NULL;")
-    rows = cur.fetchall()
-
-    updates = []
-    for db_id, raw in rows:
-        ad = json.loads(raw)
-        # build prompt text: caption + all videoHdUrl
-        caption = ad.get("snapshot", {}).get("caption", "")
-        video_urls = extract_ad_videos(ad)
-        text = f"Caption: {caption}\nVideo URLs: {video_urls}"
-
-        # filter
-        if regex_filter(text, keywords):
-            relevant = True
-        else:
-            relevant = gemini_filter(text, keywords)
-
-        updates.append((relevant, db_id))
-
-    cur.executemany(f"UPDATE {table_name} SET is_relevant=%s WHERE id=%s;", updates)
-    conn.commit()
-    cur.close()
-    conn.close()
-
-
-def process_reels_table(table_name: str, comments_table: str, keywords: list):
-    conn = psycopg2.connect(**PG_CONN)
-    cur  = conn.cursor()
-    # fetch reels
-    cur.execute(f"SELECT id, raw_json, video_url, display_url FROM {table_name} WHERE is_relevant IS NULL;")
-    rows = cur.fetchall()
-
-    updates = []
-    for db_id, raw, video_url, display_url in rows:
-        reel = json.loads(raw)
-        # get comments text
-        comments_text = extract_reel_comments_texts(cur, db_id)
-        text = f"Caption: {reel.get('caption','')}\n" \
-               f"Video URL: {video_url}\n" \
-               f"Display URL: {display_url}\n" \
-               f"Comments: {comments_text}"
-
-        if regex_filter(text, keywords):
-            relevant = True
-        else:
-            relevant = gemini_filter(text, keywords)
-
-        updates.append((relevant, db_id))
-
-    cur.executemany(f"UPDATE {table_name} SET is_relevant=%s WHERE id=%s;", updates)
-    conn.commit()
-    cur.close()
-    conn.close()
-
-if __name__ == "__main__":
-    raw = input("Enter comma‑separated keywords: ").strip()
-    keywords = [w.strip() for w in raw.split(",") if w.strip()]
-
-    print("Filtering ads…")
-    process_ads_table("competitor_ads", keywords)
-
-    print("Filtering reels…")
-    process_reels_table("competitor_reels", "reel_comments", keywords)
-
-    print("Done.")
-
-
-
 #!/usr/bin/env python3
 import os
-import re
+import sys
 import json
-import time
-import backoff
 import psycopg2
 from dotenv import load_dotenv
 from google import genai
-from google.genai.errors import ClientError
-from ratelimit import limits, sleep_and_retry
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from filter_rules import table_where
+from gemini_rate_limiter import generate_content
+from keyword_matcher import get_matcher
+from gemini_batch import BatchClassifier
+from verdict_cache import VerdictCache, verdict_key
 
 load_dotenv()
 
@@ -116,6 +21,10 @@ API_KEY     = os.getenv('GEMINI_API_KEY')
 MODEL_NAME  = "gemini-2.0-flash-001"
 DEVICE      = "cuda" if os.getenv("USE_CUDA","false").lower()=="true" else "cpu"
 
+REELS_BATCH = int(os.getenv("REELS_BATCH_SIZE", 2000))   # reels classified per fetch
+# rules/<table>.json narrow the relevance pass; opt-in, every row is classified by default
+TABLE_RULES = os.getenv("COMPETITOR_RULES", "false").lower() == "true"
+
 PG_CONN     = {
     "host":   os.getenv("PG_HOST"),
     "port":   os.getenv("PG_PORT","5432"),
@@ -124,35 +33,28 @@ PG_CONN     = {
     "password": os.getenv("PG_PASS"),
 }
 
-# rate‑limit Gemini
-_ONE_MINUTE = 60
-MAX_RETRIES = 5
-RETRY_DELAY = 5
-
 # instantiate Gemini
 client = genai.Client(api_key=API_KEY)
 
-# ─── 1. TEXT FILTER: simple regex ────────────────────────────────────────────────
+# verdicts already paid for, checked before every Gemini call
+VERDICTS = VerdictCache()
+
+# ─── 1. TEXT FILTER: keyword match ───────────────────────────────────────────────
 def regex_filter(text: str, keywords: list) -> bool:
     """
     return True if any keyword appears (word‑boundary, case‑insensitive)
     """
-    t = (text or "").lower()
-    for kw in keywords:
-        if re.search(rf'\b{re.escape(kw.lower())}\b', t):
-            return True
-    return False
+    # one compiled pattern per keyword set, one pass over the text
+    return get_matcher(keywords).search(text)
+
+def matched_keywords(text: str, keywords: list) -> list:
+    """
+    return every keyword that appears (word‑boundary, case‑insensitive)
+    """
+    return get_matcher(keywords).findall(text)
 
 # ─── 2. TEXT FILTER: Gemini zero-shot ──────────────────────────────────────────
-@sleep_and_retry
-@limits(calls=15, period=_ONE_MINUTE)
-@backoff.on_exception(
-    backoff.expo,
-    ClientError,
-    max_time=60,
-    giveup=lambda e: not getattr(e, "status_code", None) in (429, 503)
-)
-def gemini_filter(text: str, keywords: list) -> bool:
+def _ask_gemini(text: str, keywords: list) -> bool:
     """
     Ask Gemini: "Does this content feature <keywords>?"
     """
@@ -164,37 +66,157 @@ def gemini_filter(text: str, keywords: list) -> bool:
         "Answer 'Yes' or 'No'."
     )
 
-    for attempt in range(1, MAX_RETRIES+1):
-        try:
-            resp = client.models.generate_content(
-                model=MODEL_NAME,
-                contents=prompt
-            )
-            ans = resp.text.strip().lower()
-            return ans.startswith("yes")
-        except ClientError as e:
-            code = getattr(e, "status_code", None)
-            if code in (429, 503) and attempt < MAX_RETRIES:
-                wait = RETRY_DELAY * attempt
-                time.sleep(wait)
-                continue
-            raise
-
-    return False
-
-# ─── 3. Fetch rows, apply filters, update DB ──────────────────────────────────
-def process_table(table_name: str, text_path: list, keywords: list):
+    # shared cross-process limit and retry (gemini_rate_limiter.py)
+    resp = generate_content(client, model=MODEL_NAME, contents=prompt)
+    return (resp.text or "").strip().lower().startswith("yes")
+
+def gemini_filter(text: str, keywords: list) -> bool:
+    """
+    Cached yes/no verdict; Gemini is only asked about new text
+    """
+    key = verdict_key(text, keywords, MODEL_NAME)
+    cached = VERDICTS.get(key)
+    if cached is not None:
+        return cached
+    verdict = _ask_gemini(text, keywords)
+    VERDICTS.put(key, verdict, MODEL_NAME)
+    return verdict
+
+def classify_rows(rows: list, keywords: list) -> list:
+    """
+    rows: list of (db_id, text)
+    Keyword match first; the rows no keyword matches are looked up in the
+    verdict cache and only new text goes to Gemini, in batches
+    (gemini_batch.py) instead of one prompt each.
+    Returns [(relevant, matched keywords, db_id)] in row order; rows Gemini
+    gave no usable answer for are left out, so they stay NULL and are
+    retried on the next run.
+    """
+    matcher = get_matcher(keywords)
+    matches = [matcher.findall(text) for _, text in rows]
+    pending = [row for row, found in zip(rows, matches) if not found]
+    verdicts = {}
+    if pending:
+        verdicts = BatchClassifier(client, keywords, MODEL_NAME, cache=VERDICTS).classify(pending)
+        VERDICTS.report()
+    return [(bool(found) or verdicts[db_id], found, db_id)
+            for (db_id, _), found in zip(rows, matches) if found or db_id in verdicts]
+
+# ─── 3. TEXT EXTRACTION ────────────────────────────────────────────────────────
+def extract_ad_videos(ad_json: dict) -> str:
+    """
+    Traverse ad_json["snapshot"]["cards"] and
+    return a space‑separated string of all videoHdUrl values.
+    """
+    cards = ad_json.get("snapshot", {}).get("cards", [])
+    urls = [c.get("videoHdUrl", "") for c in cards if c.get("videoHdUrl")]
+    return " ".join(urls)
+
+def iter_reels_with_comments(conn, table_name: str, comments_table: str, rules=None,
+                             batch_size: int = REELS_BATCH):
+    """
+    Yield batches of (id, raw_json, video_url, display_url, comments_text)
+    for the reels still to classify.  Each pending reel's comment texts are
+    joined in the same query (string_agg in a LATERAL subquery, so only
+    pending reels' comments are read) instead of one comments query per
+    reel.  The cursor is server-side and WITH HOLD, so the caller can
+    commit after every batch.
+    """
+    where, params = relevance_where(table_name, rules)
+    cur = conn.cursor(name=f"{table_name}_pending", withhold=True)
+    cur.itersize = batch_size
+    try:
+        cur.execute(f"""
+            SELECT r.id, r.raw_json, r.video_url, r.display_url, COALESCE(c.comments, '')
+              FROM {table_name} r
+              LEFT JOIN LATERAL (
+                    SELECT string_agg(rc.text, ' ' ORDER BY rc.id) AS comments
+                      FROM {comments_table} rc
+                     WHERE rc.reel_id = r.id AND rc.text <> ''
+                   ) c ON TRUE
+             WHERE r.is_relevant IS NULL AND {where}
+        """, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        # a WITH HOLD cursor outlives its transaction until closed
+        cur.close()
+
+def relevance_where(table_name: str, rules=None):
+    """
+    WHERE fragment for the rows to classify: explicit ``rules``, else
+    rules/<table>.json when COMPETITOR_RULES=true, else every row.
+    Rows a rule skips stay ``is_relevant IS NULL``.
+    """
+    if rules is None and not TABLE_RULES:
+        return "TRUE", []
+    return table_where(table_name, rules)
+
+# ─── 4. Fetch rows, apply filters, update DB ──────────────────────────────────
+def process_ads_table(table_name: str, keywords: list, rules=None):
+    conn = psycopg2.connect(**PG_CONN)
+    cur  = conn.cursor()
+    # fetch raw_json and id (narrowed by rules only when asked, see relevance_where)
+    where, params = relevance_where(table_name, rules)
+    cur.execute(f"SELECT id, raw_json FROM {table_name} WHERE is_relevant IS NULL AND {where};", params)
+    rows = cur.fetchall()
+
+    texts = []
+    for db_id, raw in rows:
+        ad = json.loads(raw)
+        # build prompt text: caption + all videoHdUrl
+        caption = ad.get("snapshot", {}).get("caption", "")
+        video_urls = extract_ad_videos(ad)
+        texts.append((db_id, f"Caption: {caption}\nVideo URLs: {video_urls}"))
+
+    # filter, keeping the matched keywords for analytics
+    updates = classify_rows(texts, keywords)
+
+    cur.executemany(f"UPDATE {table_name} SET is_relevant=%s, matched_keywords=%s WHERE id=%s;", updates)
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def process_reels_table(table_name: str, comments_table: str, keywords: list, rules=None):
+    conn = psycopg2.connect(**PG_CONN)
+    cur  = conn.cursor()
+    # pending reels (see relevance_where), with their comments
+    for rows in iter_reels_with_comments(conn, table_name, comments_table, rules):
+        texts = []
+        for db_id, raw, video_url, display_url, comments_text in rows:
+            reel = json.loads(raw)
+            texts.append((db_id, f"Caption: {reel.get('caption','')}\n"
+                                 f"Video URL: {video_url}\n"
+                                 f"Display URL: {display_url}\n"
+                                 f"Comments: {comments_text}"))
+
+        updates = classify_rows(texts, keywords)
+        cur.executemany(f"UPDATE {table_name} SET is_relevant=%s, matched_keywords=%s WHERE id=%s;", updates)
+        # keep each batch's verdicts even if a later batch fails
+        conn.commit()
+
+    cur.close()
+    conn.close()
+
+
+def process_table(table_name: str, text_path: list, keywords: list, rules=None):
     """
     text_path: list of JSON keys to extract the text field, e.g. ["caption"] or ["snapshot","caption"]
+    rules: filter_rules rule tree; rules/<table_name>.json only when COMPETITOR_RULES=true
     """
     conn = psycopg2.connect(**PG_CONN)
     cur  = conn.cursor()
 
-    # 1) fetch all rows where is_relevant IS NULL
-    cur.execute(f"SELECT id, raw_json FROM {table_name} WHERE is_relevant IS NULL")
+    # 1) fetch rows where is_relevant IS NULL (see relevance_where)
+    where, params = relevance_where(table_name, rules)
+    cur.execute(f"SELECT id, raw_json FROM {table_name} WHERE is_relevant IS NULL AND {where}", params)
     rows = cur.fetchall()
 
-    updates = []
+    full_texts = []
     for db_id, raw in rows:
         data = json.loads(raw)
         # drill into text fields
@@ -206,33 +228,26 @@ def process_table(table_name: str, text_path: list, keywords: list):
         # if multiple text paths, combine them
         for p in text_path:
             texts.append(extract(data, p) if isinstance(p, list) else extract(data, p))
-        full_text = " ".join(texts)
-
-        # step 1: regex
-        if regex_filter(full_text, keywords):
-            relevant = True
-        else:
-            # step 2: Gemini
-            relevant = gemini_filter(full_text, keywords)
+        full_texts.append((db_id, " ".join(texts)))
 
-        updates.append((relevant, db_id))
+    # step 1: keyword match, step 2: Gemini in batches
+    updates = classify_rows(full_texts, keywords)
 
     # 2) batch UPDATE
-    execute_sql = f"UPDATE {table_name} SET is_relevant = %s WHERE id = %s"
+    execute_sql = f"UPDATE {table_name} SET is_relevant = %s, matched_keywords = %s WHERE id = %s"
     cur.executemany(execute_sql, updates)
     conn.commit()
     cur.close()
     conn.close()
 
 if __name__ == "__main__":
-    # 1) read user query terms, e.g. ["t-shirt","polo"]
-    raw = input("Enter comma‑separated keywords to filter by: ").strip()
+    raw = input("Enter comma‑separated keywords: ").strip()
     keywords = [w.strip() for w in raw.split(",") if w.strip()]
 
-    # 2) Apply to both tables:
-    #    – ads: perhaps text at raw_json → snapshot → caption
-    #    – reels: text at raw_json → caption
-    process_table("competitor_ads", text_path=[["snapshot","caption"]], keywords=keywords)
-    process_table("reels",          text_path=[["caption"]],             keywords=keywords)
+    print("Filtering ads…")
+    process_ads_table("competitor_ads", keywords)
 
-    print("Filtering complete.")
+    print("Filtering reels…")
+    process_reels_table("competitor_reels", "reel_comments", keywords)
+
+    print("Done.")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Batched Gemini relevance classification.
+
+Instead of one yes/no prompt per post, many posts are packed into one
+request, each under a stable id, and Gemini answers with a JSON object
+``{"<id>": true | false, ...}``.  With the same requests-per-minute quota
+this classifies ``batch size`` times as many posts per minute.
+
+* Batch size adapts to a prompt token budget: posts are packed until the
+  estimated tokens reach the budget (or MAX_BATCH_POSTS).  A malformed or
+  incomplete answer halves the budget and a clean one grows it back by
+  10%, so batches settle at the largest size the model answers reliably.
+* A malformed answer is not retried as-is: the ids it did answer are
+  kept, and the rest are re-sent, split in half when nothing usable came
+  back.  A single post that still cannot be parsed gets no verdict, so
+  the caller leaves it unclassified and a later run asks again.
+* With a ``VerdictCache`` the cache is checked first, identical texts in
+  one run are asked about once, and only parsed answers are stored.
+"""
+
+import os
+import sys
+import json
+import time
+from google.genai import types
+from verdict_cache import verdict_key
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gemini_rate_limiter import generate_content
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+MODEL_NAME        = "gemini-2.0-flash-001"
+TOKEN_BUDGET      = int(os.getenv("GEMINI_BATCH_TOKENS", 24000))   # prompt tokens per request
+MIN_TOKEN_BUDGET  = 1000
+MAX_BATCH_POSTS   = int(os.getenv("GEMINI_MAX_BATCH", 100))
+MAX_POST_CHARS    = 4000     # long comment threads are cut to this
+CHARS_PER_TOKEN   = 4        # rough estimate for English social-media text
+TOKENS_PER_VERDICT = 12      # output: '"123456": false, '
+
+
+class MalformedResponse(ValueError):
+    """Raised when a batch answer is not the expected JSON object."""
+
+
+# ─── PROMPT / PARSE ────────────────────────────────────────────────────────────
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _clip(text: str) -> str:
+    text = text or ""
+    return text if len(text) <= MAX_POST_CHARS else text[:MAX_POST_CHARS] + " …"
+
+def build_prompt(batch: list, keywords: list) -> str:
+    """
+    batch: list of (id, text); ids are sent as strings
+    """
+    posts = [{"id": str(post_id), "text": _clip(text)} for post_id, text in batch]
+    return (
+        "You are a relevance classifier for social-media posts.\n"
+        f"For each post below, decide whether it features {', '.join(keywords)}.\n"
+        "Reply with only a JSON object mapping every post id to true or false, "
+        'e.g. {"17": true, "18": false}. Include every id exactly once.\n\n'
+        f"Posts:\n{json.dumps(posts, ensure_ascii=False)}"
+    )
+
+def parse_verdicts(raw: str, ids: list) -> dict:
+    """
+    Parse a batch answer into {id: bool} for the ids that were asked for.
+    Accepts a JSON object, a list of {"id", "relevant"} objects, code fences
+    and "yes"/"no" strings.  Raises MalformedResponse if nothing parses.
+    """
+    raw = (raw or "").strip()
+    if raw.startswith("```"):
+        raw = raw.strip("`")
+        raw = raw[raw.find("\n") + 1:] if "\n" in raw else raw
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        start, end = raw.find("{"), raw.rfind("}")
+        try:
+            data = json.loads(raw[start:end + 1]) if start != -1 and end > start else None
+        except json.JSONDecodeError:
+            data = None
+    if isinstance(data, list):
+        data = {str(d.get("id")): d.get("relevant") for d in data if isinstance(d, dict)}
+    if not isinstance(data, dict):
+        raise MalformedResponse(f"expected a JSON object, got: {raw[:200]!r}")
+
+    wanted = {str(i): i for i in ids}
+    verdicts = {}
+    for key, value in data.items():
+        if str(key) not in wanted:
+            continue
+        if isinstance(value, str):
+            value = value.strip().lower()
+            if value not in ("true", "false", "yes", "no"):
+                continue
+            value = value in ("true", "yes")
+        if isinstance(value, bool):
+            verdicts[wanted[str(key)]] = value
+    return verdicts
+
+
+# ─── REQUEST ───────────────────────────────────────────────────────────────────
+def _generate(client, model: str, prompt: str, max_output_tokens: int) -> str:
+    # shared cross-process limit and retry (gemini_rate_limiter.py)
+    resp = generate_content(
+        client,
+        model=model,
+        contents=prompt,
+        config=types.GenerateContentConfig(
+            temperature=0.0,
+            response_mime_type="application/json",
+            max_output_tokens=max_output_tokens,
+        ),
+    )
+    return resp.text or ""
+
+
+# ─── CLASSIFIER ────────────────────────────────────────────────────────────────
+class BatchClassifier:
+    """
+    classifier = BatchClassifier(client, ["polo shirt", "polo"])
+    verdicts = classifier.classify([(17, "text…"), (18, "text…")])   # {17: True, 18: False}
+    """
+
+    def __init__(self, client, keywords: list, model: str = MODEL_NAME,
+                 token_budget: int = TOKEN_BUDGET, max_posts: int = MAX_BATCH_POSTS, cache=None):
+        self.client = client
+        self.cache = cache
+        self.keywords = list(keywords)
+        self.model = model
+        self.max_budget = token_budget
+        self.budget = token_budget
+        self.max_posts = max_posts
+        self.stats = {"posts": 0, "requests": 0, "malformed": 0, "unresolved": 0}
+        self._overhead = estimate_tokens(build_prompt([], self.keywords))
+
+    def classify(self, posts) -> dict:
+        """
+        posts: iterable of (id, text)
+        Returns {id: bool}; posts whose answer could not be parsed are
+        left out.
+        """
+        posts = list(posts)
+        if self.cache is None:
+            return self._classify_all(posts)
+
+        keys = {post_id: verdict_key(text, self.keywords, self.model) for post_id, text in posts}
+        known = self.cache.get_many(keys.values())
+        # one question per distinct uncached text
+        todo = {}
+        for post_id, text in posts:
+            if keys[post_id] not in known:
+                todo.setdefault(keys[post_id], (post_id, text))
+        asked = self._classify_all(list(todo.values()))
+        fresh = {key: asked[post_id] for key, (post_id, _) in todo.items() if post_id in asked}
+        self.cache.put_many(fresh, self.model)
+
+        answers = {**known, **fresh}
+        return {post_id: answers[keys[post_id]] for post_id, _ in posts if keys[post_id] in answers}
+
+    def _classify_all(self, posts: list) -> dict:
+        verdicts = {}
+        started = time.monotonic()
+        for batch in self._batches(posts):
+            verdicts.update(self._classify(batch))
+        self.stats["posts"] += len(verdicts)
+        if verdicts:
+            minutes = max(time.monotonic() - started, 1e-9) / 60
+            print(f"Classified {len(verdicts)} posts in {self.stats['requests']} requests "
+                  f"({len(verdicts) / minutes:.0f}/min, {self.stats['malformed']} malformed answers)")
+        return verdicts
+
+    def _batches(self, posts):
+        # packed lazily, so each batch uses the budget as adapted so far
+        batch, tokens = [], self._overhead
+        for post_id, text in posts:
+            cost = estimate_tokens(_clip(text)) + 10
+            if batch and (tokens + cost > self.budget or len(batch) >= self.max_posts):
+                yield batch
+                batch, tokens = [], self._overhead
+            batch.append((post_id, text))
+            tokens += cost
+        if batch:
+            yield batch
+
+    def _classify(self, batch: list) -> dict:
+        self.stats["requests"] += 1
+        prompt = build_prompt(batch, self.keywords)
+        raw = _generate(self.client, self.model, prompt, TOKENS_PER_VERDICT * len(batch) + 64)
+        try:
+            verdicts = parse_verdicts(raw, [post_id for post_id, _ in batch])
+        except MalformedResponse:
+            verdicts = {}
+
+        missing = [post for post in batch if post[0] not in verdicts]
+        if not missing:
+            self.budget = min(self.max_budget, int(self.budget * 1.1))
+            return verdicts
+
+        self.stats["malformed"] += 1
+        self.budget = max(MIN_TOKEN_BUDGET, self.budget // 2)
+        if len(batch) == 1:
+            self.stats["unresolved"] += 1
+            print(f"Unparseable verdict for post {batch[0][0]}; leaving it unclassified")
+            return {}
+        if len(missing) < len(batch):
+            # keep what was answered, re-send the rest together
+            verdicts.update(self._classify(missing))
+            return verdicts
+        half = len(batch) // 2
+        verdicts.update(self._classify(batch[:half]))
+        verdicts.update(self._classify(batch[half:]))
+        return verdicts
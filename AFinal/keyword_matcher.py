@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Single-pass keyword matching for the relevance filter.
+
+A keyword set is compiled once into one regular expression whose
+alternatives are factored into a character trie ("polo", "polo shirt",
+"polos" share one "polo" branch), so each text is scanned once no matter
+how many synonyms and size/colour variants the list holds, instead of
+once per keyword.
+
+Matches are case-insensitive whole words/phrases, like the old
+``\\bkeyword\\b`` search.  ``findall`` reports every keyword that occurs,
+including shorter keywords inside a longer match ("polo" in "polo
+shirt"), so the matches can be stored for analytics.
+"""
+
+import re
+from functools import lru_cache
+
+
+class KeywordMatcher:
+    """Compiled matcher for one keyword list."""
+
+    def __init__(self, keywords):
+        # lower-cased, de-duplicated, in the caller's order
+        self.keywords = tuple(dict.fromkeys(k.strip().lower() for k in keywords if k and k.strip()))
+        trie = _trie_pattern(self.keywords)
+        self._any = re.compile(rf"(?<!\w)(?:{trie})(?!\w)") if self.keywords else None
+        # a lookahead match is zero-width, so finditer tries every start
+        # position and overlapping phrases are all found
+        self._all = re.compile(rf"(?=(?<!\w)({trie})(?!\w))") if self.keywords else None
+
+        # keywords implied by a longer keyword that contains them as whole words
+        self._implied = {
+            kw: [other for other in self.keywords
+                 if other != kw and re.search(rf"(?<!\w){re.escape(other)}(?!\w)", kw)]
+            for kw in self.keywords
+        }
+        self._order = {kw: i for i, kw in enumerate(self.keywords)}
+
+    def search(self, text):
+        """True if any keyword occurs in ``text``."""
+        if not self._any or not text:
+            return False
+        return self._any.search(text.lower()) is not None
+
+    def findall(self, text):
+        """
+        Every keyword that occurs in ``text``.
+
+        Returns:
+            List of matched keywords in keyword-list order (empty if none)
+        """
+        if not self._all or not text:
+            return []
+        found = set()
+        for m in self._all.finditer(text.lower()):
+            kw = m.group(1)
+            if kw not in found:
+                found.add(kw)
+                found.update(self._implied[kw])
+        return sorted(found, key=self._order.__getitem__)
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(keywords):
+    return KeywordMatcher(keywords)
+
+
+def get_matcher(keywords):
+    """The compiled matcher for ``keywords``, built once per keyword set."""
+    if isinstance(keywords, KeywordMatcher):
+        return keywords
+    return _cached_matcher(tuple(keywords))
+
+
+def _trie_pattern(words):
+    """
+    Regex alternation of ``words`` with shared prefixes factored out.
+
+    Longer continuations are tried before a word ends, so the longest
+    keyword starting at a position wins.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return _node_pattern(trie) if trie else ""
+
+
+def _node_pattern(node):
+    ends = "" in node
+    branches = [re.escape(ch) + _node_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if ends:
+        # the word may stop here; (?:...)? is greedy, so longer matches first
+        return f"(?:{body})?"
+    return body
@@ -1,16 +1,27 @@
 #!/usr/bin/env python3
 import os
+import sys
 import json
+import queue
 import logging
+import threading
 from datetime import datetime, timezone
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import psycopg2
 from psycopg2.extras import execute_values
 from competitors_name import get_competitors
-from apify_client import ApifyClient
+from watermarks import (
+    ad_key, reel_key, load_watermarks, save_watermarks,
+    get_watermark, watermark_date, drop_seen, advance_watermark,
+)
 from dotenv import load_dotenv
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_reader import iter_dataset_items
+from scheduler import ScrapeScheduler
+from ingestion import ADAPTERS, get_client
+
 # ——— Logging ——————————————————————————————————————————————
 logging.basicConfig(
     level=logging.INFO,
@@ -22,8 +33,10 @@ logger = logging.getLogger(__name__)
 # ——— Load configuration ————————————————————————————————
 load_dotenv()
 APIFY_TOKEN    = os.getenv("APIFY_API_KEY")
-FB_ACTOR_ID    = "JJghSZmShuco4j9gJ"
-IG_ACTOR_ID    = "xMc5Ga1oCONPmWJIa"
+INCREMENTAL    = os.getenv("INCREMENTAL", "false").lower() == "true"
+FB_ACTOR_ID    = ADAPTERS["fb_page_ads"].actor_id
+IG_ACTOR_ID    = ADAPTERS["ig_reels"].actor_id
+ACTOR_QUOTAS    = {FB_ACTOR_ID: 4, IG_ACTOR_ID: 4}   # concurrent runs per actor
 PG_CONN_PARAMS = {
     "host":     os.getenv("PG_HOST"),
     "port":     os.getenv("PG_PORT", 5432),
@@ -32,11 +45,16 @@ PG_CONN_PARAMS = {
     "password": os.getenv("PG_PASS"),
 }
 
-apify = ApifyClient(APIFY_TOKEN)
+apify = get_client()
 
 
 # ——— Scrape Facebook ads for one brand ——————————————————————
-def scrape_ads_for_brand(brand, fb_url, results_limit=50, start_date=None, end_date=None):
+def scrape_ads_for_brand(brand, fb_url, results_limit=50, start_date=None, end_date=None, watermark=None,
+                         memory_mbytes=None):
+    """
+    When a high-water mark is given, its date is used as the actor's
+    startDate lower bound and ads already seen are dropped.
+    """
     if fb_url == "N/A":
         return []
     run_input = {
@@ -46,16 +64,22 @@ def scrape_ads_for_brand(brand, fb_url, results_limit=50, start_date=None, end_d
         "scrapeAdDetails": True,
         "mediaType": "VIDEO",
     }
+    mark_date = watermark_date(watermark)
+    if mark_date and (not start_date or mark_date > start_date):
+        start_date = mark_date
     if start_date: run_input["startDate"] = start_date
     if end_date:   run_input["endDate"]   = end_date
 
-    run = apify.actor(FB_ACTOR_ID).call(run_input=run_input)
+    run = apify.actor(FB_ACTOR_ID).call(run_input=run_input, memory_mbytes=memory_mbytes)
     ads = []
-    for item in apify.dataset(run["defaultDatasetId"]).iterate_items():
+    for item in iter_dataset_items(apify, run["defaultDatasetId"]):
         item["brand"] = brand
         ads.append(item)
-    logger.info(f"[FB:{brand}] fetched {len(ads)} ads")
-    print(json.dumps(ads[0], indent=2))
+    fetched = len(ads)
+    ads = drop_seen(ads, watermark, ad_key)
+    logger.info(f"[FB:{brand}] fetched {fetched} ads, {len(ads)} new")
+    if ads:
+        print(json.dumps(ads[0], indent=2))
     return ads
 
 def normalize_ad(ad):
@@ -121,17 +145,26 @@ def extract_ad_cards(ad, ad_db_id):
 
 
 # ——— Scrape Instagram reels for one brand —————————————————————
-def scrape_reels_for_brand(brand, ig_username, results_limit=100):
+def scrape_reels_for_brand(brand, ig_username, results_limit=100, watermark=None, memory_mbytes=None):
+    """
+    When a high-water mark is given, only reels newer than its date are
+    requested and reels already seen are dropped.
+    """
     run_input = {
         "username": [ig_username],
         "resultsLimit": results_limit,
     }
-    run = apify.actor(IG_ACTOR_ID).call(run_input=run_input)
+    mark_date = watermark_date(watermark)
+    if mark_date:
+        run_input["onlyPostsNewerThan"] = mark_date
+    run = apify.actor(IG_ACTOR_ID).call(run_input=run_input, memory_mbytes=memory_mbytes)
     reels = []
-    for item in apify.dataset(run["defaultDatasetId"]).iterate_items():
+    for item in iter_dataset_items(apify, run["defaultDatasetId"]):
         item["brand"] = brand
         reels.append(item)
-    logger.info(f"[IG:{brand}] fetched {len(reels)} reels")
+    fetched = len(reels)
+    reels = drop_seen(reels, watermark, reel_key)
+    logger.info(f"[IG:{brand}] fetched {fetched} reels, {len(reels)} new")
     return reels
 
 def normalize_reel(r):
@@ -183,11 +216,21 @@ def extract_reel_comments(r, reel_db_id):
 
 
 # ——— Bulk‐insert into Postgres ——————————————————————————————
-def save_ads(conn, ads):
+def prepare_ads(ads):
+    """
+    Normalize ads and pre-extract their cards (CPU-only, no DB access).
+    Card rows carry a None placeholder where the ad's DB id goes.
+    """
+    ad_rows = [normalize_ad(a) for a in ads]
+    cards_per_ad = [extract_ad_cards(a, None) for a in ads]
+    return ad_rows, cards_per_ad
+
+def insert_ads(conn, ad_rows, cards_per_ad):
+    if not ad_rows:
+        return 0, 0
     cur = conn.cursor()
     # cur.execute("TRUNCATE TABLE ad_cards RESTART IDENTITY CASCADE;")
     # cur.execute("TRUNCATE TABLE competitor_ads RESTART IDENTITY CASCADE;")
-    ad_rows = [normalize_ad(a) for a in ads]
     sql_ads = """
       INSERT INTO competitor_ads
         (brand, input_url, page_id, page_name, page_likes,
@@ -200,8 +243,8 @@ def save_ads(conn, ads):
     ad_ids = [r[0] for r in ad_ids]
 
     card_rows = []
-    for ad, aid in zip(ads, ad_ids):
-        card_rows += extract_ad_cards(ad, aid)
+    for cards, aid in zip(cards_per_ad, ad_ids):
+        card_rows += [(aid,) + c[1:] for c in cards]
 
     if card_rows:
         sql_cards = """
@@ -215,13 +258,27 @@ def save_ads(conn, ads):
     conn.commit()
     logger.info(f"Inserted {len(ad_rows)} ads + {len(card_rows)} cards")
     cur.close()
+    return len(ad_rows), len(card_rows)
 
+def save_ads(conn, ads):
+    return insert_ads(conn, *prepare_ads(ads))
 
-def save_reels(conn, reels):
+
+def prepare_reels(reels):
+    """
+    Normalize reels and pre-extract their comments (CPU-only, no DB access).
+    Comment rows carry a None placeholder where the reel's DB id goes.
+    """
+    reel_rows = [normalize_reel(r) for r in reels]
+    comments_per_reel = [extract_reel_comments(r, None) for r in reels]
+    return reel_rows, comments_per_reel
+
+def insert_reels(conn, reel_rows, comments_per_reel):
+    if not reel_rows:
+        return 0, 0
     cur = conn.cursor()
     # cur.execute("TRUNCATE TABLE reel_comments RESTART IDENTITY CASCADE;")
     # cur.execute("TRUNCATE TABLE competitor_reels RESTART IDENTITY CASCADE;")
-    reel_rows = [normalize_reel(r) for r in reels]
     sql_reels = """
       INSERT INTO competitor_reels
         (brand, input_url, reel_id, shortcode, caption,
@@ -233,8 +290,8 @@ def save_reels(conn, reels):
     reel_ids = [r[0] for r in reel_ids]
 
     comment_rows = []
-    for reel, rid in zip(reels, reel_ids):
-        comment_rows += extract_reel_comments(reel, rid)
+    for comments, rid in zip(comments_per_reel, reel_ids):
+        comment_rows += [(rid,) + c[1:] for c in comments]
 
     if comment_rows:
         sql_comments = """
@@ -247,6 +304,130 @@ def save_reels(conn, reels):
     conn.commit()
     logger.info(f"Inserted {len(reel_rows)} reels + {len(comment_rows)} comments")
     cur.close()
+    return len(reel_rows), len(comment_rows)
+
+def save_reels(conn, reels):
+    return insert_reels(conn, *prepare_reels(reels))
+
+
+# ——— Pipeline: scrape → normalize → insert ————————————————————————
+_DONE = object()
+
+def _drain(q):
+    # a stage that stopped early still consumes its input up to _DONE, so
+    # the producers blocked on the bounded queue are released
+    while q.get() is not _DONE:
+        pass
+
+def _normalize_stage(raw_q, db_q):
+    """Turn each brand's scraped items into insert-ready rows."""
+    done = False
+    try:
+        while True:
+            batch = raw_q.get()
+            if batch is _DONE:
+                done = True
+                return
+            kind, brand, items = batch
+            try:
+                rows = prepare_ads(items) if kind == "ads" else prepare_reels(items)
+            except Exception as e:
+                logger.error(f"Error normalizing {kind} for {brand}: {e}")
+                continue
+            db_q.put((kind, brand, items, rows))
+    finally:
+        if not done:
+            _drain(raw_q)
+        db_q.put(_DONE)
+
+def _insert_stage(conn, db_q, marks, totals):
+    """Bulk-insert each brand's rows as soon as they are ready."""
+    done = False
+    try:
+        while True:
+            batch = db_q.get()
+            if batch is _DONE:
+                done = True
+                return
+            kind, brand, items, rows = batch
+            try:
+                if kind == "ads":
+                    n, _ = insert_ads(conn, *rows)
+                    if INCREMENTAL:
+                        advance_watermark(marks, brand, "fb_ads", items, ad_key)
+                else:
+                    n, _ = insert_reels(conn, *rows)
+                    if INCREMENTAL:
+                        advance_watermark(marks, brand, "ig_reels", items, reel_key)
+                totals[kind] += n
+            except Exception as e:
+                logger.error(f"Error saving {kind} for {brand}: {e}")
+                try:
+                    conn.rollback()
+                except Exception as rollback_error:
+                    # dropped connection: keep consuming so the pipeline finishes
+                    logger.error(f"Rollback failed after {brand}: {rollback_error}")
+    finally:
+        if not done:
+            _drain(db_q)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+def run_pipeline(competitors, marks, max_workers=8, queue_size=4, priorities=None):
+    """
+    Scrape all brands in parallel while earlier results are normalized and
+    inserted. Bounded queues between the stages make scrape workers wait
+    when the database falls behind, which caps how many brands' items are
+    held in memory at once.
+
+    Scrapes go through a ScrapeScheduler: ``priorities`` maps brand → int
+    (higher first), actors are held to ACTOR_QUOTAS and failed runs are
+    retried with backoff.
+    """
+    priorities = priorities or {}
+    raw_q = queue.Queue(maxsize=queue_size)
+    db_q  = queue.Queue(maxsize=queue_size)
+    totals = {"ads": 0, "reels": 0}
+
+    # connect up front so a bad DB config fails before any scraping starts
+    conn = psycopg2.connect(**PG_CONN_PARAMS)
+    normalizer = threading.Thread(target=_normalize_stage, args=(raw_q, db_q), daemon=True)
+    writer     = threading.Thread(target=_insert_stage, args=(conn, db_q, marks, totals), daemon=True)
+    normalizer.start()
+    writer.start()
+
+    def scrape_and_enqueue(kind, brand, func, *args, memory_mbytes=None):
+        items = func(brand, *args, memory_mbytes=memory_mbytes)
+        raw_q.put((kind, brand, items))
+        return len(items)
+
+    scheduler = ScrapeScheduler(max_workers=max_workers, actor_quotas=ACTOR_QUOTAS)
+    for brand, fb_url, ig_username in competitors:
+        # Skip if both are empty or N/A
+        if (not fb_url or fb_url == 'N/A') and (not ig_username or ig_username == 'N/A'):
+            continue
+        priority = priorities.get(brand, 0)
+        if fb_url and fb_url != 'N/A' and fb_url.startswith("http"):
+            scheduler.submit(f"FB:{brand}", FB_ACTOR_ID, scrape_and_enqueue,
+                             "ads", brand, scrape_ads_for_brand,
+                             fb_url, 50, "2024-01-01", "2024-04-30",
+                             get_watermark(marks, brand, "fb_ads"), priority=priority)
+        if ig_username and ig_username != 'N/A':
+            scheduler.submit(f"IG:{brand}", IG_ACTOR_ID, scrape_and_enqueue,
+                             "reels", brand, scrape_reels_for_brand,
+                             ig_username, 50,
+                             get_watermark(marks, brand, "ig_reels"), priority=priority)
+
+    for task in scheduler.run():
+        if task.error is not None:
+            logger.error(f"Error scraping {task.name}: {task.error}")
+
+    raw_q.put(_DONE)
+    normalizer.join()
+    writer.join()
+    return totals
 
 
 # ——— Main ——————————————————————————————————————————————
@@ -261,41 +442,15 @@ if __name__ == "__main__":
     #     # add more: ("Brand", "https://facebook...", "instagram_username")
     ]
 
-    # scrape in parallel
-    all_fb_ads   = []
-    all_ig_reels = []
-    with ThreadPoolExecutor(max_workers=8) as exe:
-        futures = {}
-        for brand, fb_url, ig_username in competitors:
+    # high-water marks per (brand, platform); empty unless INCREMENTAL=true
+    marks = load_watermarks() if INCREMENTAL else {}
 
+    # scrape, normalize and save each brand as soon as its scrape finishes
+    # competitors are listed highest-value first
+    priorities = {brand: -rank for rank, (brand, _, _) in enumerate(competitors)}
+    totals = run_pipeline(competitors, marks, priorities=priorities)
+    logger.info(f"Total FB ads: {totals['ads']}, Total IG reels: {totals['reels']}")
 
-            # Skip if both are empty or N/A
-            if (not fb_url or fb_url == 'N/A') and (not ig_username or ig_username == 'N/A'):
-                continue
-            if fb_url and fb_url != 'N/A' and fb_url.startswith("http"):
-                futures[exe.submit(scrape_ads_for_brand, brand, fb_url, 50, "2024-01-01", "2024-04-30")] = "ads"
-            if ig_username and ig_username != 'N/A':
-                futures[exe.submit(scrape_reels_for_brand, brand, ig_username, 50)] = "reels"
-
-        for fut in as_completed(futures):
-            kind = futures[fut]
-            try:
-                data = fut.result()
-                if kind == "ads":
-                    all_fb_ads.extend(data)
-                else:
-                    all_ig_reels.extend(data)
-            except Exception as e:
-                logger.error(f"Error scraping {kind}: {e}")
-
-    logger.info(f"Total FB ads: {len(all_fb_ads)}, Total IG reels: {len(all_ig_reels)}")
-
-    # save into Postgres
-    conn = psycopg2.connect(**PG_CONN_PARAMS)
-    print("About to save ads")
-    save_ads(conn, all_fb_ads)
-    print("Saved ads")
-    print("About to save reels")
-    save_reels(conn, all_ig_reels)
-    print("Saved reels")
-    conn.close()
+    # advance the marks only once the rows are committed
+    if INCREMENTAL:
+        save_watermarks(marks)
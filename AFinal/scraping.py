@@ -1,7 +1,7 @@
 import os
+import sys
 import requests
 from urllib.parse import urlencode
-from apify_client import ApifyClient
 import json
 from competitors_name import get_competitors
 from dotenv import load_dotenv
@@ -10,6 +10,10 @@ import logging
 import re
 from google import genai
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ingestion import ADAPTERS, fetch_items
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -19,7 +23,7 @@ load_dotenv()
 # —————— Configuration ——————
 GRAPH_API_TOKEN = os.getenv("FB_GRAPH_TOKEN")      # App or Page token
 APIFY_TOKEN = os.getenv("APIFY_API_KEY")         # Your Apify API token
-APIFY_ACTOR_ID = "JJghSZmShuco4j9gJ"               # Ads Library Actor ID
+APIFY_ACTOR_ID = ADAPTERS["fb_page_ads"].actor_id  # Ads Library Actor ID
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")  # Add this to your .env
 
 # Check if API tokens are available
@@ -28,8 +32,6 @@ if not GRAPH_API_TOKEN:
     
 if not APIFY_TOKEN:
     logger.warning("APIFY_API_TOKEN not found in .env file. Some features may not work.")
-else:
-    client = ApifyClient(APIFY_TOKEN)               # ApifyClient init
 
 
 def scrape_ads_for_competitors(competitors, results_limit=50, start_date=None, end_date=None):
@@ -39,21 +41,10 @@ def scrape_ads_for_competitors(competitors, results_limit=50, start_date=None, e
             logger.info(f"Skipping '{brand}' (no Facebook page)")
             continue
         logger.info(f"Scraping ads for {brand}: {fb_url}")
-        run_input = {
-            "startUrls": [{"url": fb_url}],
-            "resultsLimit": results_limit,
-            "activeStatus": "active",
-            "scrapeAdDetails": True,
-            "mediaType": "VIDEO",  # Only video ads
-        }
-        if start_date:
-            run_input["startDate"] = start_date
-        if end_date:
-            run_input["endDate"] = end_date
-
-        run = client.actor(APIFY_ACTOR_ID).call(run_input=run_input)
-        logger.info(f"Run finished for {brand}, fetching results…")
-        for ad in client.dataset(run["defaultDatasetId"]).iterate_items():
+        # Shared client and actor-run cache; the input template lives in ingestion.ADAPTERS
+        ads = fetch_items("fb_page_ads", fb_url, results_limit,
+                          start_date=start_date, end_date=end_date)
+        for ad in ads:
             ad["brand"] = brand  # Tag ad with brand for clarity
             all_ads.append(ad)
     return all_ads
@@ -1,15 +1,20 @@
 #!/usr/bin/env python3
 import os
+import sys
 import json
 import logging
 from datetime import datetime, timezone
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import psycopg2
 from psycopg2.extras import execute_values
-from apify_client import ApifyClient
 from dotenv import load_dotenv
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_reader import iter_dataset_items
+from scheduler import ScrapeScheduler
+from ingestion import ADAPTERS, get_client
+
 from competitors_name import get_competitors
 
 # ——— Logging ——————————————————————————————————————————————
@@ -23,7 +28,7 @@ logger = logging.getLogger(__name__)
 # ——— Load configuration ————————————————————————————————
 load_dotenv()
 APIFY_TOKEN = os.getenv("APIFY_API_KEY")
-APIFY_ACTOR_ID = "JJghSZmShuco4j9gJ"
+APIFY_ACTOR_ID = ADAPTERS["fb_page_ads"].actor_id
 PG_CONN_PARAMS = {
     "host": os.getenv("PG_HOST"),
     "port": os.getenv("PG_PORT", 5432),
@@ -32,10 +37,10 @@ PG_CONN_PARAMS = {
     "password": os.getenv("PG_PASS"),
 }
 
-apify_client = ApifyClient(APIFY_TOKEN)
+apify_client = get_client()
 
 # ——— Scrape one brand ——————————————————————————————————————————————
-def scrape_ads_for_brand(brand_tuple, results_limit=50, start_date=None, end_date=None):
+def scrape_ads_for_brand(brand_tuple, results_limit=50, start_date=None, end_date=None, memory_mbytes=None):
     brand, fb_url = brand_tuple
     if fb_url == "N/A":
         return []
@@ -49,9 +54,9 @@ def scrape_ads_for_brand(brand_tuple, results_limit=50, start_date=None, end_dat
     if start_date: run_input["startDate"] = start_date
     if end_date:   run_input["endDate"]   = end_date
 
-    run = apify_client.actor(APIFY_ACTOR_ID).call(run_input=run_input)
+    run = apify_client.actor(APIFY_ACTOR_ID).call(run_input=run_input, memory_mbytes=memory_mbytes)
     ads = []
-    for item in apify_client.dataset(run["defaultDatasetId"]).iterate_items():
+    for item in iter_dataset_items(apify_client, run["defaultDatasetId"]):
         item["brand"] = brand
         ads.append(item)
     logger.info(f"[{brand}] fetched {len(ads)} ads")
@@ -160,12 +165,17 @@ if __name__ == "__main__":
         ('Ralph Lauren', 'https://www.facebook.com/RalphLauren'),
         ] #get_competitors(product)
 
-    # 1) Parallel scrape
+    # 1) Parallel scrape, scheduled in list order with a per-actor quota
+    scheduler = ScrapeScheduler(max_workers=8, actor_quotas={APIFY_ACTOR_ID: 4})
+    for rank, c in enumerate(competitors):
+        scheduler.submit(f"FB:{c[0]}", APIFY_ACTOR_ID, scrape_ads_for_brand,
+                         c, 15, "2024-01-01", "2024-04-30", priority=-rank)
     all_ads = []
-    with ThreadPoolExecutor(max_workers=8) as exe:
-        futures = {exe.submit(scrape_ads_for_brand, c, 15, "2024-01-01", "2024-04-30"): c for c in competitors}
-        for fut in as_completed(futures):
-            all_ads.extend(fut.result())
+    for task in scheduler.run():
+        if task.error is None:
+            all_ads.extend(task.result)
+        else:
+            logger.error(f"Error scraping {task.name}: {task.error}")
 
     logger.info(f"Total ads scraped: {len(all_ads)}")
 
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of Gemini relevance verdicts.
+
+The same caption recurs across brands and re-scrapes, and every rerun
+with ``is_relevant IS NULL`` would otherwise ask Gemini again.  Verdicts
+are stored in a local SQLite file keyed by
+
+    sha256(normalised text, sorted lower-cased keywords, model name)
+
+Normalisation lower-cases the text, collapses whitespace and drops URL
+query strings (signed CDN parameters change on every scrape), so a
+re-scrape of the same post hits the cache.  Changing the keyword set or
+the model is a different question and misses.
+
+Hits and misses are counted per run and accumulated in the database, so
+``python verdict_cache.py`` reports the lifetime hit rate.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+
+# anchored to this directory, so every working directory shares one cache
+CACHE_PATH = os.getenv("VERDICT_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                          ".verdict_cache.sqlite"))
+
+_URL_QUERY = re.compile(r"(https?://[^\s?#]+)[?#]\S*")
+_SPACE     = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    text = _URL_QUERY.sub(r"\1", text or "")
+    return _SPACE.sub(" ", text).strip().lower()
+
+def verdict_key(text: str, keywords: list, model: str) -> str:
+    canonical = json.dumps(
+        [normalize_text(text), sorted({k.strip().lower() for k in keywords if k.strip()}), model],
+        separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    cache = VerdictCache()
+    known = cache.get_many(keys)          # {key: bool} for cached keys
+    cache.put_many({key: verdict, ...})
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # several filtering runs may share the file
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                key        TEXT PRIMARY KEY,
+                relevant   INTEGER NOT NULL,
+                model      TEXT,
+                created_at REAL,
+                hits       INTEGER DEFAULT 0,
+                last_hit   REAL
+            )""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS counters (
+                name  TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )""")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    # ─── lookups ──────────────────────────────────────────────────────────────
+    def get_many(self, keys) -> dict:
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(keys), 500):     # SQLite parameter limit
+            chunk = keys[start:start+500]
+            marks = ",".join("?" * len(chunk))
+            for key, relevant in self.conn.execute(
+                    f"SELECT key, relevant FROM verdicts WHERE key IN ({marks})", chunk):
+                found[key] = bool(relevant)
+        if found:
+            self.conn.executemany(
+                "UPDATE verdicts SET hits = hits + 1, last_hit = ? WHERE key = ?",
+                [(time.time(), key) for key in found])
+        self._count(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def get(self, key: str):
+        """Cached verdict for ``key``, or None."""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, verdicts: dict, model: str = None):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO verdicts (key, relevant, model, created_at) VALUES (?, ?, ?, ?)",
+            [(key, int(bool(v)), model, now) for key, v in verdicts.items()])
+        self.conn.commit()
+
+    def put(self, key: str, verdict: bool, model: str = None):
+        self.put_many({key: verdict}, model)
+
+    # ─── stats ────────────────────────────────────────────────────────────────
+    def _count(self, hits: int, misses: int):
+        self.hits += hits
+        self.misses += misses
+        self.conn.executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [("hits", hits), ("misses", misses)])
+        self.conn.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def lifetime_stats(self) -> dict:
+        counters = dict(self.conn.execute("SELECT name, value FROM counters"))
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        entries, = self.conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def report(self):
+        print(f"Verdict cache: {self.hits} hits / {self.misses} misses this run "
+              f"({self.hit_rate:.0%} hit rate)")
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    cache = VerdictCache()
+    stats = cache.lifetime_stats()
+    print(f"{stats['entries']} cached verdicts in {cache.path}; "
+          f"{stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+    cache.close()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Per-(brand, platform) high-water marks for incremental scraping.
+
+A mark records the newest item timestamp seen so far together with the ids
+that share that timestamp, so items published in the same second as the
+previous newest item are neither lost nor inserted twice.
+"""
+import os
+import json
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_FILE = os.getenv("WATERMARK_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                     "watermarks.json"))
+
+
+# ——— Item keys ————————————————————————————————————————————————
+def ad_key(ad):
+    """(unix startDate, adArchiveID) for a Facebook ad."""
+    return ad.get("startDate") or 0, str(ad.get("adArchiveID") or ad.get("adArchiveId") or "")
+
+def reel_key(reel):
+    """(unix timestamp, shortCode) for an Instagram reel."""
+    ts = reel.get("timestamp")
+    ts = datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp() if ts else 0
+    return ts, str(reel.get("shortCode") or reel.get("id") or "")
+
+
+# ——— Load / save ——————————————————————————————————————————————
+def load_watermarks(path=WATERMARK_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_watermarks(marks, path=WATERMARK_FILE):
+    """Write atomically so a crash never leaves a half-written state file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(marks, f, indent=2)
+    os.replace(tmp, path)
+
+def get_watermark(marks, brand, platform):
+    return marks.get(f"{brand}|{platform}")
+
+def watermark_date(mark):
+    """The mark as a YYYY-MM-DD string suitable for actor date filters."""
+    if not mark:
+        return None
+    return datetime.fromtimestamp(mark["ts"], tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+# ——— Filtering / advancing ————————————————————————————————————
+def drop_seen(items, mark, key):
+    """Keep only items strictly newer than the mark."""
+    if not mark:
+        return list(items)
+    seen_ids = set(mark["ids"])
+    fresh = []
+    for item in items:
+        ts, item_id = key(item)
+        if ts > mark["ts"] or (ts == mark["ts"] and item_id not in seen_ids):
+            fresh.append(item)
+    return fresh
+
+def advance_watermark(marks, brand, platform, items, key):
+    """Move the (brand, platform) mark forward to the newest of ``items``."""
+    if not items:
+        return marks.get(f"{brand}|{platform}")
+    mark = marks.get(f"{brand}|{platform}") or {"ts": 0, "ids": []}
+    newest = max(key(i)[0] for i in items)
+    if newest > mark["ts"]:
+        mark = {"ts": newest, "ids": []}
+    if newest == mark["ts"]:
+        ids = set(mark["ids"]) | {key(i)[1] for i in items if key(i)[0] == newest}
+        mark = {"ts": newest, "ids": sorted(ids)}
+    marks[f"{brand}|{platform}"] = mark
+    return mark
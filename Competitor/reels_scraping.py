@@ -1,12 +1,19 @@
-import json
 import os
-from apify_client import ApifyClient
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ndjson_store import stream_items_to_ndjson
+from dataset_reader import iter_dataset_items
+from ingestion import ADAPTERS, get_client
+
 load_dotenv()
 
-API_TOKEN = os.getenv('APIFY_API_KEY')
-client = ApifyClient(API_TOKEN)
+client = get_client()
 
 # List of Instagram handles to scrape
 usernames = [
@@ -20,28 +27,73 @@ usernames = [
 results_limit = 100
 
 # Actor ID for the Instagram reels scraper
-ACTOR_ID = "xMc5Ga1oCONPmWJIa"
+ACTOR_ID = ADAPTERS["ig_reels"].actor_id
+
+
+def scrape_profile(username, results_limit=results_limit, timeout_secs=600, output_dir="."):
+    """
+    Scrape one profile's reels and stream them to ``{username}_reels.ndjson``.
+
+    The actor run is capped at ``timeout_secs``; a run that times out still
+    has whatever reels it collected written out.
 
-for username in usernames:
+    Returns:
+        dict with username, status, reel count and elapsed seconds
+    """
+    started = time.monotonic()
     print(f" Fetching {results_limit} reels for @{username}...")
-    # Prepare input for this run
-    run_input = {
-        "username": [username],
-        "resultsLimit": results_limit,
-    }
-
-    # Kick off the actor and wait for it to finish
-    run = client.actor(ACTOR_ID).call(run_input=run_input)
-    dataset_id = run["defaultDatasetId"]
-
-    # Iterate through all items in the dataset
-    reels = []
-    for item in client.dataset(dataset_id).iterate_items():
-        reels.append(item)
-
-    # Save to a JSON file named after the profile
-    filename = f"{username}_reels.json"
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(reels, f, ensure_ascii=False, indent=2)
-
-    print(f"Saved {len(reels)} reels to {filename}\n")
+    run_input = ADAPTERS["ig_reels"].build_input(username, results_limit)
+
+    # Kick off the actor and wait at most timeout_secs for it to finish
+    run = client.actor(ACTOR_ID).call(run_input=run_input, timeout_secs=timeout_secs)
+
+    # Stream every item to an NDJSON file named after the profile
+    filename = os.path.join(output_dir, f"{username}_reels.ndjson")
+    count = stream_items_to_ndjson(iter_dataset_items(client, run["defaultDatasetId"]), filename)
+
+    elapsed = time.monotonic() - started
+    print(f"Saved {count} reels for @{username} to {filename} ({run['status']}, {elapsed:.1f}s)")
+    return {"username": username, "status": run["status"], "reels": count, "seconds": elapsed}
+
+
+def scrape_profiles(usernames, results_limit=results_limit, workers=8, timeout_secs=600, output_dir="."):
+    """
+    Scrape many profiles concurrently with a bounded worker pool.
+
+    Returns:
+        List of per-profile result dicts, slowest first
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as exe:
+        futures = {
+            exe.submit(scrape_profile, u, results_limit, timeout_secs, output_dir): u
+            for u in usernames
+        }
+        for fut in as_completed(futures):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                print(f"Error scraping @{futures[fut]}: {e}")
+                results.append({"username": futures[fut], "status": "ERROR", "reels": 0, "seconds": 0.0})
+    return sorted(results, key=lambda r: r["seconds"], reverse=True)
+
+
+def print_summary(results, top=5):
+    print(f"\nSlowest profiles (of {len(results)}):")
+    for r in results[:top]:
+        print(f"  @{r['username']:<25} {r['seconds']:>7.1f}s  {r['reels']:>5} reels  {r['status']}")
+    failed = [r["username"] for r in results if r["status"] != "SUCCEEDED"]
+    if failed:
+        print(f"Not fully scraped: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Instagram reels for competitor profiles")
+    parser.add_argument("usernames", nargs="*", default=usernames)
+    parser.add_argument("--limit", type=int, default=results_limit, help="Reels per profile")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--timeout", type=int, default=600, help="Per-profile actor timeout in seconds")
+    parser.add_argument("--output-dir", default=".")
+    args = parser.parse_args()
+
+    print_summary(scrape_profiles(args.usernames, args.limit, args.workers, args.timeout, args.output_dir))
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Filtering and preprocessing Instagram hashtag reels.
+
+The hashtag scraper returns one object per hashtag with the actual posts
+nested under ``topPosts`` and ``latestPosts``.  This script streams those
+nested arrays into flat post records, keeps each post once, and filters
+them based on the rules in rules/ig_reels.json.
+"""
+
+import json
+import os
+import sys
+
+import pandas as pd
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stream_loader import load_columns
+from schemas import IG_REELS, clean, load_dtypes
+from filter_rules import columns as rule_columns, load_rules, pushdown, to_mask
+from features import add_platform_features
+from columnar import EXPORT_JSON, FILTERED_IG_REELS, write_table
+
+# Nested arrays of each hashtag object that hold the posts, in priority
+# order: a post in both lists keeps its topPosts copy
+EXPLODE = ["topPosts", "latestPosts"]
+
+# Post fields the filter stage needs, with their column dtypes.  Only
+# these are materialised from the raw dump.
+COLUMNS = load_dtypes(IG_REELS)
+
+# Likes/comments/views thresholds live in rules/ig_reels.json and are
+# applied while loading, so rejected posts are never materialised
+RULES    = load_rules(os.getenv("IG_REELS_RULES", "ig_reels"))
+PUSHDOWN = pushdown(RULES, COLUMNS)
+
+
+def load_and_flatten_json(input_json='instagram_poloshirts_reels.ndjson', columns=COLUMNS, where=PUSHDOWN):
+    """
+    Stream the hashtag objects and flatten their nested posts.
+
+    Only one hashtag object is decoded at a time, so memory grows with the
+    kept posts rather than with ``searchLimit``.
+
+    Args:
+        input_json: Path to input JSON array or NDJSON file
+        columns: {dotted_path: dtype} of the post fields to keep
+        where: Rule applied while loading (None loads every post)
+
+    Returns:
+        pandas DataFrame with one row per nested post
+    """
+    print(f"Loading data from {input_json}...")
+    return load_columns(input_json, columns, drop_empty=False, where=where, explode=EXPLODE)
+
+
+def clean_data(df):
+    """
+    Clean the dataframe by filling missing values.
+
+    Args:
+        df: Input DataFrame
+
+    Returns:
+        Cleaned DataFrame
+    """
+    # Missing text/counts become ''/0 via the schema's vectorized casts;
+    # views stay 0 for posts that report none (images, hidden counts)
+    return clean(df, IG_REELS)
+
+
+def dedupe_posts(df):
+    """
+    Keep each post once, recording which lists it appeared in.
+
+    Args:
+        df: DataFrame with ``id`` and ``_list`` columns
+
+    Returns:
+        DataFrame with ``in_top_posts``/``in_latest_posts`` flags and
+        without the ``_list`` column
+    """
+    df = df.assign(
+        in_top_posts=df['_list'].eq('topPosts').groupby(df['id']).transform('any'),
+        in_latest_posts=df['_list'].eq('latestPosts').groupby(df['id']).transform('any'),
+    )
+    return df.drop_duplicates(subset=['id']).drop(columns=['_list'])
+
+
+def merge_shards(frames):
+    """
+    Merge filtered shards (sharded_filter.py), keeping each post once.
+
+    The same post can appear in several hashtag dumps, so its list flags
+    are OR-ed across shards and the first copy in input order is kept.
+
+    Args:
+        frames: Filtered DataFrames in merge order
+
+    Returns:
+        One DataFrame
+    """
+    df = pd.concat(list(frames), ignore_index=True)
+    if 'id' not in df.columns:
+        return df
+    flags = [c for c in ('in_top_posts', 'in_latest_posts') if c in df.columns]
+    if flags:
+        df[flags] = df[flags].fillna(False).astype(bool).groupby(df['id']).transform('any')
+    return df.drop_duplicates(subset=['id'])
+
+
+def add_time_metrics(df):
+    """
+    Add recency and like-velocity features from the shared feature module.
+
+    Args:
+        df: Input DataFrame
+
+    Returns:
+        DataFrame with days_since_post, recency, velocity (likes per day)
+        and log_popularity
+    """
+    return add_platform_features(df, 'ig_reels')
+
+
+def filter_data(df, rules=RULES):
+    """
+    Filter data based on the stage's rule tree and drop duplicate posts.
+
+    Args:
+        df: Input DataFrame
+        rules: filter_rules rule (defaults to rules/ig_reels.json)
+
+    Returns:
+        Filtered DataFrame
+    """
+    missing = rule_columns(rules) - set(df.columns)
+    if missing:
+        print(f"Warning: Columns {sorted(missing)} not found. Skipping the rules that need them.")
+        rules = pushdown(rules, df.columns)
+    if rules is not None:
+        df = df[to_mask(rules, df)]
+
+    if 'id' in df.columns and '_list' in df.columns:
+        df = dedupe_posts(df)
+
+    # Filter the DataFrame to only include the output columns
+    valid_columns = [col for col in FILTERED_IG_REELS.names if col in df.columns]
+    return df[valid_columns]
+
+
+def save_to_parquet(df, output_path='ig_reels_filtered.parquet'):
+    """
+    Save DataFrame to Parquet for the next stage.
+
+    Args:
+        df: Input DataFrame
+        output_path: Path to output Parquet file
+    """
+    write_table(df, output_path, FILTERED_IG_REELS)
+
+
+def save_to_json(df, output_json='ig_reels_filtered.json'):
+    """
+    Save DataFrame to a pretty-printed JSON file.
+
+    Args:
+        df: Input DataFrame
+        output_json: Path to output JSON file
+    """
+    records = df.to_dict(orient='records')
+    with open(output_json, 'w', encoding='utf-8') as fout:
+        json.dump(records, fout, ensure_ascii=False, indent=4, default=str)
+    print(f"Saved filtered data as JSON array to {output_json}")
+
+
+def main(export_json=EXPORT_JSON):
+    """Main function to orchestrate the data processing workflow."""
+    try:
+        # Step 1: Stream and flatten the nested posts
+        df = load_and_flatten_json()
+        print(f"Loaded {len(df)} posts with {len(df.columns)} columns")
+
+        # Step 2: Clean the data
+        df = clean_data(df)
+
+        # Step 3: Add time metrics
+        df = add_time_metrics(df)
+
+        # Step 4: Filter and dedupe
+        filtered_df = filter_data(df)
+        print(f"Filtered data down to {len(filtered_df)} reels")
+
+        # Save to Parquet (this is the input for the next step)
+        save_to_parquet(filtered_df)
+
+        # Pretty JSON only when asked for
+        if export_json:
+            save_to_json(filtered_df)
+
+        print(f"Filtered {len(filtered_df)} reels saved to ig_reels_filtered.parquet")
+        return True
+
+    except Exception as e:
+        print(f"Error in filtering.py: {str(e)}")
+        return False
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ndjson_store import stream_items_to_ndjson
+from ingestion import ADAPTERS, fetch_items
+
+# --- Instagram hashtag scraper actor, via the shared ingestion core ---
+ADAPTER = ADAPTERS["instagram_hashtag"]
+ACTOR_ID = ADAPTER.actor_id
+
+def build_run_input(hashtag="poloshirts", search_limit=2, results_limit=50):
+    return ADAPTER.build_input(hashtag, results_limit, search_limit=search_limit)
+
+
+def stream_reels(filename="instagram_poloshirts_reels.ndjson", hashtag="poloshirts",
+                 search_limit=2, results_limit=50, refresh=False):
+    """
+    Run the actor and append each hashtag object to an NDJSON file as it
+    arrives.  The posts stay nested; IGReels/filtering.py flattens them.
+    """
+    print(f"Streaming #{hashtag} results (searchLimit={search_limit})...")
+    items = fetch_items("instagram_hashtag", hashtag, results_limit,
+                        refresh=refresh, search_limit=search_limit)
+    count = stream_items_to_ndjson(items, filename)
+    print(f"Streamed {count} hashtag objects to {filename}")
+    return count
+
+
+def main(search_limit=2, refresh=False):
+    """Main function to orchestrate the scraping workflow."""
+    try:
+        stream_reels(search_limit=search_limit, refresh=refresh)
+        return True
+    except Exception as e:
+        print(f"Error in scraping.py: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--search-limit", type=int, default=2, help="Hashtags the actor expands the search to")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the local actor-run cache")
+    args = parser.parse_args()
+    main(search_limit=args.search_limit, refresh=args.refresh)
@@ -7,31 +7,49 @@ based on specific criteria.
 """
 
 import json
+import os
+import sys
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stream_loader import iter_column_batches, load_columns
+from schemas import META_ADS, clean, load_dtypes
+from filter_rules import columns as rule_columns, load_rules, pushdown, to_mask
+from columnar import EXPORT_JSON, FILTERED_META_ADS, read_table, write_batches, write_table
+from features import add_platform_features
 
-def load_and_flatten_json(input_json='poloshirts_meta_ads.json'):
+# Chunked mode streams fixed-size record batches through the filters
+CHUNKED    = os.getenv("CHUNKED_FILTERING", "false").lower() == "true"
+BATCH_SIZE = int(os.getenv("FILTER_BATCH_SIZE", 50000))
+
+# Dotted paths filter_data needs, with their column dtypes.  Only these are
+# materialised from the raw dump.
+COLUMNS = load_dtypes(META_ADS)
+
+# Thresholds live in rules/meta_ads.json; the conjuncts over raw columns
+# are applied while loading so rejected ads are never materialised
+RULES    = load_rules(os.getenv("META_ADS_RULES", "meta_ads"))
+PUSHDOWN = pushdown(RULES, COLUMNS)
+
+
+def load_and_flatten_json(input_json='poloshirts_meta_ads.ndjson', columns=COLUMNS, where=PUSHDOWN):
     """
-    Load JSON data and flatten nested structures.
+    Stream JSON data and flatten only the projected nested fields.
     
     Args:
-        input_json: Path to input JSON file
+        input_json: Path to input JSON array or NDJSON file
+        columns: {dotted_path: dtype} of the fields to keep
+        where: Rule applied while loading (None loads every record)
         
     Returns:
-        pandas DataFrame with flattened data
+        pandas DataFrame with one typed column per projected field
     """
     print(f"Loading data from {input_json}...")
-    with open(input_json, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Flatten nested structures
-    df = pd.json_normalize(data, sep='.')
-    
-    # Drop columns with all missing values
-    df.dropna(axis=1, how='all', inplace=True)
-    
-    return df
+    # Columns missing from every record are dropped, as before
+    return load_columns(input_json, columns, where=where)
 
 
 def clean_data(df):
@@ -44,26 +62,9 @@ def clean_data(df):
     Returns:
         Cleaned DataFrame
     """
-    # Convert Unix timestamps to datetime for start_date and end_date
-    for col in ['start_date', 'end_date']:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], unit='s', errors='coerce')
-
-    # Handle missing values
-    # For numeric columns, fill missing with 0
-    num_cols = df.select_dtypes(include=['number']).columns
-    df[num_cols] = df[num_cols].fillna(0)
-
-    # For object/string columns, fill missing with empty string
-    obj_cols = df.select_dtypes(include=['object']).columns
-    df[obj_cols] = df[obj_cols].fillna('')
-
-    # Example: if there are list columns you may want to convert them to strings
-    list_cols = [c for c in df.columns if df[c].apply(lambda x: isinstance(x, list)).any()]
-    for col in list_cols:
-        df[col] = df[col].apply(lambda x: ','.join(map(str, x)) if isinstance(x, list) else x)
-        
-    return df
+    # Unix timestamps become datetimes, missing text/counts become ''/0;
+    # list fields such as snapshot.videos keep their native structure
+    return clean(df, META_ADS)
 
 
 def add_time_metrics(df):
@@ -76,23 +77,21 @@ def add_time_metrics(df):
     Returns:
         DataFrame with added time metrics
     """
-    # Ensure 'start_date' is in datetime format
-    if 'start_date' in df.columns:
-        df['start_date'] = pd.to_datetime(df['start_date'], errors='coerce')
-
-    # Calculate days since start
-    today = pd.Timestamp.today()
-    df['days_since_start'] = (today - df['start_date']).dt.days
+    # Whole days since the ad started, from the shared feature module (UTC)
+    df = add_platform_features(df, 'meta_ads', days_col='days_since_start')
+    if 'days_since_start' in df.columns:
+        df['days_since_start'] = pd.Series(np.floor(df['days_since_start']), index=df.index).astype('Int64')
     
     return df
 
 
-def filter_data(df):
+def filter_data(df, rules=RULES):
     """
-    Filter data based on specific criteria.
+    Filter data based on the stage's rule tree.
     
     Args:
         df: Input DataFrame
+        rules: filter_rules rule (defaults to rules/meta_ads.json)
         
     Returns:
         Filtered DataFrame
@@ -110,19 +109,56 @@ def filter_data(df):
     valid_columns = [col for col in columns_to_keep if col in df.columns]
     meta = df[valid_columns]
 
-    # Drop rows where snapshot.videos is NaN
-    if 'snapshot.videos' in meta.columns:
-        meta = meta.dropna(subset=['snapshot.videos'])
+    # Only apply the parts of the rule whose columns are present
+    missing = rule_columns(rules) - set(meta.columns)
+    if missing:
+        print(f"Warning: Columns {sorted(missing)} not found. Skipping the rules that need them.")
+        rules = pushdown(rules, meta.columns)
+        if rules is None:
+            return meta
 
-        # Drop rows where snapshot.videos is "empty"
-        meta = meta[meta['snapshot.videos'].apply(lambda vids: bool(vids))]
+    # One vectorized mask for the whole rule tree
+    return meta[to_mask(rules, meta)]
 
-    # Additional filtering criteria
-    if 'days_since_start' in meta.columns and 'snapshot.page_like_count' in meta.columns:
-        return meta[(meta['days_since_start'] >= 14) & (meta['snapshot.page_like_count'] > 18000)]
-    else:
-        print("Warning: Required columns for filtering not found. Returning unfiltered data.")
-        return meta
+
+def filter_in_batches(input_json='poloshirts_meta_ads.ndjson', output_path='filtered_meta_ads.parquet',
+                      batch_size=BATCH_SIZE):
+    """
+    Run clean_data, add_time_metrics and filter_data on fixed-size record
+    batches streamed from disk, appending surviving rows to the output.
+    
+    Peak memory is bounded by ``batch_size`` rather than the dump size.
+    
+    Args:
+        input_json: Path to input JSON array or NDJSON file
+        output_path: Path to output Parquet file
+        batch_size: Records per batch
+        
+    Returns:
+        Number of rows written
+    """
+    print(f"Filtering {input_json} in batches of {batch_size}...")
+
+    def filtered_batches():
+        seen = 0
+        for batch in iter_column_batches(input_json, COLUMNS, batch_size, where=PUSHDOWN):
+            seen += len(batch)
+            batch = filter_data(add_time_metrics(clean_data(batch)))
+            print(f"  ... {seen} records read, {len(batch)} kept from last batch")
+            yield batch
+
+    return write_batches(filtered_batches(), output_path, FILTERED_META_ADS)
+
+
+def save_to_parquet(df, output_path='filtered_meta_ads.parquet'):
+    """
+    Save DataFrame to Parquet for the next stage.
+    
+    Args:
+        df: Input DataFrame
+        output_path: Path to output Parquet file
+    """
+    write_table(df, output_path, FILTERED_META_ADS)
 
 
 def save_to_json(df, output_json='filtered_meta_ads.json'):
@@ -146,9 +182,16 @@ def save_to_json(df, output_json='filtered_meta_ads.json'):
     print(f"Saved filtered data as JSON array to {output_json}")
 
 
-def main():
+def main(export_json=EXPORT_JSON, chunked=CHUNKED, batch_size=BATCH_SIZE):
     """Main function to orchestrate the data processing workflow."""
     try:
+        if chunked:
+            kept = filter_in_batches(batch_size=batch_size)
+            if export_json:
+                save_to_json(read_table('filtered_meta_ads.parquet'))
+            print(f"Filtered {kept} data saved to filtered_meta_ads.parquet")
+            return True
+
         # Step 1: Load and flatten JSON
         df = load_and_flatten_json()
         print(f"Loaded data with {len(df)} rows and {len(df.columns)} columns")
@@ -164,13 +207,14 @@ def main():
         filtered_df = filter_data(df)
         print(f"Filtered data down to {len(filtered_df)} rows")
         
-        # Convert to a list of dicts (one dict per row)
-        records = filtered_df.to_dict(orient='records')
+        # Save to Parquet (this is the input for the next step)
+        save_to_parquet(filtered_df)
 
-       # Save to pretty JSON (this is the input for the scoring step)
-        save_to_json(filtered_df)  # Call save_to_json directly here
+        # Pretty JSON only when asked for
+        if export_json:
+            save_to_json(filtered_df)
 
-        print(f"Filtered {len(filtered_df)} data saved to filtered_meta_ads.json")
+        print(f"Filtered {len(filtered_df)} data saved to filtered_meta_ads.parquet")
         return True
 
         
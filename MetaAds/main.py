@@ -137,7 +137,7 @@ def create_modified_scraping_module():
         content = f.read()
     
     # If the file doesn't already have a main() function that returns True/False
-    if "def main():" not in content:
+    if "def main(" not in content:
         with open("scraping.py", "w") as f:
             # Split on "if __name__ == \"__main__\":"
             parts = content.split('if __name__ == "__main__":')
@@ -1,58 +1,55 @@
+import argparse
 import json
 import os
-from apify_client import ApifyClient
+import sys
 from dotenv import load_dotenv
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ndjson_store import stream_items_to_ndjson
+from ingestion import ADAPTERS, fetch_items
+
 load_dotenv() 
-# Initialize the ApifyClient with your API token
-API_TOKEN = os.getenv('APIFY_API_KEY')
-client = ApifyClient(API_TOKEN)
+# Facebook Ad Library scraper actor, via the shared ingestion core
+ADAPTER = ADAPTERS["meta_ads"]
+ACTOR_ID = ADAPTER.actor_id
 
-def fetch_ads():
+def build_run_input():
     # Prepare the Actor input for PoloShirts ads
-    run_input = {
-        "urls": [
-            {
-                "url": (
-                    "https://www.facebook.com/ads/library/?active_status=active&ad_type=all&country=ALL&is_targeted_country=false&media_type=video&q=Polo%20Shirts&search_type=keyword_unordered"
-                )
-            }
-        ],
-        "count": 1000,
-        "scrapePageAds.activeStatus": "all",
-        "period": ""
-    }
-
-    # Run the Actor
-    print("Starting Apify Actor run for PoloShirts ads...")
-    run = client.actor("XtaWFhbtfxyzqrFmd").call(run_input=run_input)
-    dataset_id = run["defaultDatasetId"]
-    print(f"Actor run started (ID: {run['id']}), dataset ID: {dataset_id}")
+    return ADAPTER.build_input("Polo Shirts", 1000)
 
-    # Iterate over all items in the dataset
-    print("Fetching items from dataset...")
-    all_items = []
-    for item in client.dataset(dataset_id).iterate_items():
-        all_items.append(item)
+def fetch_ads(refresh=False):
+    # Run the Actor (or replay the cached dataset for the same input)
+    print("Starting Apify Actor run for PoloShirts ads...")
+    all_items = list(fetch_items("meta_ads", "Polo Shirts", 1000, refresh=refresh))
 
     print(f"Fetched {len(all_items)} items.")
     return all_items
 
+def stream_ads(filename="poloshirts_meta_ads.ndjson", refresh=False):
+    """Run the actor and append each dataset item to an NDJSON file as it arrives."""
+    print("Streaming items from dataset...")
+    items = fetch_items("meta_ads", "Polo Shirts", 1000, refresh=refresh)
+    count = stream_items_to_ndjson(items, filename)
+    print(f"Streamed {count} items to {filename}")
+    return count
+
 def save_to_json(data, filename="poloshirts_meta_ads.json"):
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
     print(f"Saved data to {filename}")
 
 
-def main():
+def main(refresh=False):
     """Main function to orchestrate the scraping workflow."""
     try:
-        ads = fetch_ads()
-        save_to_json(ads)
+        stream_ads(refresh=refresh)
         return True
     except Exception as e:
         print(f"Error in scraping.py: {str(e)}")
         return False
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--refresh", action="store_true", help="Ignore the local actor-run cache")
+    main(refresh=parser.parse_args().refresh)
@@ -10,23 +10,34 @@ import pandas as pd
 import json
 import ast
 import os
+import sys
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from columnar import EXPORT_JSON, SORTED_META_ADS, is_parquet_path, read_table, write_table
+from dedup import canonical_urls
 
-def load_input_data(input_path='filtered_meta_ads.json'):
+
+def load_input_data(input_path='filtered_meta_ads.parquet'):
     """
-    Load JSON data from a pretty-formatted input file.
+    Load the filtering stage output.
     
     Args:
-        input_path: Path to input JSON file
+        input_path: Path to input Parquet file, or a JSON file from an older run
         
     Returns:
-        List of record dictionaries
+        pandas DataFrame
     """
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
         
     print(f"Loading data from {input_path}...")
-    
+    if is_parquet_path(input_path):
+        return read_table(input_path)
+    return pd.DataFrame(_load_json_records(input_path))
+
+
+def _load_json_records(input_path):
     # Try to read as a single JSON array first
     try:
         with open(input_path, 'r', encoding='utf-8') as f:
@@ -68,30 +79,38 @@ def process_videos(df):
     Returns:
         DataFrame with processed video information
     """
-    # Handle different formats of video data
-    def parse_video_field(video_field):
+    # snapshot.videos is a native list of video dicts; older JSON
+    # intermediates hold it stringified, which is parsed as a fallback
+    def first_video(video_field):
         if isinstance(video_field, dict):
             return video_field
-        elif isinstance(video_field, str):
+        if isinstance(video_field, str):
             try:
-                return ast.literal_eval(video_field)
+                video_field = ast.literal_eval(video_field)
             except (ValueError, SyntaxError):
                 try:
-                    return json.loads(video_field)
+                    video_field = json.loads(video_field)
                 except json.JSONDecodeError:
                     return {}
+            if isinstance(video_field, dict):
+                return video_field
+        if isinstance(video_field, (list, tuple)) and video_field and isinstance(video_field[0], dict):
+            return video_field[0]
         return {}
 
-    # Convert snapshot.videos string to dict
-    df['snapshot.videos'] = df['snapshot.videos'].apply(parse_video_field)
+    # Keep the first video of each ad
+    df['snapshot.videos'] = df['snapshot.videos'].map(first_video)
 
-    # Extract video_hd_url
-    df['video_hd_url'] = df['snapshot.videos'].apply(
-        lambda d: d.get('video_hd_url', d.get('video_sd_url', '')).strip() if isinstance(d, dict) else ''
-    )
+    # Extract video_hd_url, falling back to the SD rendition
+    hd = df['snapshot.videos'].str.get('video_hd_url')
+    sd = df['snapshot.videos'].str.get('video_sd_url')
+    df['video_hd_url'] = hd.fillna(sd).fillna('').astype(str).str.strip()
 
     # Drop rows with empty video_hd_url
     df = df[df['video_hd_url'] != ""]
+
+    # Signed CDN URLs of the same video differ only in their query string
+    df = df.assign(video_key=canonical_urls(df['video_hd_url']))
     
     return df
 
@@ -157,9 +176,11 @@ def aggregate_by_video(df):
     agg_dict['snapshot.videos'] = lambda d: d.iloc[0].get('video_preview_image_url', '') \
         if 'snapshot.videos' in renamed_df.columns else ''
     
-    # Group by video URL and aggregate
+    # Group by canonical video URL and aggregate, keeping the first signed URL
+    key = 'video_key' if 'video_key' in renamed_df.columns else 'video_hd_url'
     try:
-        agg = renamed_df.groupby('video_hd_url').agg(**{
+        agg = renamed_df.groupby(key).agg(**{
+            'video_hd_url': ('video_hd_url', 'first'),
             'count': ('video_hd_url', 'size'),
             'days_since_start': ('days_since_start', 'max'),
             'page_name': ('page_name', 'first'),
@@ -178,22 +199,22 @@ def aggregate_by_video(df):
     except Exception as e:
         print(f"Error in aggregation: {e}")
         # Fallback to a simpler aggregation
-        agg = renamed_df.groupby('video_hd_url').agg({
-            'video_hd_url': 'size',
-            'days_since_start': 'max',
-        }).rename(columns={'video_hd_url': 'count'}).reset_index()
+        agg = renamed_df.groupby(key).agg(
+            count=('video_hd_url', 'size'),
+            days_since_start=('days_since_start', 'max'),
+        ).reset_index()
         
         # Add back the other columns by taking the first value in each group
         for col in renamed_df.columns:
-            if col not in agg.columns and col != 'video_hd_url':
+            if col not in agg.columns and col != key:
                 try:
-                    first_values = renamed_df.groupby('video_hd_url')[col].first()
-                    agg = agg.merge(first_values.to_frame(), left_on='video_hd_url', right_index=True)
+                    first_values = renamed_df.groupby(key)[col].first()
+                    agg = agg.merge(first_values.to_frame(), left_on=key, right_index=True)
                 except Exception:
                     # Skip columns that cause issues
                     continue
     
-    return agg
+    return agg.drop(columns=['video_key'], errors='ignore')
 
 
 def sort_and_select_top(agg, top_n=40):
@@ -252,6 +273,17 @@ def finalize_data(df):
     return df
 
 
+def save_to_parquet(df, output_path='sorted_meta_ads.parquet'):
+    """
+    Save DataFrame to Parquet for the tagging stage.
+    
+    Args:
+        df: Input DataFrame
+        output_path: Path to output Parquet file
+    """
+    write_table(df, output_path, SORTED_META_ADS)
+
+
 def save_to_json(df, output_path='sorted_meta_ads.json'):
     """
     Save DataFrame to a pretty-printed JSON file.
@@ -275,14 +307,11 @@ def save_to_json(df, output_path='sorted_meta_ads.json'):
     print(f"Saved {len(records)} filtered data as JSON array to {output_path}")
 
 
-def main():
+def main(export_json=EXPORT_JSON):
     """Main function to orchestrate the scoring workflow."""
     try:
-        # Step 1: Load data from input file
-        records = load_input_data()
-        
-        # Step 2: Convert to DataFrame
-        df = pd.DataFrame(records)
+        # Step 1-2: Load the filtered data as a DataFrame
+        df = load_input_data()
         
         # Step 3: Process video information
         df = process_videos(df)
@@ -299,8 +328,10 @@ def main():
         # Step 6: Finalize data structure
         top_ads = finalize_data(top_ads)
         
-        # Step 7: Save to JSON
-        save_to_json(top_ads)
+        # Step 7: Save to Parquet (and JSON only when asked for)
+        save_to_parquet(top_ads)
+        if export_json:
+            save_to_json(top_ads)
         
         return True
         
@@ -1,26 +1,29 @@
 #!/usr/bin/env python3
 import os
+import sys
 import time
 import json
 import ast
 from google import genai
 from google.genai import types
-from google.genai.errors import ClientError
+from google.genai.errors import APIError
 import torch
-from ratelimit import limits, sleep_and_retry
-import backoff
 from dotenv import load_dotenv
 
 load_dotenv() 
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from columnar import EXPORT_JSON, TAGGED_META_ADS, export_json as write_json, read_records, write_records
+from dedup import dedupe_records
+from gemini_rate_limiter import generate_content
+
 # ─── CONFIG ────────────────────────────────────────────────────────────────────
 API_KEY     = os.getenv('GEMINI_API_KEY', 'YOUR_API_KEY_HERE')
 MODEL_NAME  = "gemini-2.0-flash-001"
-INPUT_FILE  = "sorted_meta_ads.json"
+INPUT_FILE  = "sorted_meta_ads.parquet"
 OUTPUT_DIR  = "tagged_meta_ads"
 DEVICE       = "cuda" if torch.cuda.is_available() else "cpu"
-MAX_RETRIES = 5
-RETRY_DELAY  = 5
 # ────────────────────────────────────────────────────────────────────────────────
 
 # ─── TAG CATEGORIES ────────────────────────────────────────────────────────────
@@ -41,6 +44,10 @@ CTA_TAGS = [
 ]
 ICP_TAGS = ["moms","athletes","students","travelers","golfers"]
 ACTOR_TAGS = ["male","female","mixed","none"]
+TAG_LISTS = {
+    'hierarchy_tag': HIERARCHY_TAGS, 'storyline_tag': STORYLINE_TAGS, 'hook_tag': HOOK_TAGS,
+    'cta_tag': CTA_TAGS, 'actor_tag': ACTOR_TAGS, 'icp_tag': ICP_TAGS,
+}
 # ────────────────────────────────────────────────────────────────────────────────
 
 
@@ -80,47 +87,56 @@ def prepare_prompt(video_url: str, title: str, text: str, cta: str) -> str:
     return base
 
 
-@sleep_and_retry
-@limits(calls=15, period=60)
-@backoff.on_exception(
-    backoff.expo,
-    ClientError,
-    max_time=60,
-    giveup=lambda e: not hasattr(e, 'status_code') or e.status_code not in (429, 503)
-)
+def normalize_tags(tags) -> dict:
+    """
+    Keep one allowed string per tag key; anything else (lists, numbers,
+    unknown labels, missing keys) becomes 'none', so every record fits
+    the tagged Parquet schema.
+    """
+    tags = tags if isinstance(tags, dict) else {}
+    normalized = {}
+    for key, allowed in TAG_LISTS.items():
+        value = tags.get(key)
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else None
+        value = value.strip().lower() if isinstance(value, str) else None
+        normalized[key] = value if value in allowed else 'none'
+    return normalized
+
 
 def generate_tags(client, prompt: str) -> dict:
-    attempts = 0
-    while attempts < MAX_RETRIES:
-        try:
-            resp = client.models.generate_content(
-                model=MODEL_NAME,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction=(
-                        "You are a content-tagging assistant. Given video metadata, choose the best single tag from each provided list."
-                    ),
-                    temperature=0.0,
-                    max_output_tokens=150,
+    try:
+        # shared cross-process limit and retry (gemini_rate_limiter.py)
+        resp = generate_content(
+            client,
+            model=MODEL_NAME,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                system_instruction=(
+                    "You are a content-tagging assistant. Given video metadata, choose the best single tag from each provided list."
                 ),
-            )
-            raw = resp.text.strip()
-            try:
-                return json.loads(raw)
-            except json.JSONDecodeError:
-                start, end = raw.find("{"), raw.rfind("}")
-                if start != -1 and end != -1:
-                    return json.loads(raw[start:end+1])
-                return {}
-        except ClientError as e:
-            attempts += 1
-            print(f"Rate limit hit (attempt {attempts}/{MAX_RETRIES}), retrying in {RETRY_DELAY}s...")
-            time.sleep(RETRY_DELAY)
+                temperature=0.0,
+                max_output_tokens=150,
+            ),
+        )
+        raw = resp.text.strip()
+        try:
+            return normalize_tags(json.loads(raw))
+        except json.JSONDecodeError:
+            start, end = raw.find("{"), raw.rfind("}")
+            if start != -1 and end != -1:
+                try:
+                    return normalize_tags(json.loads(raw[start:end+1]))
+                except json.JSONDecodeError:
+                    pass
+            return normalize_tags({})
+    except APIError as e:
+        print(f"Gemini request failed ({e}); using default tags")
     # fallback default tags
     return {key: 'none' for key in ['hierarchy_tag','storyline_tag','hook_tag','cta_tag','actor_tag','icp_tag']}
 
 
-def main():
+def main(export_json=EXPORT_JSON):
     client = genai.Client(api_key=API_KEY)
 
     # Read raw file and split JSON objects by blank line
@@ -135,13 +151,15 @@ def main():
     #             entries.append(ast.literal_eval(chunk))
     #         except Exception:
     #             continue
-     # Read the entire JSON array from file
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        entries = json.load(f)
+    # Read the sorting stage output (Parquet, or JSON from an older run)
+    entries = read_records(INPUT_FILE)
 
     # If for some reason you get a single dict, wrap it in a list
     if isinstance(entries, dict):
         entries = [entries]
+
+    # Tag each creative once: collapse re-uploads and re-signed CDN URLs
+    entries = dedupe_records(entries, 'meta_ads')
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     tagged_results = []
 
@@ -169,19 +187,17 @@ def main():
         time.sleep(0.2)
 
     # Save master
-    all_path = os.path.join(OUTPUT_DIR, 'all_tagged.json')
-    with open(all_path, 'w', encoding='utf-8') as f:
-        json.dump(tagged_results, f, ensure_ascii=False, indent=2)
-    print(f"Saved all tagged entries to {all_path}")
+    write_records(tagged_results, os.path.join(OUTPUT_DIR, 'all_tagged.parquet'), TAGGED_META_ADS)
+    if not export_json:
+        return
 
-    # Save per-persona
+    # JSON exports: master and per-persona
+    write_json(tagged_results, os.path.join(OUTPUT_DIR, 'all_tagged.json'))
     for persona in ICP_TAGS:
         subset = [e for e in tagged_results if e.get('icp_tag', '').lower() == persona]
         if subset:
             path = os.path.join(OUTPUT_DIR, f"tagged_{persona}.json")
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump(subset, f, ensure_ascii=False, indent=2)
-            print(f"Saved {len(subset)} entries for persona '{persona}' to {path}")
+            write_json(subset, path)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Filtering and preprocessing TikTok hashtag data.
+
+This script processes raw JSON TikTok data, cleans it, and filters it
+based on the rules in rules/tiktok.json.
+"""
+
+import json
+import os
+import sys
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stream_loader import load_columns
+from schemas import TIKTOK, clean, load_dtypes
+from filter_rules import columns as rule_columns, load_rules, pushdown, to_mask
+from features import add_platform_features
+from columnar import EXPORT_JSON, FILTERED_TIKTOK, write_table
+
+# Fields the filter and sort stages need, with their column dtypes.  Only
+# these are materialised from the raw dump.
+COLUMNS = load_dtypes(TIKTOK)
+
+# Thresholds live in rules/tiktok.json and only need loaded columns, so
+# they are applied while loading and rejected videos are never materialised
+RULES    = load_rules(os.getenv("TIKTOK_RULES", "tiktok"))
+PUSHDOWN = pushdown(RULES, COLUMNS)
+
+
+def load_and_flatten_json(input_json='tiktok_poloshirts.ndjson', columns=COLUMNS, where=PUSHDOWN):
+    """
+    Stream JSON data and flatten only the projected nested fields.
+
+    Args:
+        input_json: Path to input JSON array or NDJSON file
+        columns: {dotted_path: dtype} of the fields to keep
+        where: Rule applied while loading (None loads every record)
+
+    Returns:
+        pandas DataFrame with one typed column per projected field
+    """
+    print(f"Loading data from {input_json}...")
+    return load_columns(input_json, columns, where=where)
+
+
+def clean_data(df):
+    """
+    Clean the dataframe by handling dates and missing values.
+
+    Args:
+        df: Input DataFrame
+
+    Returns:
+        Cleaned DataFrame
+    """
+    # Missing text/counts become ''/0 via the schema's vectorized casts;
+    # hashtags keep their native list structure
+    return clean(df, TIKTOK)
+
+
+def add_time_metrics(df):
+    """
+    Add recency and play-velocity features from the shared feature module.
+
+    Args:
+        df: Input DataFrame
+
+    Returns:
+        DataFrame with days_since_post, recency, velocity (plays per day)
+        and log_popularity
+    """
+    return add_platform_features(df, 'tiktok')
+
+
+def filter_data(df, rules=RULES):
+    """
+    Filter data based on the stage's rule tree and drop duplicate videos.
+
+    Args:
+        df: Input DataFrame
+        rules: filter_rules rule (defaults to rules/tiktok.json)
+
+    Returns:
+        Filtered DataFrame
+    """
+    # Rules may refer to columns (isAd, ...) that are not kept in the output
+    missing = rule_columns(rules) - set(df.columns)
+    if missing:
+        print(f"Warning: Columns {sorted(missing)} not found. Skipping the rules that need them.")
+        rules = pushdown(rules, df.columns)
+    if rules is not None:
+        df = df[to_mask(rules, df)]
+
+    # Hashtag runs overlap, so the same video can appear more than once
+    if 'id' in df.columns:
+        df = df.drop_duplicates(subset=['id'])
+
+    # Filter the DataFrame to only include the output columns
+    valid_columns = [col for col in FILTERED_TIKTOK.names if col in df.columns]
+    return df[valid_columns]
+
+
+def save_to_parquet(df, output_path='tiktok_filtered.parquet'):
+    """
+    Save DataFrame to Parquet for the next stage.
+
+    Args:
+        df: Input DataFrame
+        output_path: Path to output Parquet file
+    """
+    write_table(df, output_path, FILTERED_TIKTOK)
+
+
+def save_to_json(df, output_json='tiktok_filtered.json'):
+    """
+    Save DataFrame to a pretty-printed JSON file.
+
+    Args:
+        df: Input DataFrame
+        output_json: Path to output JSON file
+    """
+    records = df.to_dict(orient='records')
+    with open(output_json, 'w', encoding='utf-8') as fout:
+        json.dump(records, fout, ensure_ascii=False, indent=4, default=str)
+    print(f"Saved filtered data as JSON array to {output_json}")
+
+
+def main(export_json=EXPORT_JSON):
+    """Main function to orchestrate the data processing workflow."""
+    try:
+        # Step 1: Load and flatten JSON
+        df = load_and_flatten_json()
+        print(f"Loaded data with {len(df)} rows and {len(df.columns)} columns")
+
+        # Step 2: Clean the data
+        df = clean_data(df)
+
+        # Step 3: Add time metrics
+        df = add_time_metrics(df)
+
+        # Step 4: Filter data
+        filtered_df = filter_data(df)
+        print(f"Filtered data down to {len(filtered_df)} rows")
+
+        # Save to Parquet (this is the input for the sorting step)
+        save_to_parquet(filtered_df)
+
+        # Pretty JSON only when asked for
+        if export_json:
+            save_to_json(filtered_df)
+
+        print(f"Filtered {len(filtered_df)} data saved to tiktok_filtered.parquet")
+        return True
+
+    except Exception as e:
+        print(f"Error in filtering.py: {str(e)}")
+        return False
+
+
+if __name__ == "__main__":
+    main()
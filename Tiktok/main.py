@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 """
-Facebook Ads Data Pipeline
+TikTok Data Pipeline
 
-This script orchestrates the complete pipeline for processing Facebook ads:
-1. Scrape ads from Facebook using Apify
+This script orchestrates the complete pipeline for processing TikTok videos:
+1. Scrape hashtag videos from TikTok using Apify
 2. Filter and preprocess the raw data
-3. Score and select top-performing ads
-4. Tag the selected ads with content categories
+3. Score and select top-performing videos
+4. Tag the selected videos with content categories
 """
 
 import os
@@ -75,28 +75,28 @@ def run_stage(name, module_path, function_name, success_message, failure_message
         return False
 
 def main():
-    """Main function to run the complete Facebook ads pipeline."""
+    """Main function to run the complete TikTok pipeline."""
     stages = [
         # {
         #     "name": "Scraping",
         #     "module_path": "scraping.py",
         #     "function_name": "main",
-        #     "success_message": "✅ Successfully scraped Facebook ads",
-        #     "failure_message": "❌ Failed to scrape Facebook ads"
+        #     "success_message": "✅ Successfully scraped TikTok videos",
+        #     "failure_message": "❌ Failed to scrape TikTok videos"
         # },
         {
             "name": "Filtering",
             "module_path": "filtering.py",
             "function_name": "main",
-            "success_message": "✅ Successfully filtered ads data",
-            "failure_message": "❌ Failed to filter ads data"
+            "success_message": "✅ Successfully filtered TikTok data",
+            "failure_message": "❌ Failed to filter TikTok data"
         },
         {
             "name": "Sorting",
             "module_path": "sorting.py",
             "function_name": "main",
-            "success_message": "✅ Successfully scored and selected top ads",
-            "failure_message": "❌ Failed to score ads"
+            "success_message": "✅ Successfully scored and selected top videos",
+            "failure_message": "❌ Failed to score videos"
         },
         # {
         #     "name": "Tagging",
@@ -137,7 +137,7 @@ def create_modified_scraping_module():
         content = f.read()
     
     # If the file doesn't already have a main() function that returns True/False
-    if "def main():" not in content:
+    if "def main(" not in content:
         with open("scraping.py", "w") as f:
             # Split on "if __name__ == \"__main__\":"
             parts = content.split('if __name__ == "__main__":')
@@ -27,32 +27,58 @@
 # print("Results saved to tiktok_polo_shirts_ads.json")
 
 
-from apify_client import ApifyClient
+import argparse
 import json
 import os
+import sys
 
-# 1. Initialize client
-API_TOKEN = "apify_api_QOJbNnfXBnTpEuzZhuHGdcneaAQEFz2nyqR7"  # os.getenv("APIFY_TOKEN", "<YOUR_API_TOKEN>")
-client = ApifyClient(API_TOKEN)
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ndjson_store import stream_items_to_ndjson
+from ingestion import ADAPTERS, fetch_items, run_jobs
+
+# 1. TikTok Hashtag Scraper actor, via the shared ingestion core
+ADAPTER = ADAPTERS["tiktok"]
+ACTOR_ID = ADAPTER.actor_id
 
 # 2. Prepare Actor input for #poloshirts, up to 500 items
-run_input = {
-    "hashtags": ["poloshirts"],        # omit the leading “#”
-    "resultsPerPage": 100,             # pages of 100 items each
-    "maxItems": 500,                   # stop after 500 total
-    "shouldDownloadVideos": False,
-    "shouldDownloadCovers": False,
-    "shouldDownloadSubtitles": False,
-    "shouldDownloadSlideshowImages": False,
-}
-
-# 3. Run the TikTok Hashtag Scraper actor
-run = client.actor("f1ZeP0K58iwlqG2pY").call(run_input=run_input)
-
-# 4. Fetch all items and save to JSON
-items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
-output_file = "tiktok_poloshirts_500.json"
-with open(output_file, "w", encoding="utf-8") as f:
-    json.dump(items, f, ensure_ascii=False, indent=2)
-
-print(f"✅ Retrieved {len(items)} TikToks for #poloshirts and saved to {output_file}")
+def build_run_input(hashtag="poloshirts", max_items=500):
+    return ADAPTER.build_input(hashtag, max_items)
+
+
+def scrape_hashtags(hashtags, max_items=500, max_workers=8):
+    """Scrape several hashtags concurrently, one NDJSON file per hashtag."""
+    return run_jobs([("tiktok", tag, max_items) for tag in hashtags], max_workers=max_workers)
+
+
+def stream_ads(filename="tiktok_poloshirts.ndjson", refresh=False):
+    """Run the actor and append each dataset item to an NDJSON file as it arrives."""
+    # 3. Run the TikTok Hashtag Scraper actor and stream all items
+    items = fetch_items("tiktok", "poloshirts", 500, refresh=refresh)
+
+    # 4. Save to NDJSON (the filtering stage's input)
+    count = stream_items_to_ndjson(items, filename)
+    print(f"✅ Retrieved {count} TikToks for #poloshirts and saved to {filename}")
+    return count
+
+
+def save_to_json(data, filename="tiktok_poloshirts_500.json"):
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"Saved data to {filename}")
+
+
+def main(refresh=False):
+    """Main function to orchestrate the scraping workflow."""
+    try:
+        stream_ads(refresh=refresh)
+        return True
+    except Exception as e:
+        print(f"Error in scraping.py: {str(e)}")
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--refresh", action="store_true", help="Ignore the local actor-run cache")
+    main(refresh=parser.parse_args().refresh)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Scoring and selecting TikTok videos.
+
+This script reads the filtered TikTok data, computes engagement metrics
+as vectorized column operations, and selects the top videos with a
+partial sort.
+"""
+
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from columnar import EXPORT_JSON, SORTED_TIKTOK, read_table, write_table
+from features import add_platform_features
+from dedup import dedupe_frame
+
+TOP_N = int(os.getenv("TIKTOK_TOP_N", 40))
+CANDIDATES_PER_SLOT = 4   # top-N headroom so near-duplicates can be dropped
+
+
+def load_input_data(input_path='tiktok_filtered.parquet'):
+    """
+    Load the filtering stage output.
+
+    Args:
+        input_path: Path to input Parquet file, or a JSON file from an older run
+
+    Returns:
+        pandas DataFrame
+    """
+    print(f"Loading data from {input_path}...")
+    return read_table(input_path)
+
+
+def _column(df, name):
+    if name not in df.columns:
+        return np.zeros(len(df))
+    return pd.to_numeric(df[name], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+
+
+def add_engagement_metrics(df):
+    """
+    Add engagement metrics computed over whole columns at once.
+
+    - engagement_rate: (likes + comments + shares + saves) / plays
+    - share_ratio: shares / plays
+    - reach_per_fan: plays / author followers (follower-normalised reach)
+    - score: engagement_rate * log(1 + plays) * (1 + log(1 + reach_per_fan)),
+      i.e. engagement at scale, boosted for videos that travel well beyond
+      the author's own followers
+
+    Args:
+        df: Input DataFrame
+
+    Returns:
+        DataFrame with the metric columns added
+    """
+    # Recency / velocity / log popularity come from the filtering stage;
+    # recompute them for inputs written before it added them
+    if 'log_popularity' not in df.columns:
+        df = add_platform_features(df, 'tiktok')
+
+    plays    = _column(df, 'playCount')
+    shares   = _column(df, 'shareCount')
+    fans     = _column(df, 'authorMeta.fans')
+    interactions = (_column(df, 'diggCount') + _column(df, 'commentCount')
+                    + shares + _column(df, 'collectCount'))
+
+    # Zero plays / followers give a 0 metric instead of inf or nan
+    engagement_rate = np.divide(interactions, plays, out=np.zeros_like(plays), where=plays > 0)
+    share_ratio     = np.divide(shares, plays, out=np.zeros_like(plays), where=plays > 0)
+    reach_per_fan   = np.divide(plays, fans, out=np.zeros_like(plays), where=fans > 0)
+
+    df = df.assign(
+        engagement_rate=engagement_rate,
+        share_ratio=share_ratio,
+        reach_per_fan=reach_per_fan,
+        score=engagement_rate * df['log_popularity'].to_numpy() * (1.0 + np.log1p(reach_per_fan)),
+    )
+    return df
+
+
+def select_top(df, top_n=TOP_N, by='score'):
+    """
+    Select the ``top_n`` rows by ``by`` without sorting the whole frame.
+
+    ``np.argpartition`` finds the top ``top_n`` in linear time and only
+    those are sorted (ties keep input order).
+
+    Args:
+        df: DataFrame with the ``by`` column
+        top_n: Number of rows to keep
+        by: Column to rank on, descending
+
+    Returns:
+        DataFrame with the top rows, best first
+    """
+    values = df[by].to_numpy(dtype=np.float64)
+    if top_n < len(values):
+        idx = np.argpartition(-values, top_n - 1)[:top_n]
+    else:
+        idx = np.arange(len(values))
+    # sort the survivors by value (descending), then by position
+    idx = idx[np.lexsort((idx, -values[idx]))]
+    return df.iloc[idx]
+
+
+def save_to_parquet(df, output_path='tiktok_sorted.parquet'):
+    """
+    Save DataFrame to Parquet for the tagging stage.
+
+    Args:
+        df: Input DataFrame
+        output_path: Path to output Parquet file
+    """
+    write_table(df, output_path, SORTED_TIKTOK)
+
+
+def save_to_json(df, output_path='sorted_tiktok.json'):
+    """
+    Save DataFrame to a pretty-printed JSON file.
+
+    Args:
+        df: Input DataFrame
+        output_path: Path to output JSON file
+    """
+    records = df.to_dict(orient='records')
+    with open(output_path, 'w', encoding='utf-8') as fout:
+        json.dump(records, fout, ensure_ascii=False, indent=4, default=str)
+    print(f"Saved {len(records)} sorted videos as JSON array to {output_path}")
+
+
+def main(export_json=EXPORT_JSON, top_n=TOP_N):
+    """Main function to orchestrate the scoring workflow."""
+    try:
+        # Step 1: Load the filtered data
+        df = load_input_data()
+
+        # Step 2: Compute engagement metrics
+        df = add_engagement_metrics(df)
+        print(f"Scored {len(df)} videos")
+
+        # Step 3: Select the top videos, one per creative
+        candidates = select_top(df, top_n * CANDIDATES_PER_SLOT)
+        top = dedupe_frame(candidates, 'tiktok').head(top_n)
+        print(f"Selected top {len(top)} videos")
+
+        # Step 4: Save to Parquet (and JSON only when asked for)
+        save_to_parquet(top)
+        if export_json:
+            save_to_json(top)
+
+        return True
+
+    except Exception as e:
+        print(f"Error in sorting.py: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    main()
@@ -7,31 +7,42 @@ based on specific criteria.
 """
 
 import json
-import pandas as pd
-from datetime import datetime
+import os
+import sys
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stream_loader import load_columns
+from schemas import YT_SHORTS, clean, load_dtypes
+from filter_rules import columns as rule_columns, load_rules, pushdown, to_mask
+from columnar import EXPORT_JSON, FILTERED_YT_SHORTS, write_table
+from features import add_platform_features
 
-def load_and_flatten_json(input_json='yt_shorts_poloshirts.json'):
+# Fields filter_data needs, with their column dtypes.  Only these are
+# materialised from the raw dump.
+COLUMNS = load_dtypes(YT_SHORTS)
+
+# Thresholds live in rules/yt_shorts.json and only need loaded columns, so
+# they are applied while loading and rejected videos are never materialised
+RULES    = load_rules(os.getenv("YT_SHORTS_RULES", "yt_shorts"))
+PUSHDOWN = pushdown(RULES, COLUMNS)
+
+
+def load_and_flatten_json(input_json='yt_shorts_poloshirts.ndjson', columns=COLUMNS, where=PUSHDOWN):
     """
-    Load JSON data and flatten nested structures.
+    Stream JSON data and flatten only the projected nested fields.
     
     Args:
-        input_json: Path to input JSON file
+        input_json: Path to input JSON array or NDJSON file
+        columns: {dotted_path: dtype} of the fields to keep
+        where: Rule applied while loading (None loads every record)
         
     Returns:
-        pandas DataFrame with flattened data
+        pandas DataFrame with one typed column per projected field
     """
     print(f"Loading data from {input_json}...")
-    with open(input_json, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Flatten nested structures
-    df = pd.json_normalize(data, sep='.')
-    
-    # Drop columns with all missing values
-    df.dropna(axis=1, how='all', inplace=True)
-    
-    return df
+    # Columns missing from every record are dropped, as before
+    return load_columns(input_json, columns, where=where)
 
 
 def clean_data(df):
@@ -44,71 +55,64 @@ def clean_data(df):
     Returns:
         Cleaned DataFrame
     """
-    # Handle missing values
-    # For numeric columns, fill missing with 0
-    num_cols = df.select_dtypes(include=['number']).columns
-    df[num_cols] = df[num_cols].fillna(0)
-
-    # For object/string columns, fill missing with empty string
-    obj_cols = df.select_dtypes(include=['object']).columns
-    df[obj_cols] = df[obj_cols].fillna('')
-
-    # Example: if there are list columns you may want to convert them to strings
-    list_cols = [c for c in df.columns if df[c].apply(lambda x: isinstance(x, list)).any()]
-    for col in list_cols:
-        df[col] = df[col].apply(lambda x: ','.join(map(str, x)) if isinstance(x, list) else x)
-    
-
-    return df
+    # Missing text/counts become ''/0 via the schema's vectorized casts
+    return clean(df, YT_SHORTS)
 
 
-# def add_time_metrics(df):
-#     """
-#     Add time-based metrics like days_since_start.
+def add_time_metrics(df):
+    """
+    Add recency and view-velocity features from the shared feature module.
     
-#     Args:
-#         df: Input DataFrame
+    Args:
+        df: Input DataFrame
         
-#     Returns:
-#         DataFrame with added time metrics
-#     """
-#     # Ensure 'start_date' is in datetime format
-#     if 'start_date' in df.columns:
-#         df['start_date'] = pd.to_datetime(df['start_date'], errors='coerce')
-
-#     # Calculate days since start
-#     today = pd.Timestamp.today()
-#     df['days_since_start'] = (today - df['start_date']).dt.days
-    
-#     return df
+    Returns:
+        DataFrame with days_since_post, recency, velocity (views per day)
+        and log_popularity; shorts without a date get NaN age features
+    """
+    return add_platform_features(df, 'yt_shorts')
 
 
-def filter_data(df):
+def filter_data(df, rules=RULES):
     """
-    Filter data based on specific criteria.
+    Filter data based on the stage's rule tree.
     
     Args:
         df: Input DataFrame
+        rules: filter_rules rule (defaults to rules/yt_shorts.json)
         
     Returns:
         Filtered DataFrame
     """
-    columns_to_keep = ['id','title','url','viewCount','thumbnailUrl','date']
+    columns_to_keep = ['id','title','url','viewCount','thumbnailUrl','date',
+                       'days_since_post','recency','velocity','log_popularity']
 
     # Filter the DataFrame to only include selected columns
     # Use columns that exist in the df (handle case where some might be missing)
     valid_columns = [col for col in columns_to_keep if col in df.columns]
     yt = df[valid_columns]
 
-    # Drop rows where snapshot.videos is NaN
-    yt = yt.dropna(subset=['url'])
+    # Only apply the parts of the rule whose columns are present
+    missing = rule_columns(rules) - set(yt.columns)
+    if missing:
+        print(f"Warning: Columns {sorted(missing)} not found. Skipping the rules that need them.")
+        rules = pushdown(rules, yt.columns)
+        if rules is None:
+            return yt
+
+    # One vectorized mask for the whole rule tree
+    return yt[to_mask(rules, yt)]
+
+
+def save_to_parquet(df, output_path='yt_shorts_filtered.parquet'):
+    """
+    Save DataFrame to Parquet for the next stage.
     
-    # Additional filtering criteria
-    if 'viewCount' in yt.columns:
-        return yt[(yt['viewCount'] >= 4000)]
-    else:
-        print("Warning: Required columns for filtering not found. Returning unfiltered data.")
-        return yt
+    Args:
+        df: Input DataFrame
+        output_path: Path to output Parquet file
+    """
+    write_table(df, output_path, FILTERED_YT_SHORTS)
 
 
 def save_to_json(df, output_json='yt_shorts_filtered.json'):
@@ -133,7 +137,7 @@ def save_to_json(df, output_json='yt_shorts_filtered.json'):
 
 
 
-def main():
+def main(export_json=EXPORT_JSON):
     """Main function to orchestrate the data processing workflow."""
     try:
         # Step 1: Load and flatten JSON
@@ -144,8 +148,8 @@ def main():
         df = clean_data(df) 
         
         # Step 5: Add time metrics
-        # df = add_time_metrics(df)
-        # print("Added time metrics")
+        df = add_time_metrics(df)
+        print("Added time metrics")
         
         # Step 6: Filter data
         filtered_df = filter_data(df)
@@ -154,10 +158,14 @@ def main():
         # Convert to a list of dicts (one dict per row)
         # records = filtered_df.to_dict(orient='records')
 
-       # Save to pretty JSON (this is the input for the scoring step)
-        save_to_json(filtered_df)  # Call save_to_json directly here
+        # Save to Parquet (this is the input for the next step)
+        save_to_parquet(filtered_df)
+
+        # Pretty JSON only when asked for
+        if export_json:
+            save_to_json(filtered_df)
 
-        print(f"Filtered {len(filtered_df)} data saved to yt_shorts_filtered.json")
+        print(f"Filtered {len(filtered_df)} data saved to yt_shorts_filtered.parquet")
         return True
 
         
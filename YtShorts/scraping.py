@@ -1,51 +1,57 @@
-from apify_client import ApifyClient
+import argparse
 import json
 import os
+import sys
 
-# --- 1. Initialize the ApifyClient with your API token ---
-# Replace "<YOUR_API_TOKEN>" with your actual Apify API token (keep it secret!)
-API_TOKEN = os.getenv('APIFY_API_KEY')
-client = ApifyClient(API_TOKEN)
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ndjson_store import stream_items_to_ndjson
+from ingestion import ADAPTERS, fetch_items, run_jobs
 
-def fetch_ads():
-    run_input = {
-        "hashtags": ["poloshirts"],      # the hashtag(s) to search for (without the # sign)
-        "maxResults": 500,                 # we’re not interested in full-length videos
-        "scrapeShortsOnly": True,        # enforce that only Shorts are scraped
-                
-    }
+# --- YouTube Hashtag Scraper actor, via the shared ingestion core ---
+ADAPTER = ADAPTERS["youtube_shorts"]
+ACTOR_ID = ADAPTER.actor_id
 
+def build_run_input(hashtag="poloshirts", max_results=500):
+    return ADAPTER.build_input(hashtag, max_results)
 
-    # Run the Actor
-    print("Starting Apify Actor run for PoloShirts ads...")
-    run = client.actor("89uTe0zmDUIatNKSd").call(run_input=run_input)
-    dataset_id = run["defaultDatasetId"]
-    print(f"Actor run started (ID: {run['id']}), dataset ID: {dataset_id}")
 
-    # Iterate over all items in the dataset
-    print("Fetching items from dataset...")
-    all_items = []
-    for item in client.dataset(dataset_id).iterate_items():
-        all_items.append(item)
+def fetch_ads(refresh=False):
+    # Run the Actor (or replay the cached dataset for the same input)
+    print("Starting Apify Actor run for PoloShirts ads...")
+    all_items = list(fetch_items("youtube_shorts", "poloshirts", 500, refresh=refresh))
 
     print(f"Fetched {len(all_items)} items.")
     return all_items
 
+def stream_ads(filename="yt_shorts_poloshirts.ndjson", refresh=False):
+    """Run the actor and append each dataset item to an NDJSON file as it arrives."""
+    print("Streaming items from dataset...")
+    items = fetch_items("youtube_shorts", "poloshirts", 500, refresh=refresh)
+    count = stream_items_to_ndjson(items, filename)
+    print(f"Streamed {count} items to {filename}")
+    return count
+
+def scrape_hashtags(hashtags, max_results=500, max_workers=8):
+    """Scrape several hashtags concurrently, one NDJSON file per hashtag."""
+    return run_jobs([("youtube_shorts", tag, max_results) for tag in hashtags], max_workers=max_workers)
+
 def save_to_json(data, filename="yt_shorts_poloshirts.json"):
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
     print(f"Saved data to {filename}")
 
 
-def main():
+def main(refresh=False):
     """Main function to orchestrate the scraping workflow."""
     try:
-        ads = fetch_ads()
-        save_to_json(ads)
+        stream_ads(refresh=refresh)
         return True
     except Exception as e:
         print(f"Error in scraping.py: {str(e)}")
         return False
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--refresh", action="store_true", help="Ignore the local actor-run cache")
+    main(refresh=parser.parse_args().refresh)
@@ -0,0 +1,149 @@
+"""
+Content-addressed local cache for Apify actor runs.
+
+Runs are keyed by the actor id plus the canonicalised ``run_input`` (keys
+sorted, no whitespace), and the dataset items are kept on disk as gzipped
+NDJSON.  Entries expire after a TTL and the cache directory is kept under a
+size budget by evicting the least recently used entries first.  Re-running
+downstream filter/sort/tag experiments against the same inputs therefore
+replays the cached dataset instead of paying for another actor run.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from dataset_reader import iter_dataset_items
+
+CACHE_DIR = os.getenv("APIFY_CACHE_DIR", ".apify_cache")
+CACHE_TTL = int(os.getenv("APIFY_CACHE_TTL", 24 * 3600))                    # seconds
+CACHE_MAX_BYTES = int(os.getenv("APIFY_CACHE_MAX_BYTES", 2 * 1024 ** 3))     # 2 GiB
+
+
+def cache_key(actor_id, run_input):
+    """Hash of the actor id and canonical JSON of its input."""
+    canonical = json.dumps(
+        {"actor": actor_id, "input": run_input},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.ndjson.gz")
+
+
+def _is_fresh(path, ttl):
+    # mtime is the time the entry was written; atime tracks last use for LRU
+    return os.path.exists(path) and time.time() - os.stat(path).st_mtime < ttl
+
+
+def _touch(path):
+    st = os.stat(path)
+    os.utime(path, (time.time(), st.st_mtime))
+
+
+def _read_entry(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+    """
+    Drop expired entries, then least recently used ones until the cache
+    fits in ``max_bytes``.
+
+    Returns:
+        Number of entries removed
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+    now = time.time()
+    entries = []
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".ndjson.gz"):
+            continue
+        path = os.path.join(cache_dir, name)
+        st = os.stat(path)
+        if now - st.st_mtime >= ttl:
+            os.remove(path)
+            removed += 1
+        else:
+            entries.append((st.st_atime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+        removed += 1
+    return removed
+
+
+def iter_actor_items(client, actor_id, run_input, refresh=False, ttl=CACHE_TTL,
+                     cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, read_dataset=iter_dataset_items,
+                     memory_mbytes=None):
+    """
+    Yield the dataset items of an actor run, serving them from the cache
+    when a fresh entry exists.
+
+    Args:
+        client: ApifyClient
+        actor_id: Actor to run on a cache miss
+        run_input: Actor input; also part of the cache key
+        refresh: Ignore any cached entry and re-run the actor
+        ttl: Maximum age of a cache entry in seconds
+        cache_dir: Directory holding the cache entries
+        max_bytes: Size budget for the cache directory
+        read_dataset: ``(client, dataset_id) -> iterable`` used to read the
+            dataset on a miss (defaults to the parallel ranged reader)
+        memory_mbytes: Memory for the actor run on a miss (not part of the key)
+
+    Yields:
+        Dataset items as dicts
+    """
+    key = cache_key(actor_id, run_input)
+    path = _entry_path(key, cache_dir)
+
+    if not refresh and _is_fresh(path, ttl):
+        print(f"Cache hit for actor {actor_id} ({key[:12]})")
+        _touch(path)
+        yield from _read_entry(path)
+        return
+
+    print(f"Cache miss for actor {actor_id} ({key[:12]}), starting run...")
+    run = client.actor(actor_id).call(run_input=run_input, memory_mbytes=memory_mbytes)
+    if run is None or run.get("status") != "SUCCEEDED":
+        # a partial dataset must never become a cache entry
+        status = run.get("status") if run else "no run returned"
+        raise RuntimeError(f"Actor {actor_id} run ended with status {status}")
+    dataset_id = run["defaultDatasetId"]
+    print(f"Actor run finished (ID: {run['id']}), dataset ID: {dataset_id}")
+    items = read_dataset(client, dataset_id)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # unique per writer: threads of one process may fill the same entry
+    with tempfile.NamedTemporaryFile(dir=cache_dir, prefix=f"{key}.", suffix=".tmp", delete=False) as t:
+        tmp = t.name
+    complete = False
+    try:
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False))
+                f.write("\n")
+                yield item
+        complete = True
+    finally:
+        # only a fully consumed dataset becomes a cache entry
+        if complete:
+            os.replace(tmp, path)
+            evict(cache_dir, max_bytes, ttl)
+        elif os.path.exists(tmp):
+            os.remove(tmp)
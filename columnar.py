@@ -0,0 +1,276 @@
+"""
+Parquet hand-off between the filtering, sorting and tagging stages.
+
+Each stage writes its output as a Parquet file with an explicit Arrow
+schema and the next stage reads it back column-wise, so no hop re-parses
+pretty-printed JSON.  JSON is only written as an optional final artifact
+(``EXPORT_JSON=true`` or the stage's ``export_json`` argument).
+"""
+
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ndjson_store import load_records
+
+EXPORT_JSON = os.getenv("EXPORT_JSON", "false").lower() == "true"
+
+
+# ——— Schemas ————————————————————————————————————————————————————
+VIDEO = pa.struct([
+    ("video_hd_url", pa.string()),
+    ("video_sd_url", pa.string()),
+    ("video_preview_image_url", pa.string()),
+    ("watermarked_video_hd_url", pa.string()),
+    ("watermarked_video_sd_url", pa.string()),
+])
+
+TAG_FIELDS = [
+    pa.field("hierarchy_tag", pa.string()),
+    pa.field("storyline_tag", pa.string()),
+    pa.field("hook_tag", pa.string()),
+    pa.field("cta_tag", pa.string()),
+    pa.field("actor_tag", pa.string()),
+    pa.field("icp_tag", pa.string()),
+]
+
+# dedup.dedupe_records: records collapsed into each representative
+DEDUP_FIELDS = [
+    pa.field("occurrences", pa.int64()),
+]
+
+# features.add_features output
+FEATURE_FIELDS = [
+    pa.field("days_since_post", pa.float64()),
+    pa.field("recency", pa.float64()),
+    pa.field("velocity", pa.float64()),
+    pa.field("log_popularity", pa.float64()),
+]
+
+FILTERED_META_ADS = pa.schema([
+    ("page_name", pa.string()),
+    ("snapshot.page_profile_picture_url", pa.string()),
+    ("snapshot.body.text", pa.string()),
+    ("snapshot.caption", pa.string()),
+    ("snapshot.cta_text", pa.string()),
+    ("snapshot.cta_type", pa.string()),
+    ("snapshot.link_description", pa.string()),
+    ("snapshot.link_url", pa.string()),
+    ("snapshot.page_categories", pa.list_(pa.string())),
+    ("snapshot.page_like_count", pa.int64()),
+    ("snapshot.title", pa.string()),
+    ("snapshot.videos", pa.list_(VIDEO)),
+    ("days_since_start", pa.int64()),
+])
+
+SORTED_META_ADS = pa.schema([
+    ("count", pa.int64()),
+    ("days_since_start", pa.int64()),
+    ("page_name", pa.string()),
+    ("snapshot_page_profile_picture_url", pa.string()),
+    ("snapshot_body_text", pa.string()),
+    ("snapshot_caption", pa.string()),
+    ("snapshot_cta_text", pa.string()),
+    ("snapshot_cta_type", pa.string()),
+    ("snapshot_link_description", pa.string()),
+    ("snapshot_link_url", pa.string()),
+    ("snapshot_page_categories", pa.list_(pa.string())),
+    ("snapshot_page_like_count", pa.int64()),
+    ("snapshot_title", pa.string()),
+    ("snapshot.videos", pa.struct([
+        ("video_hd_url", pa.string()),
+        ("video_preview_image_url", pa.string()),
+    ])),
+])
+
+TAGGED_META_ADS = pa.schema(list(SORTED_META_ADS) + DEDUP_FIELDS + TAG_FIELDS)
+
+FILTERED_YT_SHORTS = pa.schema([
+    ("id", pa.string()),
+    ("title", pa.string()),
+    ("url", pa.string()),
+    ("viewCount", pa.int64()),
+    ("thumbnailUrl", pa.string()),
+    ("date", pa.string()),
+] + FEATURE_FIELDS)
+
+TAGGED_YT_SHORTS = pa.schema(list(FILTERED_YT_SHORTS) + DEDUP_FIELDS + TAG_FIELDS)
+
+FILTERED_TIKTOK = pa.schema([
+    ("id", pa.string()),
+    ("text", pa.string()),
+    ("createTimeISO", pa.string()),
+    ("webVideoUrl", pa.string()),
+    ("authorMeta.name", pa.string()),
+    ("authorMeta.nickName", pa.string()),
+    ("authorMeta.profileUrl", pa.string()),
+    ("authorMeta.following", pa.int64()),
+    ("authorMeta.fans", pa.int64()),
+    ("authorMeta.heart", pa.int64()),
+    ("musicMeta.playUrl", pa.string()),
+    ("videoMeta.duration", pa.int64()),
+    ("videoMeta.coverUrl", pa.string()),
+    ("diggCount", pa.int64()),
+    ("shareCount", pa.int64()),
+    ("playCount", pa.int64()),
+    ("commentCount", pa.int64()),
+    ("collectCount", pa.int64()),
+    ("hashtags", pa.list_(pa.struct([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("title", pa.string()),
+        ("cover", pa.string()),
+    ]))),
+] + FEATURE_FIELDS)
+
+SORTED_TIKTOK = pa.schema(list(FILTERED_TIKTOK) + DEDUP_FIELDS + [
+    ("engagement_rate", pa.float64()),
+    ("share_ratio", pa.float64()),
+    ("reach_per_fan", pa.float64()),
+    ("score", pa.float64()),
+])
+
+FILTERED_IG_REELS = pa.schema([
+    ("id", pa.string()),
+    ("shortCode", pa.string()),
+    ("type", pa.string()),
+    ("productType", pa.string()),
+    ("caption", pa.string()),
+    ("hashtags", pa.list_(pa.string())),
+    ("url", pa.string()),
+    ("inputUrl", pa.string()),
+    ("displayUrl", pa.string()),
+    ("videoUrl", pa.string()),
+    ("videoDuration", pa.float64()),
+    ("likesCount", pa.int64()),
+    ("commentsCount", pa.int64()),
+    ("videoViewCount", pa.int64()),
+    ("videoPlayCount", pa.int64()),
+    ("timestamp", pa.string()),
+    ("ownerUsername", pa.string()),
+    ("ownerFullName", pa.string()),
+    ("isSponsored", pa.bool_()),
+    ("in_top_posts", pa.bool_()),
+    ("in_latest_posts", pa.bool_()),
+] + FEATURE_FIELDS)
+
+
+# ——— Read / write ——————————————————————————————————————————————
+def is_parquet_path(path):
+    return str(path).endswith(".parquet")
+
+
+def to_table(df, schema=None):
+    """
+    Convert a DataFrame to an Arrow table conforming to ``schema``.
+
+    Schema columns missing from the DataFrame are left out (as they would
+    be from a JSON dump), so the reader's own defaults still apply; extra
+    DataFrame columns are kept with their inferred types after them.
+    """
+    if schema is None:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    df = df.reset_index(drop=True)
+    columns, fields = [], []
+    for field in schema:
+        if field.name in df.columns:
+            columns.append(pa.array(df[field.name], type=field.type, from_pandas=True))
+            fields.append(field)
+    for name in df.columns:
+        if name not in schema.names:
+            arr = pa.array(df[name], from_pandas=True)
+            columns.append(arr)
+            fields.append(pa.field(name, arr.type))
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields))
+
+
+def write_table(df, path, schema=None):
+    """
+    Write a DataFrame to Parquet with an explicit schema.
+
+    Returns:
+        Number of rows written
+    """
+    table = to_table(df, schema)
+    pq.write_table(table, path)
+    print(f"Saved {table.num_rows} rows to {path}")
+    return table.num_rows
+
+
+def write_batches(frames, path, schema):
+    """
+    Append DataFrames to one Parquet file as they are produced, holding
+    only the current batch in memory.
+
+    Returns:
+        Number of rows written
+    """
+    writer, rows = None, 0
+    try:
+        for df in frames:
+            if df.empty:
+                continue
+            table = to_table(df, schema)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(schema.empty_table(), path)
+    print(f"Saved {rows} rows to {path}")
+    return rows
+
+
+def write_records(records, path, schema):
+    """Write a list of dicts to Parquet; keys outside ``schema`` are dropped."""
+    table = pa.Table.from_pylist(records, schema=schema)
+    pq.write_table(table, path)
+    print(f"Saved {table.num_rows} rows to {path}")
+    return table.num_rows
+
+
+def read_table(path, columns=None):
+    """
+    Read a stage output into a DataFrame.
+
+    Args:
+        path: ``.parquet`` file, or a JSON/NDJSON file from an older run
+        columns: Optional subset of columns to read (Parquet only)
+
+    Returns:
+        pandas DataFrame
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Input file not found: {path}")
+    import pandas as pd
+    if is_parquet_path(path):
+        table = pq.read_table(path, columns=columns)
+        df = table.to_pandas()
+        # list columns come back as numpy arrays; keep them plain lists
+        for field in table.schema:
+            if pa.types.is_list(field.type):
+                df[field.name] = pd.Series(table.column(field.name).to_pylist(), dtype="object")
+        return df
+    return pd.DataFrame(load_records(path))
+
+
+def read_records(path, columns=None):
+    """Read a stage output as a list of dicts (structs come back as dicts)."""
+    if is_parquet_path(path):
+        return pq.read_table(path, columns=columns).to_pylist()
+    return load_records(path)
+
+
+def export_json(records, path, indent=2):
+    """Write records (list of dicts or a DataFrame) as a JSON array."""
+    if hasattr(records, "to_dict"):
+        records = records.to_dict(orient="records")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=indent, default=str)
+    print(f"Exported {len(records)} records to {path}")
+    return len(records)
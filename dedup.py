@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Collapse duplicate and near-duplicate creatives before tagging.
+
+The same creative is scraped many times: CDN URLs differ only in their
+signed query parameters, and re-uploads carry the same caption with a
+different hashtag or two.  Records are grouped when
+
+* any of their media URLs is the same after ``canonical_url`` (scheme,
+  ``www.``, query string and fragment dropped; YouTube links reduced to
+  the video id), or
+* their text (caption / title / body) is a near-duplicate: word-shingle
+  MinHash signatures are bucketed with LSH and candidate pairs are kept
+  when the estimated Jaccard similarity is at least ``THRESHOLD``.  Text
+  only merges records when at least one of them has no media URL: two
+  different videos that share ad copy are different creatives, and
+  tagging labels the video.
+
+Each group keeps its first record (stages hand over records best-first)
+with an ``occurrences`` count, so tagging volume drops by the duplicate
+ratio.
+
+Usage:
+    records = dedupe_records(records, "meta_ads")
+    python dedup.py tiktok tiktok_sorted.parquet -o tiktok_deduped.parquet
+"""
+
+import argparse
+import re
+import zlib
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+NUM_PERM  = 64          # MinHash signature length
+BANDS     = 16          # LSH bands of NUM_PERM // BANDS rows each
+THRESHOLD = 0.8         # estimated Jaccard needed to merge two texts
+SHINGLE   = 3           # words per shingle
+MIN_WORDS = 5           # shorter texts are only matched by URL
+
+_PRIME = np.uint64((1 << 61) - 1)
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# platform -> (media URL fields, text fields) of the records tagging reads
+PLATFORM_FIELDS = {
+    "meta_ads":  (["snapshot.videos.video_hd_url", "snapshot.videos.video_sd_url", "video_hd_url"],
+                  ["snapshot_title", "snapshot_body_text", "snapshot_caption"]),
+    "yt_shorts": (["url"], ["title"]),
+    "tiktok":    (["webVideoUrl"], ["text"]),
+    "ig_reels":  (["videoUrl", "url"], ["caption"]),
+}
+
+
+# ——— URL canonicalisation ———————————————————————————————————————
+def canonical_url(url):
+    """
+    Reduce a media URL to the part that identifies the media.
+
+    Returns:
+        Canonical string, or '' for an empty / non-string URL
+    """
+    if not isinstance(url, str) or not url.strip():
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path = parts.path.rstrip("/")
+
+    # YouTube: shorts/ID, watch?v=ID and youtu.be/ID are the same video
+    if host in ("youtube.com", "youtu.be"):
+        video_id = parse_qs(parts.query).get("v", [""])[0]
+        if not video_id:
+            video_id = path.rsplit("/", 1)[-1]
+        return f"youtube.com/watch?v={video_id}"
+    return host + path
+
+
+def canonical_urls(urls):
+    """``canonical_url`` over a column; returns an object array."""
+    return np.array([canonical_url(u) for u in urls], dtype=object)
+
+
+# ——— MinHash / LSH ——————————————————————————————————————————————
+def _permutations(num_perm, seed=1):
+    rng = np.random.default_rng(seed)
+    # a, b < 2**32 and shingle hashes < 2**32 keep a * x + b inside uint64
+    a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingle_hashes(text, k=SHINGLE):
+    """crc32 of every ``k``-word shingle of ``text`` (lower-cased)."""
+    words = _WORD.findall(text.lower()) if isinstance(text, str) else []
+    if len(words) < MIN_WORDS:
+        return np.empty(0, dtype=np.uint64)
+    shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                       dtype=np.uint64, count=len(shingles))
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, chunk=200_000):
+    """
+    MinHash signature of every text.
+
+    All shingle hashes are permuted in one ``(num_perm, shingles)`` array
+    per chunk and reduced per document with ``np.minimum.reduceat``.
+
+    Returns:
+        (signatures, has_text): uint64 array ``(len(texts), num_perm)`` and
+        a bool mask of texts long enough to be signed
+    """
+    a, b = _permutations(num_perm)
+    hashes = [shingle_hashes(t) for t in texts]
+    has_text = np.array([len(h) > 0 for h in hashes], dtype=bool)
+    signatures = np.full((len(texts), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+
+    docs = np.flatnonzero(has_text)
+    start = 0
+    while start < len(docs):
+        # take documents until the chunk holds ``chunk`` shingles
+        end, total = start, 0
+        while end < len(docs) and (total == 0 or total + len(hashes[docs[end]]) <= chunk):
+            total += len(hashes[docs[end]])
+            end += 1
+        batch = docs[start:end]
+        flat = np.concatenate([hashes[d] for d in batch])
+        offsets = np.cumsum([0] + [len(hashes[d]) for d in batch[:-1]])
+        permuted = (a[:, None] * flat[None, :] + b[:, None]) % _PRIME
+        signatures[batch] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        start = end
+    return signatures, has_text
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _union(parent, i, j):
+    ri, rj = _find(parent, i), _find(parent, j)
+    if ri != rj:
+        # the earlier record stays the root, so it is the representative
+        parent[max(ri, rj)] = min(ri, rj)
+
+
+def group_duplicates(url_keys, texts, threshold=THRESHOLD, bands=BANDS, num_perm=NUM_PERM):
+    """
+    Group rows that share a canonical URL or have near-duplicate text.
+    Near-duplicate text never merges two rows that both have URLs; those
+    are distinct media with the same copy.
+
+    Args:
+        url_keys: Per row, an iterable of canonical URLs ('' ignored)
+        texts: Per row, the text to compare
+        threshold: Estimated Jaccard similarity needed to merge texts
+
+    Returns:
+        int array with the index of each row's representative (the
+        earliest row of its group)
+    """
+    n = len(texts)
+    parent = list(range(n))
+
+    # per group root: does the group hold any media URL
+    has_url = np.array([any(keys) for keys in url_keys], dtype=bool)
+
+    def merge(i, j):
+        ri, rj = _find(parent, i), _find(parent, j)
+        _union(parent, ri, rj)
+        has_url[min(ri, rj)] = has_url[ri] | has_url[rj]
+
+    first_by_url = {}
+    for i, keys in enumerate(url_keys):
+        for key in keys:
+            if key:
+                merge(i, first_by_url.setdefault(key, i))
+
+    signatures, has_text = minhash_signatures(texts, num_perm)
+    rows = num_perm // bands
+    for band in range(bands):
+        buckets = {}
+        block = signatures[:, band * rows:(band + 1) * rows]
+        for i in np.flatnonzero(has_text):
+            # one candidate row per group already in the bucket
+            heads = buckets.setdefault(block[i].tobytes(), {})
+            for head in list(heads.values()):
+                ri, rh = _find(parent, i), _find(parent, head)
+                if ri == rh or (has_url[ri] and has_url[rh]):
+                    continue
+                if np.mean(signatures[head] == signatures[i]) >= threshold:
+                    merge(head, i)
+            heads.setdefault(_find(parent, i), i)
+
+    return np.array([_find(parent, i) for i in range(n)], dtype=np.int64)
+
+
+# ——— Records ————————————————————————————————————————————————————
+def _field(record, name):
+    # stage outputs mix flattened keys ('snapshot.videos') with nested
+    # dicts, so match the longest literal key first
+    if not isinstance(record, dict):
+        return None
+    if name in record:
+        return record[name]
+    parts = name.split(".")
+    for i in range(len(parts) - 1, 0, -1):
+        head = ".".join(parts[:i])
+        if head in record:
+            return _field(record[head], ".".join(parts[i:]))
+    return None
+
+
+def dedupe_records(records, platform=None, url_fields=None, text_fields=None, threshold=THRESHOLD):
+    """
+    Keep one representative record per duplicate group.
+
+    Args:
+        records: List of dicts, best first
+        platform: Key of PLATFORM_FIELDS, or pass the fields explicitly
+        url_fields: Media URL fields (dotted paths allowed)
+        text_fields: Text fields joined for near-duplicate matching
+        threshold: Estimated Jaccard similarity needed to merge texts
+
+    Returns:
+        Representative records in input order, each with ``occurrences``
+        (the size of its group)
+    """
+    if platform is not None:
+        url_fields, text_fields = PLATFORM_FIELDS[platform]
+    url_fields, text_fields = url_fields or [], text_fields or []
+    if not records:
+        return []
+
+    url_keys = [[canonical_url(_field(r, f)) for f in url_fields] for r in records]
+    texts = [" ".join(str(_field(r, f) or "") for f in text_fields) for r in records]
+    roots = group_duplicates(url_keys, texts, threshold)
+
+    reps, counts = np.unique(roots, return_counts=True)
+    occurrences = dict(zip(reps.tolist(), counts.tolist()))
+    deduped = [{**records[i], "occurrences": occurrences[i]} for i in reps.tolist()]
+    print(f"Deduplicated {len(records)} records to {len(deduped)} "
+          f"({1 - len(deduped) / len(records):.0%} duplicates)")
+    return deduped
+
+
+def dedupe_frame(df, platform=None, url_fields=None, text_fields=None, threshold=THRESHOLD):
+    """
+    ``dedupe_records`` for a DataFrame whose rows are ordered best first.
+
+    Returns:
+        The representative rows, in order, with an ``occurrences`` column
+    """
+    if platform is not None:
+        url_fields, text_fields = PLATFORM_FIELDS[platform]
+    url_fields = [f for f in url_fields or [] if f in df.columns]
+    text_fields = [f for f in text_fields or [] if f in df.columns]
+
+    url_keys = list(zip(*(canonical_urls(df[f]) for f in url_fields))) or [()] * len(df)
+    texts = df[text_fields].fillna("").astype(str).agg(" ".join, axis=1).tolist() if text_fields \
+        else [""] * len(df)
+    roots = group_duplicates(url_keys, texts, threshold)
+
+    reps, counts = np.unique(roots, return_counts=True)
+    print(f"Deduplicated {len(df)} rows to {len(reps)}")
+    return df.iloc[reps].assign(occurrences=counts)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+    from columnar import read_records, write_table
+
+    parser = argparse.ArgumentParser(description="Collapse near-duplicate creatives")
+    parser.add_argument("platform", choices=sorted(PLATFORM_FIELDS))
+    parser.add_argument("input", help="Stage output (Parquet or JSON)")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    deduped = dedupe_records(read_records(args.input), args.platform, threshold=args.threshold)
+    write_table(pd.DataFrame(deduped), args.output)
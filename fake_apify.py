@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for ApifyClient.
+
+Replays recorded datasets (or synthetic ones of any size) through the same
+``actor().call()`` / ``actor().start()`` / ``run().get()`` /
+``dataset().iterate_items()`` / ``dataset().list_items()`` surface the
+scrapers use, with configurable latency and failure injection, so the
+ingestion pipeline can be load-tested without spending Apify credits.
+
+Usage:
+    python fake_apify.py --items 200000 --run-latency 0.5 --page-latency 0.02
+"""
+
+import os
+import copy
+import time
+import uuid
+import random
+import argparse
+import threading
+
+from ndjson_store import load_records
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# actor id -> (recorded dataset, id fields made unique in synthetic items)
+RECORDINGS = {
+    "f1ZeP0K58iwlqG2pY": ("tiktok_poloshirts_500.json", ["id"]),                     # TikTok hashtag
+    "89uTe0zmDUIatNKSd": ("youtube_500_shorts_poloshirts.json", ["id"]),             # YouTube Shorts hashtag
+    "XtaWFhbtfxyzqrFmd": ("top40_sorted__meta_ads.json", []),                        # Ad Library keyword
+    "JJghSZmShuco4j9gJ": ("AFinal/ralph_lauren_ads.json", ["adArchiveID", "adArchiveId"]),  # Ad Library page
+    "xMc5Ga1oCONPmWJIa": ("Competitor/hm_reels.json", ["id", "shortCode"]),          # IG reels per profile
+    "shu8hvrXbJbY3Eb9W": ("instagram_polo_shirts_reels.json", ["id"]),               # IG hashtag
+}
+
+
+class FakeApifyError(RuntimeError):
+    """Raised for injected failures."""
+
+
+class _ListPage:
+    def __init__(self, items, offset, limit, total):
+        self.items  = items
+        self.offset = offset
+        self.limit  = limit
+        self.count  = len(items)
+        self.total  = total
+
+
+class _FakeDataset:
+    """A dataset whose i-th item is derived on demand from a template list."""
+
+    def __init__(self, templates, size, id_fields):
+        self.templates = templates
+        self.size      = size
+        self.id_fields = id_fields
+
+    def item(self, i):
+        base = self.templates[i % len(self.templates)]
+        if i < len(self.templates):
+            return copy.deepcopy(base)
+        item = copy.deepcopy(base)
+        for field in self.id_fields:
+            if item.get(field) is not None:
+                item[field] = f"{item[field]}-{i}"
+        return item
+
+
+class FakeApifyClient:
+    """
+    Args:
+        datasets: Optional {actor_id: list_of_items} overriding RECORDINGS
+        items_per_run: Dataset size per run; recorded items are replayed
+            cyclically with unique ids to reach it (None = recorded size)
+        run_latency: Seconds an actor run takes
+        page_latency: Seconds per dataset page request
+        failure_rate: Probability an actor run fails (``call()`` raises,
+            runs from ``start()`` end with status FAILED)
+        page_failure_rate: Probability a dataset page request fails
+        seed: Seed for the failure-injection RNG
+    """
+
+    def __init__(self, datasets=None, items_per_run=None, run_latency=0.0, page_latency=0.0,
+                 failure_rate=0.0, page_failure_rate=0.0, seed=None, page_size=1000):
+        self.datasets          = datasets or {}
+        self.items_per_run     = items_per_run
+        self.run_latency       = run_latency
+        self.page_latency      = page_latency
+        self.failure_rate      = failure_rate
+        self.page_failure_rate = page_failure_rate
+        self.page_size         = page_size
+        self._rng              = random.Random(seed)
+        self._lock             = threading.Lock()
+        self._runs             = {}
+        self._stores           = {}
+        self._templates        = {}
+        self.calls             = 0
+
+    # ——— internals ——————————————————————————————————————————————
+    def _roll(self, rate):
+        with self._lock:
+            return self._rng.random() < rate
+
+    def _templates_for(self, actor_id):
+        if actor_id not in self._templates:
+            if actor_id in self.datasets:
+                items = self.datasets[actor_id]
+            elif actor_id in RECORDINGS:
+                items = load_records(os.path.join(ROOT, RECORDINGS[actor_id][0]))
+            else:
+                items = [{"id": "synthetic", "text": "synthetic item"}]
+            self._templates[actor_id] = items or [{"id": "synthetic"}]
+        return self._templates[actor_id]
+
+    def _start_run(self, actor_id):
+        with self._lock:
+            self.calls += 1
+        templates = self._templates_for(actor_id)
+        size = self.items_per_run if self.items_per_run is not None else len(templates)
+        id_fields = RECORDINGS.get(actor_id, (None, ["id"]))[1]
+        run_id, dataset_id = uuid.uuid4().hex[:17], uuid.uuid4().hex[:17]
+        status = "FAILED" if self._roll(self.failure_rate) else "SUCCEEDED"
+        self._stores[dataset_id] = _FakeDataset(templates, size, id_fields)
+        self._runs[run_id] = {
+            "id": run_id, "actId": actor_id, "defaultDatasetId": dataset_id,
+            "finishes_at": time.monotonic() + self.run_latency, "final_status": status,
+        }
+        return run_id
+
+    def _run_info(self, run_id):
+        run = self._runs[run_id]
+        done = time.monotonic() >= run["finishes_at"]
+        return {
+            "id": run["id"], "actId": run["actId"], "defaultDatasetId": run["defaultDatasetId"],
+            "status": run["final_status"] if done else "RUNNING",
+        }
+
+    def _page(self, dataset_id, offset, limit):
+        if self.page_latency:
+            time.sleep(self.page_latency)
+        if self._roll(self.page_failure_rate):
+            raise FakeApifyError(f"injected failure reading {dataset_id} at offset {offset}")
+        store = self._stores[dataset_id]
+        end = min(store.size, offset + limit)
+        return [store.item(i) for i in range(offset, end)], store.size
+
+    # ——— ApifyClient surface ———————————————————————————————————
+    def actor(self, actor_id):
+        return _FakeActorClient(self, actor_id)
+
+    def run(self, run_id):
+        return _FakeRunClient(self, run_id)
+
+    def dataset(self, dataset_id):
+        return _FakeDatasetClient(self, dataset_id)
+
+
+class _FakeActorClient:
+    def __init__(self, fake, actor_id):
+        self.fake, self.actor_id = fake, actor_id
+
+    def start(self, run_input=None, **kwargs):
+        return self.fake._run_info(self.fake._start_run(self.actor_id))
+
+    def call(self, run_input=None, timeout_secs=None, **kwargs):
+        run_id = self.fake._start_run(self.actor_id)
+        latency = self.fake.run_latency
+        if timeout_secs is not None and latency > timeout_secs:
+            time.sleep(timeout_secs)
+            info = self.fake._run_info(run_id)
+            info["status"] = "TIMED-OUT"
+            return info
+        time.sleep(latency)
+        info = self.fake._run_info(run_id)
+        if info["status"] == "FAILED":
+            raise FakeApifyError(f"injected failure in run {run_id} of {self.actor_id}")
+        return info
+
+
+class _FakeRunClient:
+    def __init__(self, fake, run_id):
+        self.fake, self.run_id = fake, run_id
+
+    def get(self):
+        return self.fake._run_info(self.run_id)
+
+
+class _FakeDatasetClient:
+    def __init__(self, fake, dataset_id):
+        self.fake, self.dataset_id = fake, dataset_id
+
+    def get(self):
+        return {"id": self.dataset_id, "itemCount": self.fake._stores[self.dataset_id].size}
+
+    def list_items(self, offset=0, limit=None, **kwargs):
+        limit = limit or self.fake.page_size
+        items, total = self.fake._page(self.dataset_id, offset, limit)
+        return _ListPage(items, offset, limit, total)
+
+    def iterate_items(self, offset=0, limit=None, **kwargs):
+        end = self.fake._stores[self.dataset_id].size if limit is None else offset + limit
+        while offset < end:
+            items, _ = self.fake._page(self.dataset_id, offset, min(self.fake.page_size, end - offset))
+            if not items:
+                return
+            yield from items
+            offset += len(items)
+
+
+# ——— Offline throughput benchmark ——————————————————————————————
+def benchmark(items, run_latency, page_latency, failure_rate, jobs, workdir):
+    """Time the single-run path (cache + ranged reader + NDJSON) and ingestion.run_jobs."""
+    import ingestion
+    from apify_cache import iter_actor_items
+    from ndjson_store import stream_items_to_ndjson, iter_ndjson
+
+    os.makedirs(workdir, exist_ok=True)
+    actor_id = "f1ZeP0K58iwlqG2pY"
+
+    fake = FakeApifyClient(items_per_run=items, run_latency=run_latency, page_latency=page_latency)
+    out = os.path.join(workdir, "bench.ndjson")
+    cache_dir = os.path.join(workdir, "cache")
+    for label, refresh in (("cold (actor run)", True), ("warm (cache hit)", False)):
+        started = time.perf_counter()
+        n = stream_items_to_ndjson(iter_actor_items(fake, actor_id, {"bench": items}, refresh=refresh,
+                                                    cache_dir=cache_dir), out)
+        scrape_s = time.perf_counter() - started
+        started = time.perf_counter()
+        loaded = sum(1 for _ in iter_ndjson(out))
+        load_s = time.perf_counter() - started
+        print(f"sync {label:<17} {n:>8} items  scrape {n / scrape_s:>10,.0f}/s  load {loaded / load_s:>10,.0f}/s")
+
+    # the production path: ingestion.run_jobs on the shared (fake) client
+    os.environ.update({
+        "APIFY_FAKE": "1",
+        "APIFY_FAKE_LATENCY": str(run_latency),
+        "APIFY_FAKE_PAGE_LATENCY": str(page_latency),
+        "APIFY_FAKE_ITEMS": str(max(1, items // jobs)),
+        "APIFY_FAKE_FAILURE_RATE": str(failure_rate),
+    })
+    ingestion.get_client.cache_clear()
+    started = time.perf_counter()
+    tasks = ingestion.run_jobs([("tiktok", f"bench{i}") for i in range(jobs)], max_workers=jobs,
+                               refresh=True, output_dir=workdir)
+    elapsed = time.perf_counter() - started
+    total = sum(t.result["items"] for t in tasks if t.error is None)
+    failed = sum(1 for t in tasks if t.error is not None)
+    print(f"ingestion {jobs} jobs  {total:>8} items  {total / elapsed:>10,.0f}/s  "
+          f"{elapsed:.2f}s wall ({failed} failed)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline ingestion throughput benchmark")
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--run-latency", type=float, default=0.2)
+    parser.add_argument("--page-latency", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workdir", default=".fake_apify_bench")
+    args = parser.parse_args()
+    benchmark(args.items, args.run_latency, args.page_latency, args.failure_rate, args.jobs, args.workdir)
@@ -1,41 +1,30 @@
 import json
-import os
-from apify_client import ApifyClient
+from ingestion import ADAPTERS, fetch_items
+from ndjson_store import stream_items_to_ndjson
 
-# Initialize the ApifyClient with your API token
-API_TOKEN = os.getenv('APIFY_API_TOKEN')
-client = ApifyClient(API_TOKEN)
+# Facebook Ad Library keyword search, via the shared ingestion core
+ADAPTER = ADAPTERS["meta_ads"]
+ACTOR_ID = ADAPTER.actor_id
 
-def fetch_polo_shirts_ads():
-    # Prepare the Actor input for PoloShirts ads
-    run_input = {
-        "urls": [
-            {
-                "url": (
-                    "https://www.facebook.com/ads/library/?active_status=active&ad_type=all&country=ALL&is_targeted_country=false&media_type=video&q=Polo%20Shirts&search_type=keyword_unordered"
-                )
-            }
-        ],
-        "count": 1000,
-        "scrapePageAds.activeStatus": "all",
-        "period": ""
-    }
+def build_run_input(query="Polo Shirts", count=1000):
+    # Prepare the Actor input for an Ad Library keyword search
+    return ADAPTER.build_input(query, count)
 
-    # Run the Actor
+def fetch_polo_shirts_ads():
+    # Run the Actor (shared client + actor-run cache)
     print("Starting Apify Actor run for PoloShirts ads...")
-    run = client.actor("XtaWFhbtfxyzqrFmd").call(run_input=run_input)
-    dataset_id = run["defaultDatasetId"]
-    print(f"Actor run started (ID: {run['id']}), dataset ID: {dataset_id}")
-
-    # Iterate over all items in the dataset
-    print("Fetching items from dataset...")
-    all_items = []
-    for item in client.dataset(dataset_id).iterate_items():
-        all_items.append(item)
+    all_items = list(fetch_items("meta_ads", "Polo Shirts", 1000))
 
     print(f"Fetched {len(all_items)} items.")
     return all_items
 
+def stream_polo_shirts_ads(filename="1000_polo_shirts_ads.ndjson"):
+    """Run the actor and append each dataset item to an NDJSON file as it arrives."""
+    print("Streaming items from dataset...")
+    count = stream_items_to_ndjson(fetch_items("meta_ads", "Polo Shirts", 1000), filename)
+    print(f"Streamed {count} items to {filename}")
+    return count
+
 def save_to_json(data, filename="1000_polo_shirts_ads.json"):
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
@@ -43,8 +32,7 @@ def save_to_json(data, filename="1000_polo_shirts_ads.json"):
 
 if __name__ == "__main__":
     try:
-        ads = fetch_polo_shirts_ads()
-        save_to_json(ads)
+        stream_polo_shirts_ads()
     except Exception as e:
         print("Error during fetch or save:", e)
         exit(1)
@@ -0,0 +1,188 @@
+"""
+Shared engagement and recency features for the filtering and sorting stages.
+
+Every platform ranks on the same three ideas -- how old a post is, how
+fast it gathers views or likes, and how popular it is on a log scale --
+so they are computed here once, as NumPy operations over whole columns:
+
+    days_since      age in (fractional) days, measured from one UTC "now"
+    recency         exp(-ln2 * days / half_life): 1.0 today, 0.5 after
+                    one half-life
+    velocity        count / max(days, 1): views or likes per day live
+    log_popularity  log(1 + count)
+
+Dates may be datetime64 columns (Meta ads' ``start_date``), ISO-8601
+strings (``createTimeISO``, ``timestamp``) or plain dates (Shorts'
+``date``).  Missing dates give NaN features rather than errors.
+
+Usage:
+    df = add_features(df, 'createTimeISO', 'playCount')
+    python features.py --rows 2000000        # benchmark
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+HALF_LIFE_DAYS = float(os.getenv("RECENCY_HALF_LIFE_DAYS", 30))
+MIN_AGE_DAYS = 1.0     # velocity of a post from the last day is count / 1 day
+
+_NS_PER_DAY = np.float64(86400 * 10 ** 9)
+
+# platform -> (date column, count column) the stages feed to add_features
+PLATFORM_FEATURES = {
+    "meta_ads":  ("start_date",    None),
+    "yt_shorts": ("date",          "viewCount"),
+    "tiktok":    ("createTimeISO", "playCount"),
+    "ig_reels":  ("timestamp",     "likesCount"),
+}
+
+
+def utc_now():
+    """The reference time, as naive UTC ``datetime64[ns]``."""
+    return np.datetime64(pd.Timestamp.now(tz="UTC").tz_localize(None), "ns")
+
+
+# ——— Array features —————————————————————————————————————————————
+def to_datetime64(values):
+    """
+    Convert a date column to naive UTC ``datetime64[ns]``.
+
+    Args:
+        values: datetime64 Series/array, or ISO-8601 / ``YYYY-MM-DD`` strings
+
+    Returns:
+        numpy datetime64[ns] array (NaT where missing or unparseable)
+    """
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]")
+    series = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if series.dt.tz is not None:
+            series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+    else:
+        series = pd.to_datetime(series.replace("", None), utc=True, errors="coerce",
+                                format="ISO8601").dt.tz_localize(None)
+    return series.to_numpy(dtype="datetime64[ns]")
+
+
+def days_since(dates, now=None):
+    """
+    Age of each date in days.
+
+    Args:
+        dates: Date column (see ``to_datetime64``)
+        now: Reference time; defaults to ``utc_now()``
+
+    Returns:
+        float64 array, NaN where the date is missing
+    """
+    stamps = to_datetime64(dates)
+    now = utc_now() if now is None else np.datetime64(pd.Timestamp(now), "ns")
+    delta = (now - stamps).astype(np.int64).astype(np.float64)
+    delta[np.isnat(stamps)] = np.nan
+    return delta / _NS_PER_DAY
+
+
+def recency(days, half_life=HALF_LIFE_DAYS):
+    """Exponential decay of age: 1.0 now, 0.5 after ``half_life`` days."""
+    days = np.asarray(days, dtype=np.float64)
+    return np.exp2(-np.maximum(days, 0.0) / half_life)
+
+
+def velocity(counts, days, min_days=MIN_AGE_DAYS):
+    """Counts per day of age; ages under ``min_days`` count as ``min_days``."""
+    counts = np.asarray(counts, dtype=np.float64)
+    return counts / np.maximum(np.asarray(days, dtype=np.float64), min_days)
+
+
+def log_popularity(counts):
+    """``log(1 + count)``, with negative or missing counts treated as 0."""
+    counts = np.nan_to_num(np.asarray(counts, dtype=np.float64), nan=0.0)
+    return np.log1p(np.maximum(counts, 0.0))
+
+
+def _counts(df, name):
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# ——— DataFrame helper ———————————————————————————————————————————
+def add_features(df, date_col, count_col=None, now=None, days_col="days_since_post",
+                 half_life=HALF_LIFE_DAYS):
+    """
+    Add ``days_col``, ``recency`` and, given a count column, ``velocity``
+    and ``log_popularity`` to a DataFrame.
+
+    Missing input columns are skipped, so a stage can call this on a
+    partial frame.
+
+    Args:
+        df: Input DataFrame
+        date_col: Column holding the post / ad start date
+        count_col: Views or likes column, or None for date features only
+        now: Reference time shared by every row (default: current UTC time)
+        days_col: Name of the age column
+        half_life: Recency half-life in days
+
+    Returns:
+        DataFrame with the feature columns added
+    """
+    features = {}
+    days = None
+    if date_col in df.columns:
+        days = days_since(df[date_col], now)
+        features[days_col] = days
+        features["recency"] = recency(days, half_life)
+    if count_col is not None and count_col in df.columns:
+        counts = _counts(df, count_col)
+        features["log_popularity"] = log_popularity(counts)
+        if days is not None:
+            features["velocity"] = velocity(counts, days)
+    return df.assign(**features)
+
+
+def add_platform_features(df, platform, now=None, **kwargs):
+    """``add_features`` with the platform's date and count columns."""
+    date_col, count_col = PLATFORM_FEATURES[platform]
+    return add_features(df, date_col, count_col, now=now, **kwargs)
+
+
+# ——— Benchmark ——————————————————————————————————————————————————
+def benchmark(rows=1_000_000, repeat=3, seed=0):
+    """
+    Time ``add_features`` on synthetic data.
+
+    Returns:
+        {input kind: rows per second (best of ``repeat``)}
+    """
+    rng = np.random.default_rng(seed)
+    now = pd.Timestamp("2025-06-01")
+    offsets = rng.integers(0, 365 * 86400, rows).astype("timedelta64[s]")
+    stamps = np.datetime64("2025-06-01", "ns") - offsets
+    counts = rng.lognormal(8, 2, rows).astype(np.int64)
+    frames = {
+        "datetime64": pd.DataFrame({"date": stamps, "views": counts}),
+        "iso_string": pd.DataFrame({"date": np.datetime_as_string(stamps, unit="s"), "views": counts}),
+    }
+    rates = {}
+    for kind, df in frames.items():
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            add_features(df, "date", "views", now=now)
+            best = min(best, time.perf_counter() - started)
+        rates[kind] = rows / best
+    return rates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the shared feature computation")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for kind, rate in benchmark(args.rows, args.repeat).items():
+        print(f"{kind:>10}: {rate / 1e6:.2f}M rows/s")
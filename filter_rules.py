@@ -0,0 +1,289 @@
+"""
+Declarative filter rules compiled to a NumPy mask or a SQL WHERE clause.
+
+A rule is a JSON expression tree:
+
+    {"all": [rule, ...]}                      every sub-rule holds
+    {"any": [rule, ...]}                      at least one sub-rule holds
+    {"not": rule}
+    {"col": "viewCount", "op": ">=", "value": 4000}
+
+Leaf operators: ``== != > >= < <=``, ``in`` / ``not_in`` (list value),
+``between`` (``[low, high]``, inclusive), ``is_null`` / ``not_null`` and
+``nonempty`` (non-null with non-zero length, e.g. a list of videos).
+Missing values never satisfy a comparison.
+
+The same rule drives a DataFrame stage (``to_mask``) and a Postgres table
+(``to_sql``), and ``pushdown`` picks out the part of a rule that can be
+applied while the data is still being loaded, so rows the stage would
+drop are never materialised.
+
+Usage:
+    rule = load_rules("meta_ads")
+    df = df[to_mask(rule, df)]
+    where, params = to_sql(rule, SQL_COLUMNS["competitor_ads"])
+"""
+
+import json
+import operator
+import os
+import re
+
+import numpy as np
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")
+
+_COMPARE = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">":  operator.gt,
+    ">=": operator.ge,
+    "<":  operator.lt,
+    "<=": operator.le,
+}
+_LEAF_OPS = set(_COMPARE) | {"in", "not_in", "between", "is_null", "not_null", "nonempty"}
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# rule column -> SQL expression, per table the rules can be pushed down to
+SQL_COLUMNS = {
+    "competitor_ads": {
+        "page_name":                 "page_name",
+        "snapshot.page_like_count":  "page_likes",
+        "snapshot.caption":          "snapshot_caption",
+        "snapshot.link_url":         "link_url",
+        "snapshot.cta_text":         "cta_text",
+        "days_since_start":          "EXTRACT(DAY FROM now() - start_date)",
+        "is_active":                 "is_active",
+        "total_active_time":         "total_active_time",
+    },
+    "competitor_reels": {
+        "caption":        "caption",
+        "likes_count":    "likes_count",
+        "comments_count": "comments_count",
+        "video_url":      "video_url",
+        "display_url":    "display_url",
+        "days_since_post": "EXTRACT(DAY FROM now() - timestamp)",
+    },
+}
+
+
+class RuleError(ValueError):
+    """Raised for a malformed rule tree."""
+
+
+# ——— Loading ————————————————————————————————————————————————————
+def load_rules(name_or_path):
+    """
+    Load a rule tree from ``rules/<name>.json`` or an explicit path.
+
+    Returns:
+        Validated rule dict
+    """
+    path = name_or_path
+    if not os.path.exists(path):
+        path = os.path.join(RULES_DIR, f"{name_or_path}.json")
+    with open(path, "r", encoding="utf-8") as f:
+        rule = json.load(f)
+    validate(rule)
+    return rule
+
+
+def validate(rule):
+    """Raise RuleError if ``rule`` is not a well-formed rule tree."""
+    if not isinstance(rule, dict):
+        raise RuleError(f"rule must be an object, got {rule!r}")
+    if "all" in rule or "any" in rule:
+        children = rule.get("all", rule.get("any"))
+        if not isinstance(children, list):
+            raise RuleError(f"'all'/'any' takes a list, got {children!r}")
+        for child in children:
+            validate(child)
+    elif "not" in rule:
+        validate(rule["not"])
+    else:
+        op = rule.get("op")
+        if "col" not in rule or op not in _LEAF_OPS:
+            raise RuleError(f"leaf needs 'col' and an 'op' in {sorted(_LEAF_OPS)}: {rule!r}")
+        if op in ("in", "not_in") and not isinstance(rule.get("value"), list):
+            raise RuleError(f"'{op}' takes a list value: {rule!r}")
+        if op == "between" and not (isinstance(rule.get("value"), list) and len(rule["value"]) == 2):
+            raise RuleError(f"'between' takes [low, high]: {rule!r}")
+
+
+def columns(rule):
+    """Set of column names a rule refers to."""
+    if "all" in rule or "any" in rule:
+        return set().union(*(columns(c) for c in rule.get("all", rule.get("any"))))
+    if "not" in rule:
+        return columns(rule["not"])
+    return {rule["col"]}
+
+
+def pushdown(rule, available):
+    """
+    The part of ``rule`` that only needs ``available`` columns.
+
+    Top-level ``all`` conjuncts are split so each one that can be evaluated
+    early is; a rule that cannot be split is pushed whole or not at all.
+
+    Returns:
+        Rule dict, or None if nothing can be pushed down
+    """
+    available = set(available)
+    if "all" in rule:
+        parts = [c for c in rule["all"] if columns(c) <= available]
+        return {"all": parts} if parts else None
+    return rule if columns(rule) <= available else None
+
+
+# ——— DataFrame compilation ——————————————————————————————————————
+def to_mask(rule, df):
+    """
+    Evaluate a rule over a DataFrame as one vectorized boolean mask.
+
+    Columns missing from the DataFrame count as all-missing.
+
+    Returns:
+        numpy bool array of length ``len(df)``
+    """
+    n = len(df)
+    if "all" in rule:
+        mask = np.ones(n, dtype=bool)
+        for child in rule["all"]:
+            mask &= to_mask(child, df)
+        return mask
+    if "any" in rule:
+        mask = np.zeros(n, dtype=bool)
+        for child in rule["any"]:
+            mask |= to_mask(child, df)
+        return mask
+    if "not" in rule:
+        return ~to_mask(rule["not"], df)
+    return _leaf_mask(rule, df, n)
+
+
+def _leaf_mask(rule, df, n):
+    import pandas as pd
+
+    op, value = rule["op"], rule.get("value")
+    if rule["col"] not in df.columns:
+        return np.full(n, op == "is_null")
+    col = df[rule["col"]]
+    present = col.notna().to_numpy(dtype=bool)
+
+    if op == "is_null":
+        return ~present
+    if op == "not_null":
+        return present
+    if op == "nonempty":
+        # lists, dicts and strings by length; NaN, None and scalars are empty
+        return np.fromiter((_sized(v) for v in col), dtype=bool, count=n)
+    if op in ("in", "not_in"):
+        hit = col.isin(value).to_numpy(dtype=bool)
+        return (hit if op == "in" else ~hit) & present
+
+    numeric = isinstance(value, (int, float)) or (
+        op == "between" and all(isinstance(v, (int, float)) for v in value)
+    )
+    if numeric:
+        arr = pd.to_numeric(col, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        present = ~np.isnan(arr)
+        with np.errstate(invalid="ignore"):
+            if op == "between":
+                low, high = value
+                return present & (arr >= low) & (arr <= high)
+            return present & _COMPARE[op](arr, value)
+
+    # non-numeric values are only compared where present
+    arr = col.to_numpy(dtype=object)
+    mask = np.zeros(n, dtype=bool)
+    if op == "between":
+        low, high = value
+        mask[present] = (arr[present] >= low) & (arr[present] <= high)
+    else:
+        mask[present] = _COMPARE[op](arr[present], value)
+    return mask
+
+
+def _sized(value):
+    try:
+        return not isinstance(value, (bytes, bytearray)) and len(value) > 0
+    except TypeError:
+        return False
+
+
+# ——— SQL compilation ————————————————————————————————————————————
+def to_sql(rule, column_map=None):
+    """
+    Compile a rule to a parameterised SQL boolean expression.
+
+    Args:
+        rule: Rule tree
+        column_map: ``{rule_column: sql_expression}`` for the target table
+            (see SQL_COLUMNS); unmapped columns must be plain identifiers
+
+    Returns:
+        (sql, params) with ``%s`` placeholders for psycopg2
+    """
+    params = []
+    sql = _sql(rule, column_map or {}, params)
+    return sql, params
+
+
+def table_where(table, rule=None):
+    """
+    WHERE fragment restricting ``table`` to the rows its rules keep.
+
+    Args:
+        table: Target table, e.g. ``competitor_ads``
+        rule: Rule tree; defaults to ``rules/<table>.json`` if it exists
+
+    Returns:
+        (sql, params); ``("TRUE", [])`` when there is no rule
+    """
+    if rule is None:
+        path = os.path.join(RULES_DIR, f"{table}.json")
+        if not os.path.exists(path):
+            return "TRUE", []
+        rule = load_rules(path)
+    return to_sql(rule, SQL_COLUMNS.get(table))
+
+
+def _sql(rule, column_map, params):
+    if "all" in rule or "any" in rule:
+        children = rule.get("all", rule.get("any"))
+        if not children:
+            return "TRUE" if "all" in rule else "FALSE"
+        joiner = " AND " if "all" in rule else " OR "
+        return "(" + joiner.join(_sql(c, column_map, params) for c in children) + ")"
+    if "not" in rule:
+        return f"(NOT COALESCE({_sql(rule['not'], column_map, params)}, FALSE))"
+
+    col = column_map.get(rule["col"], rule["col"])
+    if col == rule["col"] and not _IDENT.match(col):
+        raise RuleError(f"column {rule['col']!r} has no SQL mapping")
+    op, value = rule["op"], rule.get("value")
+
+    if op == "is_null":
+        return f"{col} IS NULL"
+    if op == "not_null":
+        return f"{col} IS NOT NULL"
+    if op == "nonempty":
+        # same rows as the mask for text, arrays and JSONB alike: '', '[]',
+        # '{}', '""', JSON null and scalars are empty
+        js = f"to_jsonb({col})"
+        return (f"(CASE jsonb_typeof({js}) WHEN 'array' THEN jsonb_array_length({js}) > 0 "
+                f"WHEN 'object' THEN {js} <> '{{}}'::jsonb "
+                f"WHEN 'string' THEN {js} <> '\"\"'::jsonb ELSE FALSE END)")
+    if op in ("in", "not_in"):
+        if not value:
+            return "FALSE" if op == "in" else f"{col} IS NOT NULL"
+        params.extend(value)
+        marks = ", ".join(["%s"] * len(value))
+        return f"{col} IN ({marks})" if op == "in" else f"({col} IS NOT NULL AND {col} NOT IN ({marks}))"
+    if op == "between":
+        params.extend(value)
+        return f"{col} BETWEEN %s AND %s"
+    params.append(value)
+    sql_op = "<>" if op == "!=" else ("=" if op == "==" else op)
+    return f"{col} {sql_op} %s"
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+One Gemini rate limit shared by every process on the machine.
+
+Filtering (AFinal), the tagging scripts and the competitor lookup each
+used to limit themselves per process, so running two of them together
+overran the quota and every worker stalled on fixed retry sleeps.  They
+now all draw from one token bucket kept in a small SQLite file:
+
+* the bucket refills at ``GEMINI_RPM`` requests per minute up to
+  ``GEMINI_BURST`` tokens; a caller takes one token per request, inside
+  a ``BEGIN IMMEDIATE`` transaction, so concurrent workers never take
+  the same token;
+* on a 429/503 the server's retry hint (``Retry-After`` header or the
+  ``RetryInfo.retryDelay`` detail) is written to the bucket as a pause
+  that every worker honours, not just the one that was refused; without
+  a hint the pause grows exponentially with jitter.
+
+Usage:
+    from gemini_rate_limiter import generate_content
+    resp = generate_content(client, model=MODEL_NAME, contents=prompt)
+
+    python gemini_rate_limiter.py      # show the bucket state
+"""
+
+import os
+import time
+import random
+import sqlite3
+from email.utils import parsedate_to_datetime
+
+from google.genai.errors import APIError
+
+RATE_DB      = os.getenv("GEMINI_RATE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                       ".gemini_rate.sqlite"))
+REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_RPM", 15))
+BURST        = float(os.getenv("GEMINI_BURST", 5))     # tokens a quiet bucket can save up
+MAX_RETRIES  = 5
+BASE_DELAY   = 5.0      # seconds, first pause when the server gives no hint
+MAX_DELAY    = 120.0
+RETRY_CODES  = (429, 503)
+
+
+# ——— Retry hints ————————————————————————————————————————————————
+def status_code(error):
+    # google-genai errors carry ``code``; older wrappers ``status_code``
+    return getattr(error, "code", None) or getattr(error, "status_code", None)
+
+
+def _seconds(value):
+    # "30", "30s", "1.5s" or an HTTP date
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value[:-1] if value.endswith("s") else value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def retry_after(error):
+    """
+    Seconds the server asked us to wait, if it said.
+
+    Returns:
+        Float seconds from the ``Retry-After`` header or the error's
+        ``RetryInfo`` detail, else None
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        hinted = _seconds(headers.get("retry-after") or headers.get("Retry-After"))
+    except AttributeError:
+        hinted = None
+    if hinted is not None:
+        return hinted
+
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        details = details.get("error", details).get("details", [])
+    for detail in details if isinstance(details, list) else []:
+        if isinstance(detail, dict) and "retryDelay" in detail:
+            return _seconds(detail["retryDelay"])
+    return None
+
+
+# ——— Token bucket ———————————————————————————————————————————————
+class GeminiRateLimiter:
+    """
+    limiter = GeminiRateLimiter()
+    limiter.acquire()                  # blocks until a request may be sent
+    limiter.pause(30)                  # every worker waits 30 s
+    """
+
+    def __init__(self, path=RATE_DB, requests_per_minute=REQUESTS_PER_MINUTE,
+                 burst=BURST, name="gemini"):
+        self.path = path
+        self.rate = requests_per_minute / 60.0          # tokens per second
+        self.capacity = max(1.0, burst)
+        self.name = name
+        self.waited = 0.0
+        # autocommit mode: transactions are opened explicitly below
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                name         TEXT PRIMARY KEY,
+                tokens       REAL NOT NULL,
+                updated      REAL NOT NULL,
+                paused_until REAL NOT NULL DEFAULT 0
+            )""")
+        self.conn.execute(
+            "INSERT OR IGNORE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+            (name, 1.0, time.time()))
+
+    def _state(self, now):
+        tokens, updated, paused_until = self.conn.execute(
+            "SELECT tokens, updated, paused_until FROM buckets WHERE name = ?",
+            (self.name,)).fetchone()
+        tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+        return tokens, paused_until
+
+    def try_acquire(self):
+        """
+        Take a token if one is free.
+
+        Returns:
+            0.0 if a token was taken, else the seconds to wait before trying again
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            tokens, paused_until = self._state(now)
+            if now < paused_until:
+                wait = paused_until - now
+            elif tokens >= 1.0:
+                tokens, wait = tokens - 1.0, 0.0
+            else:
+                wait = (1.0 - tokens) / self.rate
+            self.conn.execute("UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?",
+                              (tokens, now, self.name))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            self.waited += wait
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop every worker for ``seconds`` and empty the bucket."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            self.conn.execute(
+                "UPDATE buckets SET tokens = 0, updated = ?, paused_until = MAX(paused_until, ?) "
+                "WHERE name = ?", (now, now + seconds, self.name))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def call(self, func, *args, **kwargs):
+        """
+        ``func(*args, **kwargs)`` under the shared limit, retried on 429/503.
+
+        Returns:
+            Whatever ``func`` returns; the last APIError is raised once
+            MAX_RETRIES attempts were refused
+        """
+        for attempt in range(1, MAX_RETRIES + 1):
+            self.acquire()
+            try:
+                return func(*args, **kwargs)
+            except APIError as e:
+                if status_code(e) not in RETRY_CODES or attempt == MAX_RETRIES:
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+                print(f"Gemini rate limited (attempt {attempt}/{MAX_RETRIES}), "
+                      f"all workers pausing {delay:.0f}s...")
+                self.pause(delay)
+
+    def state(self):
+        now = time.time()
+        tokens, paused_until = self._state(now)
+        return {"tokens": round(tokens, 2), "paused_for": round(max(0.0, paused_until - now), 1),
+                "requests_per_minute": self.rate * 60}
+
+    def close(self):
+        self.conn.close()
+
+
+_limiter = None
+
+def get_limiter():
+    """The process-wide limiter, opened on first use."""
+    global _limiter
+    if _limiter is None:
+        _limiter = GeminiRateLimiter()
+    return _limiter
+
+
+def generate_content(client, **kwargs):
+    """``client.models.generate_content(**kwargs)`` under the shared limit."""
+    return get_limiter().call(client.models.generate_content, **kwargs)
+
+
+if __name__ == "__main__":
+    limiter = get_limiter()
+    print(f"{limiter.path}: {limiter.state()}")
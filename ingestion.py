@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Shared ingestion core for every scraping entry point.
+
+Each platform is described by a PlatformAdapter (actor id, input template,
+id field).  All jobs in a process share one ApifyClient, and therefore one
+pooled HTTP connection set, plus the on-disk actor-run cache and the
+ScrapeScheduler, so a single process can refresh many platform/query jobs
+without paying interpreter and client start-up per script.
+
+Usage:
+    python ingestion.py tiktok:poloshirts youtube_shorts:poloshirts "meta_ads:Polo Shirts"
+    python ingestion.py ig_reels:hm ig_reels:uniqloin --limit 100 --refresh
+"""
+
+import os
+import time
+import logging
+import argparse
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+from urllib.parse import quote
+
+from dotenv import load_dotenv
+
+from apify_cache import iter_actor_items
+from ndjson_store import stream_items_to_ndjson
+from scheduler import ScrapeScheduler
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+
+# ——— Input templates ————————————————————————————————————————————
+def meta_ads_input(query, limit, **options):
+    return {
+        "urls": [
+            {
+                "url": (
+                    "https://www.facebook.com/ads/library/?active_status=active&ad_type=all&country=ALL"
+                    f"&is_targeted_country=false&media_type=video&q={quote(query)}&search_type=keyword_unordered"
+                )
+            }
+        ],
+        "count": limit,
+        "scrapePageAds.activeStatus": "all",
+        "period": "",
+    }
+
+def fb_page_ads_input(fb_url, limit, start_date=None, end_date=None, **options):
+    run_input = {
+        "startUrls": [{"url": fb_url}],
+        "resultsLimit": limit,
+        "activeStatus": "active",
+        "scrapeAdDetails": True,
+        "mediaType": "VIDEO",
+    }
+    if start_date:
+        run_input["startDate"] = start_date
+    if end_date:
+        run_input["endDate"] = end_date
+    return run_input
+
+def tiktok_input(hashtag, limit, **options):
+    return {
+        "hashtags": [hashtag],
+        "resultsPerPage": 100,
+        "maxItems": limit,
+        "shouldDownloadVideos": False,
+        "shouldDownloadCovers": False,
+        "shouldDownloadSubtitles": False,
+        "shouldDownloadSlideshowImages": False,
+    }
+
+def youtube_shorts_input(hashtag, limit, **options):
+    return {
+        "hashtags": [hashtag],
+        "maxResults": limit,
+        "scrapeShortsOnly": True,
+    }
+
+def instagram_hashtag_input(hashtag, limit, search_limit=2, **options):
+    return {
+        "search": hashtag,
+        "searchType": "hashtag",
+        "resultsType": "stories",
+        "searchLimit": search_limit,
+        "resultsLimit": limit,
+        "useSessionPool": True,
+        "proxyConfiguration": {
+            "useApifyProxy": True,
+            "apifyProxyGroups": ["RESIDENTIAL"],
+        },
+        "requestTimeoutSecs": 60,
+        "pageLoadTimeoutSecs": 60,
+        "maxRequestRetries": 5,
+    }
+
+def ig_reels_input(username, limit, **options):
+    return {
+        "username": [username],
+        "resultsLimit": limit,
+    }
+
+
+# ——— Adapters ———————————————————————————————————————————————————
+@dataclass(frozen=True)
+class PlatformAdapter:
+    name: str
+    actor_id: str
+    build_input: Callable
+    id_field: str
+    default_limit: int
+
+    def output_path(self, query, output_dir="."):
+        slug = "".join(c if c.isalnum() else "_" for c in query.lower()).strip("_")
+        return os.path.join(output_dir, f"{self.name}_{slug}.ndjson")
+
+
+ADAPTERS = {
+    a.name: a for a in [
+        PlatformAdapter("meta_ads",          "XtaWFhbtfxyzqrFmd", meta_ads_input,          "ad_archive_id", 1000),
+        PlatformAdapter("fb_page_ads",       "JJghSZmShuco4j9gJ", fb_page_ads_input,       "adArchiveID",   50),
+        PlatformAdapter("tiktok",            "f1ZeP0K58iwlqG2pY", tiktok_input,            "id",            500),
+        PlatformAdapter("youtube_shorts",    "89uTe0zmDUIatNKSd", youtube_shorts_input,    "id",            500),
+        PlatformAdapter("instagram_hashtag", "shu8hvrXbJbY3Eb9W", instagram_hashtag_input, "id",            50),
+        PlatformAdapter("ig_reels",          "xMc5Ga1oCONPmWJIa", ig_reels_input,          "shortCode",     100),
+    ]
+}
+
+
+# ——— Shared clients ————————————————————————————————————————————
+@lru_cache(maxsize=None)
+def get_client():
+    """
+    One ApifyClient per process so every job reuses its pooled HTTP
+    connections. APIFY_FAKE=1 swaps in the offline FakeApifyClient
+    (APIFY_FAKE_ITEMS / _LATENCY / _PAGE_LATENCY / _FAILURE_RATE tune it).
+    """
+    if os.getenv("APIFY_FAKE", "").lower() in ("1", "true"):
+        from fake_apify import FakeApifyClient
+        items = os.getenv("APIFY_FAKE_ITEMS")
+        return FakeApifyClient(items_per_run=int(items) if items else None,
+                               run_latency=float(os.getenv("APIFY_FAKE_LATENCY", 0)),
+                               page_latency=float(os.getenv("APIFY_FAKE_PAGE_LATENCY", 0)),
+                               failure_rate=float(os.getenv("APIFY_FAKE_FAILURE_RATE", 0)))
+    from apify_client import ApifyClient
+    return ApifyClient(os.getenv("APIFY_API_KEY") or os.getenv("APIFY_API_TOKEN"))
+
+
+# ——— Jobs ———————————————————————————————————————————————————————
+def fetch_items(platform, query, limit=None, refresh=False, memory_mbytes=None, **options):
+    """
+    Yield the dataset items for one platform/query, de-duplicated on the
+    adapter's id field, via the shared client and actor-run cache.
+    """
+    adapter = ADAPTERS[platform]
+    run_input = adapter.build_input(query, limit or adapter.default_limit, **options)
+    seen = set()
+    for item in iter_actor_items(get_client(), adapter.actor_id, run_input,
+                                 refresh=refresh, memory_mbytes=memory_mbytes):
+        key = item.get(adapter.id_field)
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        yield item
+
+def run_job(platform, query, limit=None, refresh=False, output_dir=".", memory_mbytes=None, **options):
+    """
+    Stream one platform/query job to ``{platform}_{query}.ndjson``.
+
+    Returns:
+        dict with platform, query, output path, item count and seconds
+    """
+    started = time.monotonic()
+    path = ADAPTERS[platform].output_path(query, output_dir)
+    count = stream_items_to_ndjson(
+        fetch_items(platform, query, limit, refresh, memory_mbytes, **options), path
+    )
+    elapsed = time.monotonic() - started
+    logger.info(f"[{platform}:{query}] {count} items -> {path} ({elapsed:.1f}s)")
+    return {"platform": platform, "query": query, "path": path, "items": count, "seconds": elapsed}
+
+def run_jobs(jobs, max_workers=8, actor_quotas=None, refresh=False, output_dir="."):
+    """
+    Run many (platform, query[, limit]) jobs in this process through one
+    ScrapeScheduler. Earlier jobs get higher priority.
+
+    Returns:
+        List of ScrapeTask with ``result`` or ``error`` set
+    """
+    scheduler = ScrapeScheduler(max_workers=max_workers, actor_quotas=actor_quotas)
+    for rank, job in enumerate(jobs):
+        platform, query, limit = (tuple(job) + (None,))[:3]
+        scheduler.submit(f"{platform}:{query}", ADAPTERS[platform].actor_id, run_job,
+                         platform, query, limit, refresh, output_dir, priority=-rank)
+    return scheduler.run()
+
+
+def parse_job(spec):
+    platform, _, query = spec.partition(":")
+    if platform not in ADAPTERS or not query:
+        raise argparse.ArgumentTypeError(f"expected platform:query with platform in {sorted(ADAPTERS)}")
+    return platform, query
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    parser = argparse.ArgumentParser(description="Run platform/query scrape jobs in one process")
+    parser.add_argument("jobs", nargs="+", type=parse_job, help="platform:query, e.g. tiktok:poloshirts")
+    parser.add_argument("--limit", type=int, default=None, help="Override each adapter's default limit")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the local actor-run cache")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    tasks = run_jobs([(p, q, args.limit) for p, q in args.jobs], max_workers=args.workers,
+                     refresh=args.refresh, output_dir=args.output_dir)
+    for task in tasks:
+        if task.error is not None:
+            print(f"  {task.name:<40} FAILED  {task.error}")
+        else:
+            print(f"  {task.name:<40} {task.result['items']:>7} items  {task.result['seconds']:>7.1f}s")
@@ -0,0 +1,127 @@
+"""
+Append-only NDJSON storage for scraped datasets.
+
+Scrapers write one JSON document per line as items arrive from Apify, so
+memory stays flat regardless of the dataset size and a crash part way
+through only loses the items written since the last flush.  The loaders
+in the filtering stages read these files directly.
+"""
+
+import json
+import os
+
+FLUSH_EVERY = 500
+
+
+def stream_items_to_ndjson(items, path, flush_every=FLUSH_EVERY, append=False, transform=None):
+    """
+    Write an iterable of items to an NDJSON file, one item per line.
+
+    Args:
+        items: Iterable of JSON-serialisable dicts (e.g. ``iterate_items()``)
+        path: Output file path
+        flush_every: Flush and fsync the file every N items
+        append: Keep existing lines instead of truncating the file
+        transform: Optional callable applied to each item before writing
+
+    Returns:
+        Number of items written
+    """
+    count = 0
+    with open(path, "a" if append else "w", encoding="utf-8") as f:
+        for item in items:
+            if transform is not None:
+                item = transform(item)
+            f.write(json.dumps(item, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+            if count % flush_every == 0:
+                f.flush()
+                os.fsync(f.fileno())
+                print(f"  ... {count} items written to {path}")
+        f.flush()
+        os.fsync(f.fileno())
+    return count
+
+
+def iter_ndjson(path, byte_range=None):
+    """
+    Yield records from an NDJSON file one at a time.
+
+    A truncated last line (left behind by a crash mid-write) is skipped.
+
+    Args:
+        path: NDJSON file
+        byte_range: Optional ``(start, end)``; yields exactly the lines that
+            start inside the range, so adjacent ranges partition the file
+    """
+    if byte_range is None:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from _parse_lines(f, path)
+        return
+    yield from _parse_lines(_range_lines(path, *byte_range), path)
+
+
+def _range_lines(path, start, end):
+    with open(path, "rb") as f:
+        if start > 0:
+            # the line straddling ``start`` belongs to the previous range
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line.decode("utf-8")
+
+
+def _parse_lines(lines, path):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            print(f"Skipping malformed line in {path}")
+
+
+def is_ndjson_path(path):
+    """Return True if the file extension marks the file as NDJSON."""
+    return str(path).endswith((".ndjson", ".jsonl"))
+
+
+def load_records(path):
+    """
+    Load a list of records from a JSON array, concatenated JSON objects or
+    an NDJSON file.
+
+    Args:
+        path: Path to a ``.json`` dump or a ``.ndjson``/``.jsonl`` file
+
+    Returns:
+        List of record dictionaries
+    """
+    if is_ndjson_path(path):
+        return list(iter_ndjson(path))
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        # older dumps hold pretty-printed objects back to back
+        return _decode_concatenated(text)
+    return data if isinstance(data, list) else [data]
+
+
+def _decode_concatenated(text):
+    decoder = json.JSONDecoder()
+    records, idx = [], 0
+    while idx < len(text):
+        while idx < len(text) and text[idx].isspace():
+            idx += 1
+        if idx >= len(text):
+            break
+        obj, idx = decoder.raw_decode(text, idx)
+        records.append(obj)
+    return records
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Priority scheduler for Apify scrape runs.
+
+Tasks are dispatched highest priority first, subject to
+  • a per-actor concurrency quota (so one slow actor cannot take every slot),
+  • a global Apify memory budget summed over the runs in flight,
+  • a retry policy that reschedules failed runs with exponential backoff.
+Queue depth and per-actor run latency are logged so throughput can be tuned
+against the account's Apify limits.
+"""
+import os
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+APIFY_MEMORY_BUDGET_MB = int(os.getenv("APIFY_MEMORY_BUDGET_MB", 8192))
+DEFAULT_RUN_MEMORY_MB  = int(os.getenv("APIFY_RUN_MEMORY_MB", 1024)) # budget estimate when the actor keeps its own memory
+
+
+class ScrapeTask:
+    def __init__(self, name, actor_id, func, args, kwargs, priority, memory_mbytes, budget_mb):
+        self.name          = name
+        self.actor_id      = actor_id
+        self.func          = func
+        self.args          = args
+        self.kwargs        = kwargs
+        self.priority      = priority
+        self.memory_mbytes = memory_mbytes    # passed to the actor; None keeps its own setting
+        self.budget_mb     = budget_mb        # counted against the memory budget
+        self.attempts      = 0
+        self.not_before    = 0.0
+        self.result        = None
+        self.error         = None
+
+
+class ScrapeScheduler:
+    def __init__(self, max_workers=8, actor_quotas=None, default_quota=4,
+                 memory_budget_mb=APIFY_MEMORY_BUDGET_MB, max_retries=3,
+                 base_backoff=5.0, report_every=30.0):
+        self.max_workers      = max_workers
+        self.actor_quotas     = actor_quotas or {}
+        self.default_quota    = default_quota
+        self.memory_budget_mb = memory_budget_mb
+        self.max_retries      = max_retries
+        self.base_backoff     = base_backoff
+        self.report_every     = report_every
+
+        self._heap      = []                  # (-priority, seq, task)
+        self._seq       = itertools.count()
+        self._cond      = threading.Condition()
+        self._running   = defaultdict(int)    # actor_id -> runs in flight
+        self._memory    = 0
+        self._in_flight = 0
+        self._done      = []
+        self.latencies  = defaultdict(list)   # actor_id -> seconds per successful run
+        self.retries    = 0
+
+    # ——— Submitting ————————————————————————————————————————————
+    def submit(self, name, actor_id, func, *args, priority=0, memory_mbytes=None, **kwargs):
+        """
+        Queue ``func(*args, memory_mbytes=..., **kwargs)``. Higher priority
+        runs first. ``memory_mbytes`` is passed to the actor run only when
+        set; left as None the actor's configured memory applies and
+        DEFAULT_RUN_MEMORY_MB is the estimate counted against the global
+        memory budget.
+        """
+        estimate = memory_mbytes if memory_mbytes is not None else DEFAULT_RUN_MEMORY_MB
+        task = ScrapeTask(name, actor_id, func, args, kwargs, priority,
+                          memory_mbytes, min(estimate, self.memory_budget_mb))
+        with self._cond:
+            heapq.heappush(self._heap, (-priority, next(self._seq), task))
+            self._cond.notify()
+        return task
+
+    # ——— Dispatching ———————————————————————————————————————————
+    def _quota(self, actor_id):
+        return self.actor_quotas.get(actor_id, self.default_quota)
+
+    def _can_start(self, task, now):
+        return (task.not_before <= now
+                and self._running[task.actor_id] < self._quota(task.actor_id)
+                and self._memory + task.budget_mb <= self.memory_budget_mb)
+
+    def _next_runnable(self, now):
+        """Pop the highest-priority task that fits; return (task, seconds to wait)."""
+        skipped, chosen = [], None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if self._can_start(entry[2], now):
+                chosen = entry[2]
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        wait = None
+        if chosen is None:
+            pending = [e[2].not_before - now for e in self._heap if e[2].not_before > now]
+            wait = min(pending) if pending else None
+        return chosen, wait
+
+    def _execute(self, task):
+        started = time.monotonic()
+        try:
+            task.result = task.func(*task.args, memory_mbytes=task.memory_mbytes, **task.kwargs)
+            task.error = None
+        except Exception as e:
+            task.error = e
+        elapsed = time.monotonic() - started
+
+        with self._cond:
+            self._running[task.actor_id] -= 1
+            self._memory    -= task.budget_mb
+            self._in_flight -= 1
+            task.attempts   += 1
+            if task.error is None:
+                self.latencies[task.actor_id].append(elapsed)
+                self._done.append(task)
+            elif task.attempts <= self.max_retries:
+                delay = self.base_backoff * 2 ** (task.attempts - 1) * random.uniform(0.8, 1.2)
+                task.not_before = time.monotonic() + delay
+                self.retries += 1
+                logger.warning(f"[{task.name}] failed ({task.error}); retry {task.attempts}/{self.max_retries} in {delay:.1f}s")
+                heapq.heappush(self._heap, (-task.priority, next(self._seq), task))
+            else:
+                logger.error(f"[{task.name}] giving up after {task.attempts} attempts: {task.error}")
+                self._done.append(task)
+            self._cond.notify_all()
+
+    def run(self):
+        """
+        Run every queued task (including retries) to completion.
+
+        Returns:
+            List of ScrapeTask with ``result`` or ``error`` set
+        """
+        last_report = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            with self._cond:
+                while self._heap or self._in_flight:
+                    now = time.monotonic()
+                    task, wait = (None, None)
+                    if self._in_flight < self.max_workers:
+                        task, wait = self._next_runnable(now)
+                    if task is not None:
+                        self._running[task.actor_id] += 1
+                        self._memory    += task.budget_mb
+                        self._in_flight += 1
+                        pool.submit(self._execute, task)
+                        continue
+                    if now - last_report >= self.report_every:
+                        self.report()
+                        last_report = now
+                    self._cond.wait(timeout=min(wait or self.report_every, self.report_every))
+        self.report()
+        return self._done
+
+    # ——— Metrics ———————————————————————————————————————————————
+    def stats(self):
+        actors = {}
+        for actor_id, lat in self.latencies.items():
+            lat = sorted(lat)
+            actors[actor_id] = {
+                "runs":  len(lat),
+                "p50_s": lat[len(lat) // 2],
+                "p95_s": lat[min(len(lat) - 1, int(len(lat) * 0.95))],
+                "max_s": lat[-1],
+            }
+        return {
+            "queue_depth": len(self._heap),
+            "in_flight":   self._in_flight,
+            "memory_mb":   self._memory,
+            "completed":   len(self._done),
+            "retries":     self.retries,
+            "actors":      actors,
+        }
+
+    def report(self):
+        s = self.stats()
+        logger.info(f"[scheduler] queue={s['queue_depth']} running={s['in_flight']} "
+                    f"memory={s['memory_mb']}/{self.memory_budget_mb}MB done={s['completed']} retries={s['retries']}")
+        for actor_id, a in s["actors"].items():
+            logger.info(f"[scheduler]   {actor_id}: runs={a['runs']} p50={a['p50_s']:.1f}s "
+                        f"p95={a['p95_s']:.1f}s max={a['max_s']:.1f}s")
@@ -0,0 +1,153 @@
+"""
+Per-platform column registry for the filtering stages.
+
+Each platform declares the dotted paths it loads and the kind of each
+column up front, so cleaning is a fixed set of vectorized casts instead of
+sniffing every cell for its type.  List and dict fields (``snapshot.videos``,
+``hashtags``) keep their native structure all the way to Parquet.
+
+Kinds:
+    str         text, missing -> ''
+    int         nullable integer, missing -> 0
+    float       float, missing -> 0.0
+    bool        boolean, missing -> False
+    datetime_s  Unix seconds -> datetime64 (missing stays NaT)
+    list, dict  native Python structure, missing stays None
+"""
+
+import pandas as pd
+
+META_ADS = {
+    'page_name': 'str',
+    'start_date': 'datetime_s',
+    'end_date': 'datetime_s',
+    'snapshot.page_profile_picture_url': 'str',
+    'snapshot.body.text': 'str',
+    'snapshot.caption': 'str',
+    'snapshot.cta_text': 'str',
+    'snapshot.cta_type': 'str',
+    'snapshot.link_description': 'str',
+    'snapshot.link_url': 'str',
+    'snapshot.page_categories': 'list',
+    'snapshot.page_like_count': 'int',
+    'snapshot.title': 'str',
+    'snapshot.videos': 'list',
+}
+
+YT_SHORTS = {
+    'id': 'str',
+    'title': 'str',
+    'url': 'str',
+    'viewCount': 'int',
+    'thumbnailUrl': 'str',
+    'date': 'str',
+}
+
+TIKTOK = {
+    'id': 'str',
+    'text': 'str',
+    'createTime': 'datetime_s',
+    'createTimeISO': 'str',
+    'webVideoUrl': 'str',
+    'authorMeta.name': 'str',
+    'authorMeta.nickName': 'str',
+    'authorMeta.profileUrl': 'str',
+    'authorMeta.following': 'int',
+    'authorMeta.fans': 'int',
+    'authorMeta.heart': 'int',
+    'musicMeta.playUrl': 'str',
+    'videoMeta.duration': 'int',
+    'videoMeta.coverUrl': 'str',
+    'diggCount': 'int',
+    'shareCount': 'int',
+    'playCount': 'int',
+    'commentCount': 'int',
+    'collectCount': 'int',
+    'isAd': 'bool',
+    'isSponsored': 'bool',
+    'hashtags': 'list',
+}
+
+# Posts flattened out of the hashtag results' topPosts/latestPosts
+IG_REELS = {
+    'id': 'str',
+    'shortCode': 'str',
+    'type': 'str',
+    'productType': 'str',
+    'caption': 'str',
+    'hashtags': 'list',
+    'url': 'str',
+    'inputUrl': 'str',
+    'displayUrl': 'str',
+    'videoUrl': 'str',
+    'videoDuration': 'float',
+    'likesCount': 'int',
+    'commentsCount': 'int',
+    'videoViewCount': 'int',
+    'videoPlayCount': 'int',
+    'timestamp': 'str',
+    'ownerUsername': 'str',
+    'ownerFullName': 'str',
+    'isSponsored': 'bool',
+    '_list': 'str',
+}
+
+SCHEMAS = {
+    'meta_ads': META_ADS,
+    'yt_shorts': YT_SHORTS,
+    'tiktok': TIKTOK,
+    'ig_reels': IG_REELS,
+}
+
+# dtype each kind is materialised with by stream_loader.load_columns
+LOAD_DTYPES = {
+    'str': 'object',
+    'int': 'Int64',
+    'float': 'float64',
+    'bool': 'object',
+    'datetime_s': 'float64',
+    'list': 'object',
+    'dict': 'object',
+}
+
+FILL_VALUES = {
+    'str': '',
+    'int': 0,
+    'float': 0.0,
+    'bool': False,
+}
+
+
+def load_dtypes(schema):
+    """``{dotted_path: dtype}`` for stream_loader from a platform schema."""
+    return {col: LOAD_DTYPES[kind] for col, kind in schema.items()}
+
+
+def clean(df, schema):
+    """
+    Cast the schema's columns present in ``df`` and fill missing values.
+
+    Columns outside the schema are left untouched.
+
+    Args:
+        df: Input DataFrame
+        schema: One of the platform schemas above
+
+    Returns:
+        Cleaned DataFrame
+    """
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind == 'datetime_s':
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(pd.to_numeric(df[col], errors='coerce'), unit='s')
+        elif kind == 'int':
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int64')
+        elif kind == 'float':
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype('float64')
+        elif kind == 'bool':
+            df[col] = df[col].fillna(False).astype('bool')
+        elif kind == 'str':
+            df[col] = df[col].fillna('').astype('object')
+    return df
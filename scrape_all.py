@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Refresh every platform for a set of hashtags in one concurrent run.
+
+Usage:
+    python scrape_all.py poloshirts golfshirts --max-concurrency 12
+"""
+
+import argparse
+import logging
+import os
+
+from ingestion import ADAPTERS, run_jobs
+
+PLATFORMS = ["tiktok", "youtube_shorts", "instagram_hashtag", "meta_ads"]
+
+
+def build_jobs(hashtags):
+    """One (platform, hashtag) ingestion job per pair, platforms in PLATFORMS order."""
+    return [(platform, tag) for tag in hashtags for platform in PLATFORMS]
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    parser = argparse.ArgumentParser(description="Scrape all platforms for the given hashtags concurrently")
+    parser.add_argument("hashtags", nargs="+", help="Hashtags / keywords without the leading #")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Actor runs in flight overall")
+    parser.add_argument("--per-actor", type=int, default=4, help="Actor runs in flight per actor")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the local actor-run cache")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    # shared client, run cache, id dedup and scheduler (ingestion.py)
+    tasks = run_jobs(
+        build_jobs(args.hashtags),
+        max_workers=args.max_concurrency,
+        actor_quotas={ADAPTERS[p].actor_id: args.per_actor for p in PLATFORMS},
+        refresh=args.refresh,
+        output_dir=args.output_dir,
+    )
+    for task in sorted(tasks, key=lambda t: (t.result or {}).get("seconds", 0), reverse=True):
+        if task.error is not None:
+            print(f"  {task.name:<30} FAILED  {task.error}")
+        else:
+            print(f"  {task.name:<30} {task.result['items']:>7} items  {task.result['seconds']:>7.1f}s")
+
+
+if __name__ == "__main__":
+    main()
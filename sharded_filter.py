@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Run a platform's clean/filter logic over many raw dumps on a process pool.
+
+Input files are split into shards (whole JSON files, or newline-aligned
+byte ranges of large NDJSON files), each shard is loaded, cleaned and
+filtered in a worker process with the platform's own filtering module,
+and the surviving rows are merged in input order (file order as given,
+then record order inside each file), so the output does not depend on
+which worker finishes first.  A filtering module that defines
+``merge_shards(frames)`` (IGReels: dedupe posts across hashtag dumps)
+gets all shard results to merge before they are written.
+
+Usage:
+    python sharded_filter.py meta_ads dumps/*.ndjson --workers 8
+    python sharded_filter.py yt_shorts yt_*.json -o yt_shorts_filtered.parquet
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from columnar import FILTERED_IG_REELS, FILTERED_META_ADS, FILTERED_TIKTOK, FILTERED_YT_SHORTS, write_batches
+from ndjson_store import is_ndjson_path
+from stream_loader import load_columns
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+SHARD_BYTES = int(os.getenv("SHARD_BYTES", 64 * 1024 ** 2))   # NDJSON range size
+
+# platform -> (filtering module, output schema, default output)
+PLATFORMS = {
+    "meta_ads":  ("MetaAds/filtering.py",  FILTERED_META_ADS,  "filtered_meta_ads.parquet"),
+    "yt_shorts": ("YtShorts/filtering.py", FILTERED_YT_SHORTS, "yt_shorts_filtered.parquet"),
+    "tiktok":    ("Tiktok/filtering.py",   FILTERED_TIKTOK,    "tiktok_filtered.parquet"),
+    "ig_reels":  ("IGReels/filtering.py",  FILTERED_IG_REELS,  "ig_reels_filtered.parquet"),
+}
+
+_modules = {}
+
+
+def _filtering_module(platform):
+    """Import the platform's filtering.py once per worker process."""
+    if platform not in _modules:
+        path = os.path.join(ROOT, PLATFORMS[platform][0])
+        spec = importlib.util.spec_from_file_location(f"{platform}_filtering", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[platform] = module
+    return _modules[platform]
+
+
+def plan_shards(paths, shard_bytes=SHARD_BYTES):
+    """
+    Split input files into shards.
+
+    NDJSON files larger than ``shard_bytes`` become several byte ranges;
+    everything else is one shard.  A ``shard_bytes`` below 1 disables
+    splitting.
+
+    Returns:
+        List of (path, byte_range) in merge order; byte_range is None for
+        a whole file
+    """
+    shards = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if not is_ndjson_path(path) or shard_bytes < 1 or size <= shard_bytes:
+            shards.append((path, None))
+            continue
+        for start in range(0, size, shard_bytes):
+            shards.append((path, (start, min(size, start + shard_bytes))))
+    return shards
+
+
+def filter_shard(platform, path, byte_range=None):
+    """
+    Load, clean and filter one shard with the platform's filtering module.
+
+    Returns:
+        Filtered DataFrame
+    """
+    mod = _filtering_module(platform)
+    df = load_columns(path, mod.COLUMNS, drop_empty=False, where=mod.PUSHDOWN, byte_range=byte_range,
+                      explode=getattr(mod, "EXPLODE", None))
+    df = mod.clean_data(df)
+    if hasattr(mod, "add_time_metrics"):
+        df = mod.add_time_metrics(df)
+    return mod.filter_data(df)
+
+
+def run_sharded(platform, paths, output_path=None, workers=None, shard_bytes=SHARD_BYTES):
+    """
+    Filter every shard of ``paths`` on a process pool and merge the
+    results into one Parquet file in input order.
+
+    Returns:
+        Number of rows written
+    """
+    _, schema, default_output = PLATFORMS[platform]
+    output_path = output_path or default_output
+    shards = plan_shards(paths, shard_bytes)
+    print(f"Filtering {len(paths)} files as {len(shards)} shards on {workers or os.cpu_count()} processes...")
+
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in submission order, which fixes the merge order
+        results = pool.map(filter_shard, [platform] * len(shards),
+                           [p for p, _ in shards], [r for _, r in shards])
+        merge = getattr(_filtering_module(platform), "merge_shards", None)
+        if merge is not None:
+            results = [merge(results)]
+        rows = write_batches(results, output_path, schema)
+    print(f"Filtered {rows} rows in {time.monotonic() - started:.1f}s")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filter many raw dumps in parallel")
+    parser.add_argument("platform", choices=sorted(PLATFORMS))
+    parser.add_argument("inputs", nargs="+", help="Raw JSON / NDJSON dumps")
+    parser.add_argument("-o", "--output", default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count)")
+    parser.add_argument("--shard-mb", type=int, default=SHARD_BYTES // 1024 ** 2,
+                        help="Split NDJSON files larger than this into byte ranges (0: never split)")
+    args = parser.parse_args()
+
+    run_sharded(args.platform, args.inputs, args.output, args.workers, args.shard_mb * 1024 ** 2)
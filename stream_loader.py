@@ -0,0 +1,208 @@
+"""
+Projection-pushdown loader for the filtering stages.
+
+Raw scraper dumps carry hundreds of nested fields, but each filtering
+stage keeps about a dozen of them.  Instead of ``json.load`` on the whole
+file followed by ``pd.json_normalize`` on every record, the records are
+decoded one at a time from a JSON array, concatenated objects or NDJSON,
+and only the requested dotted paths (``snapshot.body.text``) are copied
+into per-column lists that become typed DataFrame columns.  Peak memory
+is one raw record plus the projected columns.
+
+Dumps that nest the real rows in arrays of each record (Instagram hashtag
+results keep posts under ``topPosts``/``latestPosts``) are flattened with
+``explode``: the nested items become the records and the parent is
+released as soon as its items are projected.
+"""
+
+import json
+
+from ndjson_store import is_ndjson_path, iter_ndjson
+
+CHUNK_SIZE = 1 << 20      # characters read per refill of the decode buffer
+WHERE_BATCH = 10000       # records projected before a ``where`` rule is applied
+
+_MISSING = object()
+
+
+def iter_records(path, chunk_size=CHUNK_SIZE, byte_range=None):
+    """
+    Yield top-level records from a JSON array, back-to-back JSON objects
+    or an NDJSON file without reading the whole file into memory.
+
+    Args:
+        path: Path to a ``.json`` dump or a ``.ndjson``/``.jsonl`` file
+        chunk_size: Characters read per refill of the decode buffer
+        byte_range: Optional ``(start, end)`` of an NDJSON file to read
+
+    Yields:
+        Record dictionaries
+    """
+    if is_ndjson_path(path):
+        yield from iter_ndjson(path, byte_range)
+        return
+    if byte_range is not None:
+        raise ValueError(f"byte ranges need an NDJSON file, got {path}")
+
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+        while True:
+            # skip whitespace and the array punctuation between records
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] in "[],"):
+                pos += 1
+            if pos >= len(buf):
+                if eof:
+                    return
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+                continue
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # record spans the buffer boundary: keep the tail and read on
+                more = f.read(chunk_size)
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            pos = end
+            if isinstance(obj, list):
+                yield from obj
+            else:
+                yield obj
+
+
+def iter_nested(path, keys, byte_range=None):
+    """
+    Yield the items of the ``keys`` arrays of every top-level record.
+
+    Each item is tagged with the array it came from under ``_list``, so a
+    post listed in both ``topPosts`` and ``latestPosts`` can be told apart.
+
+    Args:
+        path: Input JSON array, concatenated JSON or NDJSON file
+        keys: Names of the nested arrays, in the order they are yielded
+        byte_range: Optional ``(start, end)`` of an NDJSON file to read
+
+    Yields:
+        Nested item dictionaries
+    """
+    for record in iter_records(path, byte_range=byte_range):
+        for key in keys:
+            for item in record.get(key) or ():
+                if isinstance(item, dict):
+                    item["_list"] = key
+                    yield item
+
+
+def get_path(record, path):
+    """Return the value at a dotted path, or None if any step is missing."""
+    value = record
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part, _MISSING)
+        if value is _MISSING:
+            return None
+    return value
+
+
+def load_columns(path, columns, drop_empty=True, where=None, byte_range=None, explode=None):
+    """
+    Load only the given dotted paths of every record into a DataFrame.
+
+    Args:
+        path: Input JSON array, concatenated JSON or NDJSON file
+        columns: ``{dotted_path: dtype}`` (pandas dtype names; ``"object"``
+            keeps values such as lists as-is) or a list of paths
+        drop_empty: Drop columns that are missing in every record, like
+            ``dropna(axis=1, how='all')`` after ``json_normalize``
+        where: Optional filter_rules rule over the projected columns; rows
+            it rejects are dropped batch by batch while loading
+        byte_range: Optional ``(start, end)`` of an NDJSON file to read
+        explode: Optional nested array names whose items are the records
+            (see ``iter_nested``)
+
+    Returns:
+        pandas DataFrame with one column per projected path
+    """
+    if where is None:
+        return next(iter_column_batches(path, columns, batch_size=None, drop_empty=drop_empty,
+                                        byte_range=byte_range, explode=explode))
+
+    import pandas as pd
+    df = pd.concat(list(iter_column_batches(path, columns, WHERE_BATCH, where=where, byte_range=byte_range,
+                                            explode=explode)),
+                   ignore_index=True)
+    return df.dropna(axis=1, how='all') if drop_empty else df
+
+
+def iter_column_batches(path, columns, batch_size, drop_empty=False, where=None, byte_range=None,
+                        explode=None):
+    """
+    Stream the projected columns as DataFrames of at most ``batch_size``
+    rows, so memory is bounded by the batch rather than the file.
+
+    Every batch has the same columns unless ``drop_empty`` is set.
+    ``batch_size=None`` yields a single DataFrame with every record.
+    ``where`` is a filter_rules rule evaluated on the raw projected values
+    of each batch; only matching rows are yielded.  ``explode`` projects
+    the items of the named nested arrays instead of the top-level records.
+
+    Yields:
+        pandas DataFrame per batch (at least one, possibly empty)
+    """
+    import pandas as pd
+
+    if not isinstance(columns, dict):
+        columns = {c: "object" for c in columns}
+    paths = [(c, c.split(".")) for c in columns]
+    values = {c: [] for c in columns}
+    rows, emitted = 0, False
+
+    if explode:
+        records = iter_nested(path, explode, byte_range=byte_range)
+    else:
+        records = iter_records(path, byte_range=byte_range)
+
+    for record in records:
+        for name, parts in paths:
+            value = record
+            for part in parts:
+                if not isinstance(value, dict):
+                    value = None
+                    break
+                value = value.get(part)
+            values[name].append(value)
+        rows += 1
+        if batch_size and rows == batch_size:
+            yield _frame(pd, values, columns, drop_empty, where)
+            values = {c: [] for c in columns}
+            rows, emitted = 0, True
+
+    if rows or not emitted:
+        yield _frame(pd, values, columns, drop_empty, where)
+
+
+def _frame(pd, values, columns, drop_empty, where=None):
+    df = pd.DataFrame({
+        name: _typed(pd, values[name], dtype)
+        for name, dtype in columns.items()
+        if not (drop_empty and all(v is None for v in values[name]))
+    })
+    if where is not None:
+        from filter_rules import to_mask
+        df = df[to_mask(where, df)].reset_index(drop=True)
+    return df
+
+
+def _typed(pd, values, dtype):
+    if dtype == "object":
+        return pd.Series(values, dtype="object")
+    # unparseable scalars become missing rather than failing the whole load
+    if dtype in ("float64", "Int64", "int64"):
+        series = pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce")
+        return series.astype("Int64" if dtype == "int64" and series.isna().any() else dtype)
+    return pd.Series(values).astype(dtype)
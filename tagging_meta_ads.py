@@ -334,7 +334,8 @@ import json
 import ast
 from google import genai
 from google.genai import types
-from google.genai.errors import ClientError
+from google.genai.errors import APIError
+from gemini_rate_limiter import generate_content
 import torch
 
 # ─── CONFIG ────────────────────────────────────────────────────────────────────
@@ -343,8 +344,6 @@ MODEL_NAME  = "gemini-2.0-flash-001"
 INPUT_FILE  = "top40_sorted__meta_ads.json"
 OUTPUT_DIR  = "tagged_sorted_meta_ads"
 DEVICE       = "cuda" if torch.cuda.is_available() else "cpu"
-MAX_RETRIES = 5
-RETRY_DELAY  = 5
 # ────────────────────────────────────────────────────────────────────────────────
 
 # ─── TAG CATEGORIES ────────────────────────────────────────────────────────────
@@ -395,32 +394,30 @@ def prepare_prompt(video_url: str, title: str, text: str, cta: str) -> str:
 
 
 def generate_tags(client, prompt: str) -> dict:
-    attempts = 0
-    while attempts < MAX_RETRIES:
-        try:
-            resp = client.models.generate_content(
-                model=MODEL_NAME,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction=(
-                        "You are a content-tagging assistant. Given video metadata, choose the best single tag from each provided list."
-                    ),
-                    temperature=0.0,
-                    max_output_tokens=150,
+    try:
+        # shared cross-process limit and retry (gemini_rate_limiter.py)
+        resp = generate_content(
+            client,
+            model=MODEL_NAME,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                system_instruction=(
+                    "You are a content-tagging assistant. Given video metadata, choose the best single tag from each provided list."
                 ),
-            )
-            raw = resp.text.strip()
-            try:
-                return json.loads(raw)
-            except json.JSONDecodeError:
-                start, end = raw.find("{"), raw.rfind("}")
-                if start != -1 and end != -1:
-                    return json.loads(raw[start:end+1])
-                return {}
-        except ClientError as e:
-            attempts += 1
-            print(f"Rate limit hit (attempt {attempts}/{MAX_RETRIES}), retrying in {RETRY_DELAY}s...")
-            time.sleep(RETRY_DELAY)
+                temperature=0.0,
+                max_output_tokens=150,
+            ),
+        )
+        raw = resp.text.strip()
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            start, end = raw.find("{"), raw.rfind("}")
+            if start != -1 and end != -1:
+                return json.loads(raw[start:end+1])
+            return {}
+    except APIError as e:
+        print(f"Gemini request failed ({e}); using default tags")
     # fallback default tags
     return {key: 'none' for key in ['hierarchy_tag','storyline_tag','hook_tag','cta_tag','actor_tag','icp_tag']}
 
@@ -208,7 +208,8 @@ import json
 import ast
 from google import genai
 from google.genai import types
-from google.genai.errors import ClientError
+from google.genai.errors import APIError
+from gemini_rate_limiter import generate_content
 import torch
 from dotenv import load_dotenv
 
@@ -220,8 +221,6 @@ MODEL_NAME  = "gemini-2.0-flash-001"
 INPUT_FILE  = "yt_filtered.json"    # JSON array of video entries
 OUTPUT_DIR  = "tagged_yt_shorts"
 DEVICE       = "cuda" if torch.cuda.is_available() else "cpu"
-MAX_RETRIES = 5
-RETRY_DELAY  = 5
 
 # ─── TAG CATEGORIES ────────────────────────────────────────────────────────────
 HIERARCHY_TAGS = ["product", "category", "industry", "brand", "none"]
@@ -267,31 +266,30 @@ def prepare_prompt(video_url: str, title: str) -> str:
 
 
 def generate_tags(client, prompt: str) -> dict:
-    attempts = 0
-    while attempts < MAX_RETRIES:
-        try:
-            resp = client.models.generate_content(
-                model=MODEL_NAME,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction=(
-                        "You are a content-tagging assistant. Given video metadata, choose the best single tag from each provided list."
-                    ),
-                    temperature=0.0,
-                    max_output_tokens=150,
+    try:
+        # shared cross-process limit and retry (gemini_rate_limiter.py)
+        resp = generate_content(
+            client,
+            model=MODEL_NAME,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                system_instruction=(
+                    "You are a content-tagging assistant. Given video metadata, choose the best single tag from each provided list."
                 ),
-            )
-            raw = resp.text.strip()
-            try:
-                return json.loads(raw)
-            except json.JSONDecodeError:
-                start, end = raw.find("{"), raw.rfind("}")
-                if start != -1 and end != -1:
-                    return json.loads(raw[start:end+1])
-                return {}
-        except ClientError:
-            attempts += 1
-            time.sleep(RETRY_DELAY)
+                temperature=0.0,
+                max_output_tokens=150,
+            ),
+        )
+        raw = resp.text.strip()
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            start, end = raw.find("{"), raw.rfind("}")
+            if start != -1 and end != -1:
+                return json.loads(raw[start:end+1])
+            return {}
+    except APIError as e:
+        print(f"Gemini request failed ({e}); using default tags")
     # fallback to 'none'
     return {key: 'none' for key in ['hierarchy_tag','storyline_tag','hook_tag','cta_tag','actor_tag','icp_tag']}
 
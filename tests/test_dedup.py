@@ -0,0 +1,37 @@
+import os
+import sys
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dedup import dedupe_records
+
+COPY = "Our classic pique polo shirt in breathable cotton, now in twelve colours for summer"
+
+
+def _ad(url, text=COPY):
+    return {"video_hd_url": url, "snapshot_body_text": text}
+
+
+def test_same_copy_different_video_is_kept():
+    records = [_ad("https://video.fbcdn.net/a.mp4"), _ad("https://video.fbcdn.net/b.mp4")]
+    assert len(dedupe_records(records, "meta_ads")) == 2
+
+
+def test_same_video_different_signature_is_merged():
+    records = [_ad("https://video.fbcdn.net/a.mp4?oh=1&oe=2"), _ad("https://video.fbcdn.net/a.mp4?oh=3")]
+    deduped = dedupe_records(records, "meta_ads")
+    assert len(deduped) == 1
+    assert deduped[0]["occurrences"] == 2
+
+
+def test_same_copy_merges_when_one_side_has_no_video():
+    records = [_ad("https://video.fbcdn.net/a.mp4"), _ad(None, COPY + " #polo")]
+    assert len(dedupe_records(records, "meta_ads")) == 1
+
+
+def test_copy_without_video_does_not_bridge_two_videos():
+    records = [_ad("https://video.fbcdn.net/a.mp4"), _ad(None), _ad("https://video.fbcdn.net/b.mp4")]
+    deduped = dedupe_records(records, "meta_ads")
+    assert [r["video_hd_url"] for r in deduped] == ["https://video.fbcdn.net/a.mp4",
+                                                    "https://video.fbcdn.net/b.mp4"]
+    assert [r["occurrences"] for r in deduped] == [2, 1]
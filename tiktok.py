@@ -27,32 +27,25 @@
 # print("Results saved to tiktok_polo_shirts_ads.json")
 
 
-from apify_client import ApifyClient
 import json
-import os
+from ingestion import ADAPTERS, fetch_items
 
-# 1. Initialize client
-API_TOKEN = os.getenv('APIFY_API_TOKEN')  # os.getenv("APIFY_TOKEN", "<YOUR_API_TOKEN>")
-client = ApifyClient(API_TOKEN)
+# 1. TikTok Hashtag Scraper actor, via the shared ingestion core
+ADAPTER = ADAPTERS["tiktok"]
+ACTOR_ID = ADAPTER.actor_id
 
 # 2. Prepare Actor input for #poloshirts, up to 500 items
-run_input = {
-    "hashtags": ["poloshirts"],        # omit the leading “#”
-    "resultsPerPage": 100,             # pages of 100 items each
-    "maxItems": 500,                   # stop after 500 total
-    "shouldDownloadVideos": False,
-    "shouldDownloadCovers": False,
-    "shouldDownloadSubtitles": False,
-    "shouldDownloadSlideshowImages": False,
-}
-
-# 3. Run the TikTok Hashtag Scraper actor
-run = client.actor("f1ZeP0K58iwlqG2pY").call(run_input=run_input)
-
-# 4. Fetch all items and save to JSON
-items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
-output_file = "tiktok_poloshirts_500.json"
-with open(output_file, "w", encoding="utf-8") as f:
-    json.dump(items, f, ensure_ascii=False, indent=2)
-
-print(f"✅ Retrieved {len(items)} TikToks for #poloshirts and saved to {output_file}")
+def build_run_input(hashtag="poloshirts", max_items=500):
+    return ADAPTER.build_input(hashtag, max_items)
+
+
+if __name__ == "__main__":
+    # 3. Run the TikTok Hashtag Scraper actor and fetch all items
+    items = list(fetch_items("tiktok", "poloshirts", 500))
+
+    # 4. Save to JSON
+    output_file = "tiktok_poloshirts_500.json"
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(items, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ Retrieved {len(items)} TikToks for #poloshirts and saved to {output_file}")
@@ -31,38 +31,27 @@
 
 # print("Results saved to youtube_polo_shirts_ads.json")
 
-from apify_client import ApifyClient
 import json
-import os
+from ingestion import ADAPTERS, fetch_items
 
-# --- 1. Initialize the ApifyClient with your API token ---
-# Replace "<YOUR_API_TOKEN>" with your actual Apify API token (keep it secret!)
-API_TOKEN = os.getenv('APIFY_API_TOKEN')  #os.getenv("APIFY_TOKEN", "<YOUR_API_TOKEN>")
-client = ApifyClient(API_TOKEN)
+# --- 1. YouTube Hashtag Scraper actor, via the shared ingestion core ---
+ADAPTER = ADAPTERS["youtube_shorts"]
+ACTOR_ID = ADAPTER.actor_id
 
 # --- 2. Prepare the actor input for scraping Shorts only ---
-run_input = {
-    "hashtags": ["poloshirts"],      # the hashtag(s) to search for (without the # sign)
-    "maxResults": 500,                 # we’re not interested in full-length videos
-    "scrapeShortsOnly": True,        # enforce that only Shorts are scraped
-            
-}
+def build_run_input(hashtag="poloshirts", max_results=500):
+    return ADAPTER.build_input(hashtag, max_results)
 
-# --- 3. Run the actor and wait for it to finish ---
-# Actor ID: 89uTe0zmDUIatNKSd (YouTube Hashtag Scraper)
-run = client.actor("89uTe0zmDUIatNKSd").call(run_input=run_input)
 
-# --- 4. Fetch all items from the default dataset ---
-results = []
-dataset = client.dataset(run["defaultDatasetId"])
-for item in dataset.iterate_items():
+if __name__ == "__main__":
+    # --- 3. Run the actor and fetch all items from the default dataset ---
     # The scraper already filtered to Shorts only,
     # but you can add further filtering here if needed.
-    results.append(item)
+    results = list(fetch_items("youtube_shorts", "poloshirts", 500))
 
-# --- 5. Save the results to a JSON file ---
-output_filename = "youtube_500_shorts_poloshirts.json"
-with open(output_filename, "w", encoding="utf-8") as f:
-    json.dump(results, f, ensure_ascii=False, indent=4)
+    # --- 4. Save the results to a JSON file ---
+    output_filename = "youtube_500_shorts_poloshirts.json"
+    with open(output_filename, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
 
-print(f"✅ Saved {len(results)} Shorts for #poloshirts to {output_filename}")
+    print(f"✅ Saved {len(results)} Shorts for #poloshirts to {output_filename}")